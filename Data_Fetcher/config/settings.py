@@ -5,6 +5,38 @@ class Settings(BaseSettings):
     DEFAULT_TIMEOUT_SEC: int = 30
     DEFAULT_RETRIES: int = 2
     TTL_SECONDS: int = 600  # in-memory TTL for reference maps
+    CACHE_MAX_ENTRIES: int = 10_000  # LRU bound for the in-memory cache (0 = unbounded)
+    CACHE_MAX_BYTES: int = 0  # approximate byte budget for the in-memory cache (0 = unbounded)
+    REFERENCE_CACHE_PATH: str = ""  # sqlite file for the persistent L2 reference cache ("" = RAM only)
+    REFERENCE_CACHE_VERSION: str = "1"  # bump to invalidate prebuilt maps stored on disk (sqlite L2 and shared tables)
+    SHARED_TABLES_PATH: str = ""  # mmap'd reference tables shared by all workers, e.g. /dev/shm/df_ref.tbl; takes precedence over REFERENCE_CACHE_PATH
+    HTTP_MAX_CONNECTIONS: int = 100  # per-institution connection pool limits
+    HTTP_MAX_KEEPALIVE: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2: bool = False  # needs the optional 'h2' package (httpx[http2])
+    RETRY_BASE_DELAY: float = 0.1  # seconds; exponential backoff with full jitter
+    RETRY_MAX_DELAY: float = 10.0
+    RETRY_BUDGET_RATIO: float = 0.2  # retries allowed per original request, fleet-wide
+    RETRY_BUDGET_MIN_PER_SEC: float = 1.0
+    BREAKER_FAILURE_THRESHOLD: int = 5  # consecutive upstream failures that open a circuit
+    BREAKER_RESET_TIMEOUT: float = 30.0
+    BATCH_CONCURRENCY: int = 64  # in-flight calls per fan-out batch
+    RATE_LIMIT_IDLE_TTL: float = 300.0  # seconds before an unused rate-limit bucket is dropped
+    PARSE_MAX_ERROR_RATE: float = 0.05  # tolerant parsing aborts a file above this share of bad rows
+    PARSE_MIN_ROWS_FOR_ABORT: int = 100  # rows seen before the error rate is enforced mid-file
+    QUARANTINE_PATH: str = ""  # JSON-lines file for quarantined rows ("" = keep them in memory)
+    LLM_MAPPING_CACHE_PATH: str = ""  # sqlite file of LLM-inferred column mappings ("" = per process)
+    LLM_MAPPING_VERSION: str = "1"  # bump to discard stored mappings (e.g. after a prompt change)
+    LLM_MAPPING_SAMPLE_ROWS: int = 5  # rows shown to the model next to the header
+    BANK_PROFILES_PATH: str = ""  # institution profiles ("" = config/bank_profiles.yaml), e.g. the stub profiles in testing/
+    BANK_PROFILES_CHECK_INTERVAL: float = 2.0  # seconds between mtime checks of bank_profiles.yaml
+    RATE_AIMD_MIN_RATE: float = 0.5  # adaptive per-institution rate bounds (requests per second)
+    RATE_AIMD_MAX_RATE: float = 100.0  # ceiling for institutions whose rate_limit sets no max_rate_per_sec
+    RATE_AIMD_INCREASE: float = 1.0  # rps gained per second of clean traffic
+    RATE_AIMD_DECREASE: float = 0.5  # multiplier applied on 429 / timeout / slow responses
+    RATE_AIMD_LATENCY_TARGET: float = 0.0  # seconds; back off when the latency EWMA exceeds it (0 = off)
+    RATE_AIMD_COOLDOWN: float = 1.0  # minimum seconds between two decreases
+    SHARED_RATE_LIMIT_PATH: str = ""  # mmap'd GCRA state shared by all workers, e.g. /dev/shm/df_rate.gcra
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -1,9 +1,13 @@
 # Example orchestration snippet
-from parsers.json_parser import parse_json_accounts, parse_json_transactions
-from parsers.csv_parser import parse_csv_transactions
-from parsers.xml_ofx_parser import parse_camt_accounts, parse_custom_bankB_statement, parse_ofx_transactions
-from parsers.html_parser import parse_html_accounts, parse_html_transactions
-from transformers.finance import to_canonical_accounts, to_canonical_transactions
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # Data_Fetcher root: parsers use package imports
+
+from data_fetcher.parsers.json_parser import parse_json_accounts, parse_json_transactions
+from data_fetcher.parsers.csv_parser import parse_csv_transactions
+from data_fetcher.parsers.xml_ofx_parser import parse_camt_accounts, parse_custom_bankB_statement, parse_ofx_transactions
+from data_fetcher.parsers.html_parser import parse_html_accounts, parse_html_transactions
+from data_fetcher.transformers.finance import to_canonical_accounts, to_canonical_transactions
 import json
 
 import json
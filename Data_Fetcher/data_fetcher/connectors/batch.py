@@ -0,0 +1,159 @@
+# data_fetcher/connectors/batch.py
+'''
+bounded-concurrency fan-out of one connector operation over many RequestCtx
+objects, yielding results as they complete.
+'''
+
+import asyncio
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+from config.settings import settings
+from ..utils.error_handler import FetchError, map_exception
+from ..utils.rate_limiter import RateLimiter
+
+@dataclass
+class BatchItem:
+    index: int                      # position of ctx in the submitted sequence
+    ctx: Any
+    result: Optional[Dict] = None
+    error: Optional[FetchError] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+@dataclass
+class BatchStats:
+    submitted: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    @property
+    def completed(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Completed items per second so far."""
+        return self.completed / self.elapsed if self.elapsed > 0 else 0.0
+
+class FanOut:
+    """
+    Async iterator over BatchItem in completion order. At most `concurrency`
+    calls run at once. Given a `limiter` and a `limit_key`, each call first
+    waits for a token under limit_key(ctx), so every institution keeps its own
+    rate; by default FanOut takes no tokens (connectors do, per attempt).
+    The input is consumed lazily, so thousands of ctxs do not become
+    thousands of tasks up front. Errors of `op` are attached to their item,
+    never raised; an error raised by the ctxs iterable itself is re-raised once
+    the calls already in flight have been yielded.
+
+    Stopping early (break) leaves the workers to the event loop's async
+    generator finalizer; `await fanout.aclose()` or `async with fanout:` stops
+    them at once and sets stats.finished_at.
+    """
+    def __init__(
+        self,
+        op: Callable[[Any], Awaitable[Dict]],
+        ctxs: Iterable[Any],
+        concurrency: int = settings.BATCH_CONCURRENCY,
+        limiter: Optional[RateLimiter] = None,
+        limit_key: Optional[Callable[[Any], str]] = None,
+    ):
+        if (limiter is None) != (limit_key is None):
+            raise ValueError("FanOut needs both limiter and limit_key, or neither")
+        self._op, self._ctxs = op, ctxs
+        self._concurrency = max(1, concurrency)
+        self._limiter, self._limit_key = limiter, limit_key
+        self.stats = BatchStats()
+        # weak, so an abandoned iteration is still finalized when the loop drops it
+        self._gen: Optional["weakref.ref[AsyncGenerator[BatchItem, None]]"] = None
+        self._finished: Optional[asyncio.Event] = None  # set once the current iteration has cleaned up
+
+    def __aiter__(self) -> AsyncIterator[BatchItem]:
+        gen = self._iterate()
+        self._gen, self._finished = weakref.ref(gen), None
+        return gen
+
+    async def aclose(self) -> None:
+        """Cancel the workers of the current iteration and wait for them."""
+        gen = self._gen() if self._gen is not None else None
+        if gen is not None:
+            await gen.aclose()
+        elif self._finished is not None:
+            await self._finished.wait()  # already handed to the finalizer
+
+    async def __aenter__(self) -> "FanOut":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    async def _iterate(self) -> AsyncGenerator[BatchItem, None]:
+        it = enumerate(self._ctxs)
+        done: "asyncio.Queue[Optional[BatchItem]]" = asyncio.Queue(maxsize=2 * self._concurrency)
+        self.stats = BatchStats()
+        finished = self._finished = asyncio.Event()
+        failed: List[Exception] = []  # raised by the ctxs iterable; _run never raises
+
+        async def worker() -> None:
+            cancelled = False
+            try:
+                for index, ctx in it:  # shared iterator: each item goes to exactly one worker
+                    self.stats.submitted += 1
+                    await done.put(await self._run(index, ctx))
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            except Exception as e:
+                failed.append(e)
+            finally:
+                # a cancelled worker's consumer is gone: waiting for queue space would never end
+                if not cancelled:
+                    await done.put(None)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self._concurrency)]
+        try:
+            remaining = len(workers)
+            while remaining:
+                item = await done.get()
+                if item is None:
+                    remaining -= 1
+                    continue
+                yield item
+            if failed:
+                raise failed[0]
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.stats.finished_at = time.monotonic()
+            finished.set()
+
+    async def collect(self) -> list:
+        """Run to completion and return items in submission order."""
+        items = [item async for item in self]
+        return sorted(items, key=lambda i: i.index)
+
+    async def _run(self, index: int, ctx: Any) -> BatchItem:
+        item = BatchItem(index, ctx)
+        start = time.monotonic()
+        try:
+            if self._limiter is not None:
+                await self._limiter.acquire(self._limit_key(ctx))
+            item.result = await self._op(ctx)
+            self.stats.succeeded += 1
+        except Exception as e:
+            item.error = map_exception(e)
+            self.stats.failed += 1
+        item.elapsed = time.monotonic() - start
+        return item
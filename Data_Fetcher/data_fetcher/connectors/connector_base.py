@@ -3,10 +3,20 @@
 defines a base connector class for sending HTTP POST requests with retries, timeouts, and error handling.
 '''
 
+import asyncio
+import hashlib
+import json as jsonlib
+import time
 from dataclasses import dataclass
 import httpx
-from typing import Any, Dict
-from ..utils.error_handler import FetchError
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional, Union
+from ..utils.adaptive_rate import AIMDController, default_rate_control
+from ..utils.error_handler import map_exception
+from ..utils.singleflight import SingleFlight
+from .batch import FanOut
+from .http_pool import ClientPool, default_pool
+from .resilience import Resilience, default_resilience
+from .response_cache import ResponseCache
 
 @dataclass
 class RequestCtx:
@@ -15,25 +25,149 @@ class RequestCtx:
     retries: int
     extra: Dict[str, Any]
 
+# Shared by all connectors so identical requests coalesce across instances.
+default_singleflight = SingleFlight()
+
 class ConnectorBase:
-    def __init__(self, base_url: str):
+    def __init__(
+        self,
+        base_url: str,
+        response_cache: Optional[ResponseCache] = None,
+        institution_id: Optional[str] = None,
+        pool: Optional[ClientPool] = None,
+        resilience: Optional[Resilience] = None,
+        singleflight: Optional[SingleFlight] = None,
+        rate_control: Optional[AIMDController] = None,
+    ):
         self.base_url = base_url
+        self.response_cache = response_cache
+        self.institution_id = institution_id or base_url
+        self.pool = pool or default_pool
+        self.resilience = resilience or default_resilience
+        self.singleflight = singleflight or default_singleflight
+        self.rate_control = rate_control or default_rate_control
 
-    async def _post_json(self, path: str, json: Dict, ctx: RequestCtx) -> Dict:
-        for attempt in range(ctx.retries + 1):
-            try:
-                async with httpx.AsyncClient(timeout=ctx.timeout) as client:
-                    r = await client.post(f"{self.base_url}{path}", json=json)
-                    r.raise_for_status()
-                    return r.json()
-            except Exception as e:
-                if attempt == ctx.retries:
-                    raise FetchError("BANK_FETCH_FAILED", str(e), 502, {"path": path})
-
-
+    def fan_out(
+        self,
+        op: Union[str, Callable[[RequestCtx], Awaitable[Dict]]],
+        ctxs: Iterable[RequestCtx],
+        **kwargs,
+    ) -> FanOut:
+        """
+        Run `op` (a method name such as "fetch_balance", or a callable) over many
+        ctxs with bounded concurrency; `async for item in run` yields BatchItems
+        as they finish and `run.stats.throughput` reports items/s. FanOut takes
+        no tokens itself: every upstream attempt waits for one in _with_retries,
+        under rate_key(ctx), the key the adaptive rate is adjusted under.
+        """
+        fn = getattr(self, op) if isinstance(op, str) else op
+        return FanOut(fn, ctxs, **kwargs)
 
+    def rate_key(self, ctx: RequestCtx) -> str:
+        """Rate-limit bucket of a request: ctx.extra["institution_id"], else this connector's."""
+        return ctx.extra.get("institution_id") or self.institution_id
 
+    async def _cached_post_json(self, path: str, json: Dict, ctx: RequestCtx) -> Dict:
+        """_post_json behind the response cache; ctx.extra["no_cache"] forces a live call."""
+        if self.response_cache is None or ctx.extra.get("no_cache"):
+            return await self._post_json(path, json, ctx)
+        return await self.response_cache.fetch(
+            f"{self.base_url}{path}", ctx.access_token, lambda: self._post_json(path, json, ctx), path=path
+        )
 
+    async def _post_json(self, path: str, json: Dict, ctx: RequestCtx) -> Dict:
+        """
+        Identical concurrent POSTs (same URL and body) share one upstream call
+        and its result or error; ctx.extra["no_coalesce"] opts out. The first
+        caller's ctx (timeout, retries) applies to the shared call, and every
+        caller receives the same dict, so treat it as read-only.
+        """
+        if ctx.extra.get("no_coalesce"):
+            return await self._send_json(path, json, ctx)
+        body = jsonlib.dumps(json, sort_keys=True, separators=(",", ":"), default=str)
+        key = hashlib.sha256(f"{self.base_url}{path}\0{body}".encode("utf-8")).hexdigest()
+        return await self.singleflight.do(key, lambda: self._send_json(path, json, ctx))
 
+    async def _send_json(self, path: str, json: Dict, ctx: RequestCtx) -> Dict:
+        async def once() -> Dict:
+            client = self.pool.client(self.institution_id)
+            r = await client.post(f"{self.base_url}{path}", json=json, timeout=ctx.timeout)
+            r.raise_for_status()
+            return r.json()
+        return await self._with_retries(path, ctx, once)
 
+    async def _stream_post(self, path: str, json: Dict, ctx: RequestCtx) -> AsyncIterator[bytes]:
+        """
+        POST and yield the response body in chunks as they arrive, without ever
+        holding the whole payload. Retries follow the _send_json policy but only
+        happen before the first chunk is handed out; a failure mid-body raises.
+        """
+        async def open_stream() -> httpx.Response:
+            client = self.pool.client(self.institution_id)
+            request = client.build_request("POST", f"{self.base_url}{path}", json=json, timeout=ctx.timeout)
+            r = await client.send(request, stream=True)
+            if r.is_error:
+                await r.aread()  # error bodies are small; map_exception reads error_code from them
+                await r.aclose()
+                r.raise_for_status()
+            return r
+        r = await self._with_retries(path, ctx, open_stream)
+        try:
+            async for chunk in r.aiter_bytes():
+                yield chunk
+        except Exception as e:
+            err = map_exception(e)
+            err.meta.setdefault("path", path)
+            raise err from e
+        finally:
+            await r.aclose()
 
+    async def _with_retries(self, path: str, ctx: RequestCtx, once: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run one request attempt with retries for errors map_exception marks
+        retryable (timeouts, connection failures, 429, 5xx), exponential backoff
+        with jitter and the shared retry budget. rate_key(ctx) selects one bucket
+        for everything per-upstream: its circuit breaker, the limiter it waits
+        on for a token before every attempt, and the adaptive rate its outcomes
+        feed, so one failing key does not trip the breaker of the others.
+        """
+        res = self.resilience
+        key = self.rate_key(ctx)
+        breaker = res.breaker(key)
+        res.stats.requests += 1
+        res.budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                breaker.before_call()
+            except Exception:
+                res.stats.circuit_rejections += 1
+                raise
+            await self.rate_control.limiter.acquire(key)
+            started = time.monotonic()
+            try:
+                data = await once()
+            except Exception as e:
+                err = map_exception(e)
+                err.meta.setdefault("path", path)
+                # 429s, our timeouts and the bank's gateway timeouts all mean "slow down"
+                if err.status in (429, 504) or err.meta.get("upstream_status") == 504:
+                    self.rate_control.on_throttle(key, err.retry_after)
+                # Only upstream health problems count against the breaker; a 4xx or
+                # a 429 means the bank is up and answering.
+                if err.retryable and err.status != 429:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                if not err.retryable or attempt >= ctx.retries:
+                    raise err from e
+                if not res.budget.try_withdraw():
+                    res.stats.budget_exhausted += 1
+                    raise err from e
+                res.stats.retries += 1
+                await asyncio.sleep(res.backoff.delay(attempt, err.retry_after))
+                attempt += 1
+            else:
+                breaker.record_success()
+                self.rate_control.on_success(key, time.monotonic() - started)
+                return data
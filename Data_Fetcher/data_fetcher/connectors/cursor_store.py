@@ -0,0 +1,47 @@
+# data_fetcher/connectors/cursor_store.py
+'''
+per-item sync cursors. A cursor is only written after the delta it ends has
+been committed downstream, so a crash replays at most one page.
+'''
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Optional, Protocol
+
+class CursorStore(Protocol):
+    def get(self, item_id: str) -> Optional[str]: ...
+    def set(self, item_id: str, cursor: str) -> None: ...
+
+class MemoryCursorStore:
+    def __init__(self):
+        self._cursors: Dict[str, str] = {}
+
+    def get(self, item_id: str) -> Optional[str]:
+        return self._cursors.get(item_id)
+
+    def set(self, item_id: str, cursor: str) -> None:
+        self._cursors[item_id] = cursor
+
+class SqliteCursorStore:
+    """Durable cursor store; each set() is its own committed transaction."""
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS cursors (item_id TEXT PRIMARY KEY, cursor TEXT NOT NULL)")
+        self._lock = threading.Lock()
+
+    def get(self, item_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT cursor FROM cursors WHERE item_id = ?", (item_id,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, item_id: str, cursor: str) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO cursors (item_id, cursor) VALUES (?, ?)", (item_id, cursor))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
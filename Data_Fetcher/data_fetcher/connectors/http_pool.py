@@ -0,0 +1,102 @@
+# data_fetcher/connectors/http_pool.py
+'''
+long-lived, pooled httpx.AsyncClient instances shared by connectors, one per
+institution, so TCP/TLS connections are reused across requests.
+'''
+
+import asyncio
+import importlib.util
+import logging
+import weakref
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+import httpx
+from config.settings import settings
+
+log = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class PoolConfig:
+    max_connections: int = settings.HTTP_MAX_CONNECTIONS
+    max_keepalive_connections: int = settings.HTTP_MAX_KEEPALIVE
+    keepalive_expiry: float = settings.HTTP_KEEPALIVE_EXPIRY
+    http2: bool = settings.HTTP2
+
+class ClientPool:
+    """
+    Lazily creates one AsyncClient per institution and keeps it for the life of
+    the pool. Request timeouts are passed per call, so the clients carry none.
+    A client belongs to the event loop that created it, so clients are kept
+    per running loop: a long-lived pool (default_pool) serves successive
+    asyncio.run() calls, and a loop's clients are dropped once it closes.
+    aclose() (or leaving `async with pool:`) closes the current loop's clients.
+    """
+    def __init__(
+        self,
+        default: Optional[PoolConfig] = None,
+        overrides: Optional[Dict[str, PoolConfig]] = None,
+        transport_factory: Optional[Callable[[str], httpx.AsyncBaseTransport]] = None,
+    ):
+        self._default = default or PoolConfig()
+        self._overrides = dict(overrides or {})
+        self._transport_factory = transport_factory
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = \
+            weakref.WeakKeyDictionary()
+        self._closed = False
+
+    def configure(self, key: str, config: PoolConfig) -> None:
+        """Set limits for one institution; applies the next time its client is created."""
+        self._overrides[key] = config
+
+    def client(self, key: str) -> httpx.AsyncClient:
+        if self._closed:
+            raise RuntimeError("ClientPool is closed; call start() before reuse")
+        loop = asyncio.get_running_loop()
+        clients = self._clients.get(loop)
+        if clients is None:
+            self._drop_closed_loops()
+            clients = self._clients[loop] = {}
+        client = clients.get(key)
+        if client is None or client.is_closed:
+            client = clients[key] = self._make_client(key)
+        return client
+
+    async def start(self) -> "ClientPool":
+        self._closed = False
+        return self
+
+    async def aclose(self) -> None:
+        """Close this loop's clients; those of loops that have already closed are dropped."""
+        self._closed = True
+        clients = self._clients.pop(asyncio.get_running_loop(), {})
+        self._drop_closed_loops()
+        for client in clients.values():
+            await client.aclose()
+
+    def _drop_closed_loops(self) -> None:
+        # their connections died with the loop; the clients can no longer be closed cleanly
+        for loop in [loop for loop in self._clients.keys() if loop.is_closed()]:
+            del self._clients[loop]
+
+    async def __aenter__(self) -> "ClientPool":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    def _make_client(self, key: str) -> httpx.AsyncClient:
+        cfg = self._overrides.get(key, self._default)
+        http2 = cfg.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            log.warning("HTTP/2 requested for %s but 'h2' is not installed (pip install httpx[http2]); using HTTP/1.1", key)
+            http2 = False
+        limits = httpx.Limits(
+            max_connections=cfg.max_connections,
+            max_keepalive_connections=cfg.max_keepalive_connections,
+            keepalive_expiry=cfg.keepalive_expiry,
+        )
+        transport = self._transport_factory(key) if self._transport_factory else None
+        return httpx.AsyncClient(limits=limits, http2=http2, transport=transport, timeout=None)
+
+# Process-wide pool used by connectors that are not given one explicitly.
+default_pool = ClientPool()
@@ -1,11 +1,136 @@
 # data_fetcher/connectors/plaid_connector.py
+import hashlib
+import inspect
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
+from ..parsers.json_parser import parse_plaid_transactions
+from ..parsers.stream_parser import JSONArrayStream, aparse_stream
+from ..transformers.finance import to_canonical_transactions
+from ..utils.error_handler import FetchError
 from .connector_base import ConnectorBase, RequestCtx
+from .cursor_store import CursorStore, MemoryCursorStore
+from .response_cache import CachePolicy, ResponseCache
+
+@dataclass
+class SyncDelta:
+    """One complete /transactions/sync update (all pages up to has_more=false), parsed and canonicalized."""
+    item_id: str
+    added: List[Dict[str, Any]]
+    modified: List[Dict[str, Any]]
+    removed: List[str]          # txn_ids
+    cursor: str                 # next_cursor of the last page
+
+@dataclass
+class SyncResult:
+    item_id: str
+    cursor: Optional[str]
+    pages: int = 0
+    added: int = 0
+    modified: int = 0
+    removed: int = 0
+    restarts: int = 0
 
 class PlaidConnector(ConnectorBase):
+    # Balances move, so they are only briefly fresh; auth (account/routing
+    # numbers) practically never changes.
+    CACHE_POLICIES = {
+        "/accounts/balance/get": CachePolicy(ttl=15, stale_ttl=120),
+        "/auth/get": CachePolicy(ttl=3600, stale_ttl=86400),
+    }
+    SYNC_PAGE_SIZE = 500
+    MAX_SYNC_RESTARTS = 3
+
+    def __init__(
+        self,
+        base_url: str,
+        response_cache: Optional[ResponseCache] = None,
+        cursors: Optional[CursorStore] = None,
+        **kwargs,
+    ):
+        super().__init__(base_url, response_cache or ResponseCache(self.CACHE_POLICIES), **kwargs)
+        self.cursors = cursors if cursors is not None else MemoryCursorStore()
+
     async def fetch_balance(self, ctx: RequestCtx) -> dict:
         payload = {"access_token": ctx.access_token}
-        return await self._post_json("/accounts/balance/get", payload, ctx)
+        return await self._cached_post_json("/accounts/balance/get", payload, ctx)
 
     async def fetch_auth(self, ctx: RequestCtx) -> dict:
         payload = {"access_token": ctx.access_token}
-        return await self._post_json("/auth/get", payload, ctx)
+        return await self._cached_post_json("/auth/get", payload, ctx)
+
+    async def stream_transactions(self, ctx: RequestCtx, start_date: str, end_date: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        /transactions/get in streaming mode: each canonical transaction is yielded
+        as soon as its JSON object has downloaded, page after page, so neither the
+        raw body nor the full object tree is ever held in memory. A body that is
+        cut short or malformed raises BANK_BAD_RESPONSE after the transactions
+        read up to that point.
+        """
+        offset = 0
+        while True:
+            payload = {"access_token": ctx.access_token, "start_date": start_date, "end_date": end_date,
+                       "options": {"count": self.SYNC_PAGE_SIZE, "offset": offset}}
+            parser = JSONArrayStream({"transactions"})
+            seen = 0
+            try:
+                async for _, t in aparse_stream(self._stream_post("/transactions/get", payload, ctx), (), parser):
+                    seen += 1
+                    yield to_canonical_transactions(parse_plaid_transactions([t]))["transactions"][0]
+            except ValueError as e:
+                raise FetchError("BANK_BAD_RESPONSE", f"/transactions/get: {e}", 502,
+                                 {"path": "/transactions/get", "offset": offset + seen}) from e
+            offset += seen
+            if not seen or offset >= (parser.top.get("total_transactions") or 0):
+                return
+
+    async def sync_transactions(
+        self,
+        ctx: RequestCtx,
+        commit: Callable[[SyncDelta], Union[Awaitable[None], None]],
+    ) -> SyncResult:
+        """
+        Pull only what changed since the item's stored cursor via /transactions/sync.
+        Pages are parsed and canonicalized as they arrive but held back until
+        has_more is false; then `commit` receives one SyncDelta covering every
+        page, and the final next_cursor is persisted only after commit returns,
+        so a failed commit (or crash) re-fetches the whole update next time.
+        The item is ctx.extra["item_id"], else a hash of the access token.
+        """
+        cursors = self.cursors
+        item_id = ctx.extra.get("item_id") or hashlib.sha256(ctx.access_token.encode("utf-8")).hexdigest()[:32]
+        start = cursors.get(item_id)
+        result = SyncResult(item_id, start)
+        added: List[Dict[str, Any]] = []
+        modified: List[Dict[str, Any]] = []
+        removed: List[str] = []
+        cursor = start
+        while True:
+            payload = {"access_token": ctx.access_token, "cursor": cursor or "", "count": self.SYNC_PAGE_SIZE}
+            try:
+                page = await self._post_json("/transactions/sync", payload, ctx)
+            except FetchError as e:
+                # Plaid asks clients to restart the whole pagination loop from the
+                # cursor it began with when the data changed mid-pagination.
+                if (e.meta.get("upstream_code") == "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION"
+                        and result.restarts < self.MAX_SYNC_RESTARTS):
+                    result.restarts += 1
+                    result.pages = 0
+                    added, modified, removed, cursor = [], [], [], start
+                    continue
+                raise
+            added += to_canonical_transactions(parse_plaid_transactions(page.get("added", [])))["transactions"]
+            modified += to_canonical_transactions(parse_plaid_transactions(page.get("modified", [])))["transactions"]
+            removed += [r.get("transaction_id") for r in page.get("removed", [])]
+            cursor = page["next_cursor"]
+            result.pages += 1
+            if not page.get("has_more"):
+                break
+        delta = SyncDelta(item_id=item_id, added=added, modified=modified, removed=removed, cursor=cursor)
+        done = commit(delta)
+        if inspect.isawaitable(done):
+            await done
+        cursors.set(item_id, delta.cursor)
+        result.cursor = delta.cursor
+        result.added, result.modified, result.removed = len(added), len(modified), len(removed)
+        return result
+
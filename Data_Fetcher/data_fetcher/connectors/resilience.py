@@ -0,0 +1,147 @@
+# data_fetcher/connectors/resilience.py
+'''
+retry policy for connectors: exponential backoff with full jitter, a global
+retry budget, and one circuit breaker per institution.
+'''
+
+import random
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Optional
+from config.settings import settings
+from ..utils.error_handler import FetchError
+
+@dataclass(frozen=True)
+class Backoff:
+    base: float = settings.RETRY_BASE_DELAY
+    cap: float = settings.RETRY_MAX_DELAY
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full jitter: uniform(0, min(cap, base * 2**attempt)); a Retry-After hint is a floor."""
+        d = random.uniform(0, min(self.cap, self.base * (2 ** attempt)))
+        if retry_after is not None:
+            d = max(d, min(retry_after, self.cap))
+        return d
+
+class RetryBudget:
+    """
+    Caps retries fleet-wide at `ratio` of recent requests (plus a small per-second
+    floor), so a degraded bank sees at most (1 + ratio)x its normal load.
+    """
+    def __init__(
+        self,
+        ratio: float = settings.RETRY_BUDGET_RATIO,
+        min_per_sec: float = settings.RETRY_BUDGET_MIN_PER_SEC,
+        max_tokens: float = 100.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ratio, self.min_per_sec, self.max_tokens = ratio, min_per_sec, max_tokens
+        self._clock = clock
+        self._tokens, self._last = max_tokens, clock()
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        """Called once per original request."""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        """Called before each retry; False means the budget is spent."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.max_tokens, self._tokens + (now - self._last) * self.min_per_sec)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive retryable failures;
+    open rejects calls for `reset_timeout` seconds, then half-open lets one
+    probe through: success closes the breaker, failure re-opens it.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        key: str,
+        failure_threshold: int = settings.BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = settings.BREAKER_RESET_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.key = key
+        self.failure_threshold, self.reset_timeout = failure_threshold, reset_timeout
+        self._clock = clock
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._probe_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raise CIRCUIT_OPEN instead of letting the call reach an unhealthy bank."""
+        with self._lock:
+            now = self._clock()
+            if self.state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+                self.state, self._probing = self.HALF_OPEN, False
+            # A probe that never reported back (e.g. cancelled) frees its slot after reset_timeout.
+            probe_busy = self._probing and now - self._probe_at < self.reset_timeout
+            if self.state == self.OPEN or (self.state == self.HALF_OPEN and probe_busy):
+                retry_in = max(0.0, self.reset_timeout - (now - self._opened_at))
+                raise FetchError("CIRCUIT_OPEN", f"circuit open for {self.key}", 503,
+                                 {"institution": self.key}, retry_after=retry_in)
+            if self.state == self.HALF_OPEN:
+                self._probing, self._probe_at = True, now
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state, self._failures, self._probing = self.CLOSED, 0, False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state, self._opened_at, self._probing = self.OPEN, self._clock(), False
+
+@dataclass
+class ResilienceStats:
+    requests: int = 0
+    retries: int = 0
+    budget_exhausted: int = 0
+    circuit_rejections: int = 0
+
+class Resilience:
+    """Shared backoff, retry budget and per-institution breakers used by ConnectorBase."""
+    def __init__(
+        self,
+        backoff: Optional[Backoff] = None,
+        budget: Optional[RetryBudget] = None,
+        breaker_factory: Callable[[str], CircuitBreaker] = CircuitBreaker,
+    ):
+        self.backoff = backoff or Backoff()
+        self.budget = budget or RetryBudget()
+        self._breaker_factory = breaker_factory
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self.stats = ResilienceStats()
+
+    def breaker(self, institution: str) -> CircuitBreaker:
+        with self._lock:
+            b = self._breakers.get(institution)
+            if b is None:
+                b = self._breakers[institution] = self._breaker_factory(institution)
+            return b
+
+    def breaker_states(self) -> Dict[str, str]:
+        with self._lock:
+            return {k: b.state for k, b in self._breakers.items()}
+
+    def snapshot(self) -> ResilienceStats:
+        return replace(self.stats)
+
+# Process-wide policy used by connectors that are not given one explicitly.
+default_resilience = Resilience()
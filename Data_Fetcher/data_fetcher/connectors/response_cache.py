@@ -0,0 +1,109 @@
+# data_fetcher/connectors/response_cache.py
+'''
+stale-while-revalidate cache for connector responses, keyed by a hash of
+endpoint and access token so raw tokens are never kept as cache keys.
+'''
+
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Callable, Dict, Optional
+from ..memory_store import TTLCache, MISSING
+
+log = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class CachePolicy:
+    ttl: float        # seconds a response is served as fresh
+    stale_ttl: float  # further seconds it may be served while a refresh runs
+
+@dataclass
+class ResponseCacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    refreshes: int = 0
+    refresh_errors: int = 0
+
+@dataclass
+class _Cached:
+    value: Any
+    fetched_at: float
+
+class ResponseCache:
+    """
+    - fresh (age < ttl): served from memory.
+    - stale (age < ttl + stale_ttl): served from memory; one background refresh
+      per key is started, concurrent stale reads join it instead of adding more.
+    - missing/expired: concurrent callers share a single upstream fetch.
+    Endpoints without a policy are never cached.
+    """
+    def __init__(
+        self,
+        policies: Dict[str, CachePolicy],
+        max_entries: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._policies = dict(policies)
+        self._clock = clock
+        self._store = TTLCache(ttl=max((p.ttl + p.stale_ttl for p in policies.values()), default=1),
+                               max_entries=max_entries, clock=clock)
+        self._refreshing: Dict[str, "asyncio.Task[Any]"] = {}
+        self._stats = ResponseCacheStats()
+
+    @staticmethod
+    def key(endpoint: str, access_token: str) -> str:
+        return hashlib.sha256(f"{endpoint}\0{access_token}".encode("utf-8")).hexdigest()
+
+    async def fetch(
+        self,
+        endpoint: str,
+        access_token: str,
+        loader: Callable[[], Awaitable[Any]],
+        path: Optional[str] = None,
+    ) -> Any:
+        """Return a cached or freshly loaded response; `path` selects the policy (defaults to endpoint)."""
+        policy = self._policies.get(path or endpoint)
+        if policy is None:
+            return await loader()
+        key = self.key(endpoint, access_token)
+        cached = self._store.get(key, MISSING)
+        if cached is not MISSING:
+            age = self._clock() - cached.fetched_at
+            if age < policy.ttl:
+                self._stats.hits += 1
+                return cached.value
+            if age < policy.ttl + policy.stale_ttl:
+                self._stats.stale_hits += 1
+                self._schedule_refresh(key, loader, policy)
+                return cached.value
+        self._stats.misses += 1
+        cached = await self._store.aget_or_load(key, lambda: self._load(loader), policy.ttl + policy.stale_ttl)
+        return cached.value
+
+    def invalidate(self, endpoint: str, access_token: str) -> None:
+        self._store.delete(self.key(endpoint, access_token))
+
+    def stats(self) -> ResponseCacheStats:
+        return replace(self._stats)
+
+    async def _load(self, loader: Callable[[], Awaitable[Any]]) -> _Cached:
+        return _Cached(await loader(), self._clock())
+
+    def _schedule_refresh(self, key: str, loader: Callable[[], Awaitable[Any]], policy: CachePolicy) -> None:
+        if key in self._refreshing:
+            return
+        self._stats.refreshes += 1
+        task = asyncio.ensure_future(self._refresh(key, loader, policy))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _t: self._refreshing.pop(key, None))
+
+    async def _refresh(self, key: str, loader: Callable[[], Awaitable[Any]], policy: CachePolicy) -> None:
+        try:
+            self._store.set(key, await self._load(loader), policy.ttl + policy.stale_ttl)
+        except Exception as e:
+            # Keep serving the stale copy; the next stale read retries the refresh.
+            self._stats.refresh_errors += 1
+            log.warning("background refresh failed: %s", e)
@@ -0,0 +1,118 @@
+# data_fetcher/disk_cache.py
+'''
+persistent, process-local key/value tier on sqlite. Values are pickled, so a
+prebuilt lookup structure comes back as a ready-to-use object in one read.
+Only point this at files the service itself writes.
+'''
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    value       BLOB NOT NULL,
+    version     TEXT,
+    size        INTEGER NOT NULL,
+    expires_at  REAL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+"""
+
+@dataclass
+class DiskCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+class SqliteCache:
+    """
+    sqlite-backed cache tier that survives restarts.
+
+    - `version` lets callers invalidate prebuilt structures when their source changes.
+    - `max_bytes` > 0 bounds the file: least recently read entries are evicted first.
+    - Expiry uses wall-clock time because entries outlive the process.
+    """
+    def __init__(self, path: str, max_bytes: int = 0):
+        self.path = path
+        self._max_bytes = max_bytes
+        self._stats = DiskCacheStats()
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def get(self, key: str, default: Any = None, version: Optional[str] = None) -> Any:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, version, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (version is not None and row[1] != version) or (row[2] is not None and row[2] <= now):
+                self._stats.misses += 1
+                return default
+            if self._max_bytes:
+                self._db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._stats.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, version: Optional[str] = None) -> None:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, version, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, blob, version, len(blob), now + ttl if ttl is not None else None, now),
+            )
+            if self._max_bytes:
+                self._evict_overflow()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cur = self._db.execute(
+                "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )
+            return cur.rowcount
+
+    def nbytes(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def stats(self) -> DiskCacheStats:
+        with self._lock:
+            return replace(self._stats)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _evict_overflow(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self._max_bytes:
+            return
+        for key, size in self._db.execute(
+            "SELECT key, size FROM entries ORDER BY accessed_at"
+        ).fetchall():
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._stats.evictions += 1
+            total -= size
+            if total <= self._max_bytes:
+                break
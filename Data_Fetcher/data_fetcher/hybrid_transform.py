@@ -0,0 +1,182 @@
+# data_fetcher/hybrid_transform.py
+'''
+deterministic-first transformation with the LLM as fallback. A file in a
+known format goes through its parser, and every parsed row is checked for
+completeness. Only the rows the parser could not read or left incomplete are
+sent to ollama_transformer, in one batch. Files no parser recognizes go to
+the LLM whole. Rows are merged back in source order, and meta["paths"] says
+which path produced each one.
+'''
+
+import csv
+import importlib
+import io
+import json
+import re
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+from .ollama_transformer import transform as llm_transform
+from .parsers.quarantine import MemoryQuarantine, QuarantinedRow, RowGuard
+from .utils.bank_router import PARSERS
+from .utils.error_handler import FetchError
+
+# formats whose parsers run rows through a RowGuard, so bad rows can be routed one by one
+_GUARDED = {"csv", "html", "ofx"}
+# formats whose parsers take decoded JSON; the others read the text itself (XML)
+_JSON_INPUT = {"json", "plaid"}
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_CSV_HEADERS = ({"date", "amount"}, {"txn_date", "debit_amount"})
+
+def sniff_format(raw: str) -> Optional[str]:
+    """The transactions format of PARSERS this text looks like, or None if no parser knows it."""
+    t = raw.lstrip()
+    if t.startswith(("{", "[")):
+        return "json"
+    if re.search(r"<STMTTRN>", t, re.I):
+        return "ofx"
+    if re.search(r"<Transactions>\s*<Tx\b", t):
+        return "bankb_xml"
+    if re.search(r"<table\b[^>]*\bid=[\"']?tx\b", t, re.I):
+        return "html"
+    if t.startswith("<"):
+        return None
+    header = next(csv.reader(io.StringIO(t)), [])
+    names = {h.strip() for h in header}
+    return "csv" if any(h <= names for h in _CSV_HEADERS) else None
+
+def missing_fields(tx: Dict[str, Any]) -> List[str]:
+    """
+    Fields a parsed row cannot be used without: an ISO date that exists and an
+    amount. A zero amount is a real value (fee reversals, $0 authorizations)
+    and is kept; only None counts as missing.
+    """
+    missing = []
+    d = tx.get("date")
+    try:
+        if not (isinstance(d, str) and _ISO_DATE.match(d)):
+            raise ValueError
+        date.fromisoformat(d)
+    except ValueError:
+        missing.append("date")
+    if tx.get("amount") is None:
+        missing.append("amount")
+    return missing
+
+def _require_complete(tx: Dict[str, Any]) -> None:
+    missing = missing_fields(tx)
+    if missing:
+        raise FetchError("ROW_INCOMPLETE", f"parsed row lacks {', '.join(missing)}", 422,
+                         {"missing": missing, "parsed": tx})
+
+def _parser(fmt: str):
+    module, _, attr = PARSERS[("transactions", fmt)].partition(":")
+    return getattr(importlib.import_module(f".parsers.{module}", __package__), attr)
+
+def _from_llm(tx: Dict[str, Any], account_id: Optional[str]) -> Dict[str, Any]:
+    """ollama_transformer row -> the parsers' raw transaction shape."""
+    return {
+        "txn_id": tx.get("tx_id"),
+        "account_id": account_id,
+        "date": tx.get("date"),
+        "amount": tx.get("amount"),
+        "currency": tx.get("currency"),
+        "merchant_raw": tx.get("merchant") or tx.get("description"),
+        "mcc": None,
+        "category": tx.get("category"),
+    }
+
+def _llm_source(raws: List[Any]) -> str:
+    """The failed rows as one input for the model: a JSON array of row dicts, or the elements as XML."""
+    if all(isinstance(r, dict) for r in raws):
+        return json.dumps({"transactions": raws}, ensure_ascii=False, default=str)
+    return "<rows>\n" + "\n".join(str(r) for r in raws) + "\n</rows>"
+
+def _run_parser(fmt: str, raw: str, source: str) -> Tuple[List[Dict[str, Any]], List[QuarantinedRow], Dict[str, Any]]:
+    """(rows parsed completely, rows to re-do, parser meta); raises if the file cannot be read at all."""
+    parse = _parser(fmt)
+    if fmt in _GUARDED:
+        sink = MemoryQuarantine()
+        guard = RowGuard(source, sink, max_error_rate=1.0, check=_require_complete)  # never abort: rows fall back
+        parsed = parse(raw, guard=guard)
+        return parsed["transactions"], sink.rows, parsed.get("meta", {})
+    # the others parse whole documents; incomplete rows are picked out afterwards
+    payload: Any = raw
+    if fmt in _JSON_INPUT:
+        payload = json.loads(raw)
+        if fmt == "plaid" and isinstance(payload, dict):  # a whole /transactions/get body
+            payload = payload.get("transactions", [])
+    parsed = parse(payload)
+    good, redo = [], []
+    for i, tx in enumerate(parsed.get("transactions", [])):
+        missing = missing_fields(tx)
+        if missing:
+            redo.append(QuarantinedRow(source, i, "ROW_INCOMPLETE", f"parsed row lacks {', '.join(missing)}",
+                                       tx, i, {"missing": missing, "parsed": tx}))
+        else:
+            good.append(tx)
+    return good, redo, parsed.get("meta", {})
+
+def transform_hybrid(raw: str, fmt: Optional[str] = None, source: str = "upload") -> Dict[str, Any]:
+    """
+    Raw statement text -> {"transactions": [...], "meta": {...}} in the
+    parsers' raw transaction shape, ready for to_canonical_transactions.
+    `fmt` overrides sniffing (e.g. an institution's configured format).
+
+    meta["paths"][i] is "parser", "llm" or "incomplete" (the LLM fallback
+    failed and the parser's partial row was kept) for transactions[i], and
+    meta["counts"] totals them. A failed row the LLM could not recover is left
+    out and remains listed in meta["fallback"].
+    """
+    fmt = fmt or sniff_format(raw)
+    reason = None
+    if fmt is None:
+        reason = "unrecognized format"
+    else:
+        try:
+            good, redo, meta = _run_parser(fmt, raw, source)
+        except ImportError as e:  # optional parser dependency missing, e.g. bs4
+            reason = f"{fmt} parser unavailable: {e}"
+        except Exception as e:
+            reason = f"{fmt} parser failed: {type(e).__name__}: {e}"
+    if reason is not None:
+        result = llm_transform(raw)
+        rows = [_from_llm(tx, result.get("account_id")) for tx in result["transactions"]]
+        return {"transactions": rows,
+                "meta": {"source": "llm", "format": fmt, "reason": reason,
+                         "paths": ["llm"] * len(rows), "counts": {"parser": 0, "llm": len(rows)}}}
+
+    total = len(good) + len(redo)
+    slots: List[Optional[Tuple[str, Dict[str, Any]]]] = [None] * total
+    redo_at = {q.index for q in redo}
+    it = iter(good)
+    for i in range(total):
+        if i not in redo_at:
+            slots[i] = ("parser", next(it))
+
+    meta = {**meta, "format": fmt, "fallback": [
+        {"index": q.index, "position": q.position, "code": q.code, "message": q.message} for q in redo]}
+    if redo:
+        try:
+            result = llm_transform(_llm_source([q.raw for q in redo]))
+            fixed = result["transactions"]
+            if len(fixed) != len(redo):
+                raise ValueError(f"LLM returned {len(fixed)} rows for {len(redo)}")
+        except (RuntimeError, ValueError) as e:
+            meta["llm_error"] = str(e)
+            for q in redo:
+                if "parsed" in q.meta:
+                    slots[q.index] = ("incomplete", q.meta["parsed"])
+        else:
+            for q, tx in zip(redo, fixed):
+                parsed = q.meta.get("parsed")
+                row = _from_llm(tx, result.get("account_id"))
+                if parsed is not None:
+                    # keep what the parser read; take only the missing fields from the model
+                    row = {**parsed, **{f: row[f] for f in q.meta["missing"]}}
+                slots[q.index] = ("llm", row)
+
+    kept = [s for s in slots if s is not None]
+    paths = [p for p, _ in kept]
+    meta["paths"] = paths
+    meta["counts"] = {p: paths.count(p) for p in ("parser", "llm", "incomplete")}
+    return {"transactions": [tx for _, tx in kept], "meta": meta}
@@ -0,0 +1,179 @@
+# data_fetcher/llm_mapping.py
+'''
+schema inference instead of row rewriting: the model sees only a file's
+columns and a few sample rows and answers with a field mapping in the
+sql_to_nosql FieldRule/MappingConfig format. The mapping is stored under a
+fingerprint of the header layout, and every row is then mapped locally by
+sql_to_nosql.data_transformer.transform_record. A layout seen before never
+reaches the model again.
+'''
+
+import hashlib
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional
+from config.settings import settings
+from sql_to_nosql.data_transformer import MappingConfig, parse_mapping, transform_record
+from .disk_cache import SqliteCache
+from .ollama_transformer import SCHEMA, call_ollama, read_document, validate_minimal
+
+TXN_SCHEMA = SCHEMA["properties"]["transactions"]["items"]
+TARGET_FIELDS = list(TXN_SCHEMA["properties"])
+_NUMERIC = {f for f, s in TXN_SCHEMA["properties"].items() if "number" in (s.get("type") or [])}
+# document fields (read_document) that name the statement's account / currency, e.g.
+# Statement.Account@id, accounts.acct, BANKACCTFROM.ACCTID / STMTRS.CURDEF, Account@currency
+_ACCOUNT_FIELD = re.compile(r"(?:^|[.@])(?:account|acct)(?:[_@.]?(?:id|ref|no|number))?$", re.I)
+_CURRENCY_FIELD = re.compile(r"(?:^|[.@])(?:currency|curdef|ccy|cur|iso_currency_code)$", re.I)
+
+_RULE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "candidates": {"type": "array", "items": {"type": "string"}},
+        "cast": {"type": ["string", "null"], "enum": ["float", "int", None]},
+        "default": {"type": ["string", "number", "null"]},
+    },
+    "required": ["candidates"],
+}
+MAPPING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "fields": {
+            "type": "object",
+            "properties": {f: _RULE_SCHEMA for f in TARGET_FIELDS},
+            "required": TARGET_FIELDS,
+        }
+    },
+    "required": ["fields"],
+}
+
+MAPPING_PROMPT = (
+    "You map the columns of a bank statement to a fixed transaction schema. "
+    "You receive the source columns and a few sample rows. For every target field "
+    f"({', '.join(TARGET_FIELDS)}) return the source column names that hold it in 'candidates' "
+    "(most specific first, empty list if none), 'cast' = 'float' for numeric fields, otherwise null, "
+    "and 'default' = null. Use only column names that appear in the source. "
+    "Narrative text is 'description'; three-letter codes such as USD are 'currency'. Output only JSON."
+)
+
+def header_fingerprint(dtype: str, columns: List[str]) -> str:
+    """Identity of a header layout: source type plus normalized column names, in order."""
+    norm = "\x1f".join(" ".join(c.split()).casefold() for c in columns)
+    return hashlib.sha256(f"{dtype}\x1e{norm}".encode("utf-8")).hexdigest()
+
+# ---- Mapping inference and storage ----
+
+def mapping_to_dict(cfg: MappingConfig) -> Dict[str, Any]:
+    """Inverse of parse_mapping, for storage."""
+    return {
+        "source_kind": cfg.source_kind,
+        "target_kind": cfg.target_kind,
+        "fields": {f: {"candidates": r.candidates, "cast": r.cast, "default": r.default} for f, r in cfg.fields.items()},
+        "rules": cfg.rules,
+    }
+
+def infer_mapping(dtype: str, columns: List[str], samples: List[Dict[str, Any]]) -> MappingConfig:
+    """One model call: columns + sample rows in, validated MappingConfig out."""
+    user = (f"Source type: {dtype}\nColumns: {json.dumps(columns, ensure_ascii=False)}\nSample rows:\n"
+            + "\n".join(json.dumps(r, ensure_ascii=False, default=str) for r in samples))
+    # call_ollama validates against MAPPING_SCHEMA, cached or not
+    result = call_ollama([{"role": "system", "content": MAPPING_PROMPT}, {"role": "user", "content": user}],
+                         MAPPING_SCHEMA)
+    by_norm = {c.casefold(): c for c in columns}
+    fields = {}
+    for f in TARGET_FIELDS:
+        rule = result["fields"][f]
+        # keep only columns that exist; the model may echo target names or invent headers
+        candidates = [by_norm[c.casefold()] for c in rule.get("candidates") or [] if c.casefold() in by_norm]
+        cast = "float" if f in _NUMERIC else rule.get("cast")
+        fields[f] = {"candidates": list(dict.fromkeys(candidates)), "cast": cast, "default": rule.get("default")}
+    return parse_mapping({"source_kind": dtype, "target_kind": "canonical", "fields": fields,
+                          "rules": {"trim_strings": True}})
+
+class MappingStore:
+    """Mappings by header fingerprint: a dict in front of an optional sqlite file shared across runs."""
+    def __init__(self, path: str = settings.LLM_MAPPING_CACHE_PATH, version: str = settings.LLM_MAPPING_VERSION):
+        self._mem: Dict[str, MappingConfig] = {}
+        self._disk = SqliteCache(path) if path else None
+        self._version = version
+        self._lock = threading.Lock()                  # guards _locks only
+        self._locks: Dict[str, threading.Lock] = {}    # per fingerprint, held across the model call
+        self.hits = self.misses = 0
+
+    def get(self, fingerprint: str) -> Optional[MappingConfig]:
+        cfg = self._mem.get(fingerprint)
+        if cfg is None and self._disk is not None:
+            raw = self._disk.get(fingerprint, version=self._version)
+            if raw is not None:
+                cfg = self._mem[fingerprint] = parse_mapping(raw)
+        return cfg
+
+    def put(self, fingerprint: str, cfg: MappingConfig) -> None:
+        self._mem[fingerprint] = cfg
+        if self._disk is not None:
+            self._disk.set(fingerprint, mapping_to_dict(cfg), version=self._version)
+
+    def get_or_infer(self, dtype: str, columns: List[str], samples: List[Dict[str, Any]]) -> MappingConfig:
+        fp = header_fingerprint(dtype, columns)
+        cfg = self.get(fp)
+        if cfg is not None:
+            self.hits += 1
+            return cfg
+        with self._lock:
+            lock = self._locks.setdefault(fp, threading.Lock())
+        with lock:  # one inference per new layout; other layouts are not held up by it
+            cfg = self.get(fp)
+            if cfg is None:
+                self.misses += 1
+                cfg = infer_mapping(dtype, columns, samples)
+                self.put(fp, cfg)
+            else:
+                self.hits += 1
+        return cfg
+
+default_store = MappingStore()
+
+def apply_mapping(rows: List[Dict[str, Any]], cfg: MappingConfig) -> List[Dict[str, Any]]:
+    out = []
+    for row in rows:
+        t = transform_record(row, cfg)
+        tx = {f: t.get(f) for f in TARGET_FIELDS}
+        for f in _NUMERIC:
+            if isinstance(tx[f], str):  # apply_cast leaves unparseable text as is
+                tx[f] = None
+        out.append(tx)
+    return out
+
+def _document_value(context: Dict[str, Any], pattern: "re.Pattern[str]") -> Optional[str]:
+    for name, value in context.items():
+        if isinstance(value, str) and pattern.search(name.split("#")[0]):
+            return value
+    return None
+
+def transform_with_mapping(
+    raw_source: str,
+    account_hint: str = "",
+    store: Optional[MappingStore] = None,
+    sample_rows: int = settings.LLM_MAPPING_SAMPLE_ROWS,
+) -> Dict[str, Any]:
+    """
+    Same output as ollama_transformer.transform, but the model is asked at most
+    once per header layout. account_id is the statement's own when the document
+    names one, else account_hint; a statement-level currency fills rows without one.
+    """
+    store = store or default_store
+    dtype, context, columns, rows = read_document(raw_source)
+    if not columns:
+        raise ValueError("no tabular records found in source")
+    cfg = store.get_or_infer(dtype, columns, rows[:sample_rows])
+    transactions = apply_mapping(rows, cfg)
+    currency = _document_value(context, _CURRENCY_FIELD)
+    if currency is not None and re.fullmatch(r"[A-Za-z]{3}", currency):
+        for tx in transactions:
+            tx["currency"] = tx["currency"] or currency.upper()
+    account_id = _document_value(context, _ACCOUNT_FIELD) or account_hint or None
+    result = {"account_id": account_id, "transactions": transactions}
+    errs = validate_minimal(result, SCHEMA)
+    if errs:
+        raise ValueError("Schema validation failed: \n  - " + "\n  - ".join(errs))
+    return result
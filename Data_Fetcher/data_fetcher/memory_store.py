@@ -1,38 +1,365 @@
+import asyncio
+import heapq
+import inspect
+import logging
+import sys
+import threading
 import time
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 from config.settings import settings
+from . import shared_tables
+from .disk_cache import SqliteCache
+
+log = logging.getLogger(__name__)
+
+# Sentinel to pass as get()'s default: it comes back only when the key is
+# absent, so a stored None can be told apart from a miss.
+MISSING = object()
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0    # dropped to honour max_entries / max_bytes
+    expirations: int = 0  # dropped because their TTL ran out
+    loads: int = 0        # loader calls made by get_or_load / aget_or_load
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+    size: int
+
+class _Flight:
+    """One in-progress synchronous load that other threads can wait on."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+def approx_sizeof(value: Any) -> int:
+    """Rough deep size of plain reference data (dicts/lists of str and numbers)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approx_sizeof(k) + approx_sizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(approx_sizeof(v) for v in value)
+    return size
 
 class TTLCache:
-    """RAM-only, TTL-bound cache for reference data (aliases, MCCs, rules)."""
-    def __init__(self, ttl: Optional[int] = None):
+    """
+    RAM-only, bounded LRU cache with per-key TTL for reference data (aliases, MCCs, rules).
+
+    - get/set/delete are O(1); the least recently used entry is evicted once
+      max_entries or max_bytes would be exceeded.
+    - Expired entries are purged proactively on every operation (min-heap on
+      expiry time), so keys that are never read again do not linger.
+    - Safe to share between threads; aget_or_load is also safe to call from
+      many coroutines and runs each key's loader at most once at a time.
+    """
+    def __init__(
+        self,
+        ttl: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = approx_sizeof,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         self._ttl = ttl or settings.TTL_SECONDS
-        self._store: Dict[str, Any] = {}
-        self._ts: Dict[str, float] = {}
-
-    def get(self, key: str) -> Optional[Any]:
-        val = self._store.get(key)
-        ts = self._ts.get(key)
-        if val is None or ts is None:
-            return None
-        if time.time() - ts > self._ttl:
-            self.delete(key)
-            return None
-        return val
-
-    def set(self, key: str, value: Any) -> None:
-        self._store[key] = value
-        self._ts[key] = time.time()
+        self._max_entries = max_entries if max_entries is not None else settings.CACHE_MAX_ENTRIES
+        self._max_bytes = max_bytes if max_bytes is not None else settings.CACHE_MAX_BYTES
+        self._sizeof = sizeof
+        self._clock = clock
+        self._store: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._expiry: List[Tuple[float, str]] = []
+        self._bytes = 0
+        self._stats = CacheStats()
+        self._lock = threading.RLock()
+        self._flights: Dict[str, _Flight] = {}
+        self._tasks: Dict[str, "asyncio.Task[Any]"] = {}
+
+    # ---- basic mapping API ----
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            self._purge_expired(self._clock())
+            entry = self._store.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return default
+            self._store.move_to_end(key)
+            self._stats.hits += 1
+            return entry.value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = self._clock()
+        expires_at = now + (ttl if ttl is not None else self._ttl)
+        size = self._sizeof(value) if self._max_bytes else 0
+        with self._lock:
+            self._purge_expired(now)
+            self._remove(key)
+            self._store[key] = _Entry(value, expires_at, size)
+            self._bytes += size
+            heapq.heappush(self._expiry, (expires_at, key))
+            self._evict_overflow()
+            # Overwrites leave dead heap nodes behind; rebuild before they pile up.
+            if len(self._expiry) > 2 * len(self._store) + 64:
+                self._expiry = [(e.expires_at, k) for k, e in self._store.items()]
+                heapq.heapify(self._expiry)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
+            self._expiry.clear()
+            self._bytes = 0
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry now; returns how many were removed."""
+        with self._lock:
+            return self._purge_expired(self._clock())
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._purge_expired(self._clock())
+            return key in self._store
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge_expired(self._clock())
+            return len(self._store)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> CacheStats:
+        """Snapshot of the hit/miss/eviction counters."""
+        with self._lock:
+            return replace(self._stats)
+
+    # ---- read-through loading ----
+    def get_or_load(self, key: str, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Return the cached value or call loader() once, even if many threads ask
+        for the same key concurrently; the others wait and share the result.
+        """
+        with self._lock:
+            value = self.get(key, MISSING)
+            if value is not MISSING:
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._stats.loads += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = loader()
+            self.set(key, flight.value, ttl)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    async def aget_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Union[Awaitable[Any], Any]],
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """
+        Async variant of get_or_load: concurrent coroutines share one loader task.
+        Cancelling one waiter does not cancel the load for the others.
+        """
+        value = self.get(key, MISSING)
+        if value is not MISSING:
+            return value
+        task = self._tasks.get(key)
+        if task is None:
+            with self._lock:
+                self._stats.loads += 1
+            task = asyncio.ensure_future(self._run_load(key, loader, ttl))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _t, k=key: self._tasks.pop(k, None))
+        return await asyncio.shield(task)
+
+    async def _run_load(self, key: str, loader: Callable[[], Any], ttl: Optional[float]) -> Any:
+        value = loader()
+        if inspect.isawaitable(value):
+            value = await value
+        self.set(key, value, ttl)
+        return value
+
+    # ---- internals (caller holds the lock) ----
+    def _remove(self, key: str) -> Optional[_Entry]:
+        entry = self._store.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        return entry
+
+    def _purge_expired(self, now: float) -> int:
+        removed = 0
+        heap = self._expiry
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._store.get(key)
+            # Skip heap nodes left behind by an overwrite with a new expiry.
+            if entry is not None and entry.expires_at == expires_at:
+                self._remove(key)
+                self._stats.expirations += 1
+                removed += 1
+        return removed
+
+    def _evict_overflow(self) -> None:
+        while self._store and (
+            (self._max_entries and len(self._store) > self._max_entries)
+            or (self._max_bytes and self._bytes > self._max_bytes)
+        ):
+            key, entry = self._store.popitem(last=False)
+            self._bytes -= entry.size
+            self._stats.evictions += 1
+
+class TieredCache:
+    """
+    Two-tier cache: the in-memory TTLCache as L1 in front of a persistent
+    SqliteCache L2. L1 misses are served from L2 and promoted, so a restarted
+    worker reads prebuilt structures from disk instead of rebuilding them.
+    """
+    def __init__(self, l1: TTLCache, l2: SqliteCache, version: Optional[str] = None):
+        self.l1, self.l2 = l1, l2
+        self._version = version
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.l1.get(key, MISSING)
+        if value is MISSING:
+            value = self.l2.get(key, MISSING, version=self._version)
+            if value is MISSING:
+                return default
+            self.l1.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.l1.set(key, value, ttl)
+        self.l2.set(key, value, version=self._version)
 
     def delete(self, key: str) -> None:
-        self._store.pop(key, None)
-        self._ts.pop(key, None)
+        self.l1.delete(key)
+        self.l2.delete(key)
 
     def clear(self) -> None:
-        self._store.clear()
-        self._ts.clear()
+        self.l1.clear()
+        self.l2.clear()
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        return self.l1.get_or_load(key, lambda: self._load_through(key, loader), ttl)
+
+    async def aget_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Union[Awaitable[Any], Any]],
+        ttl: Optional[float] = None,
+    ) -> Any:
+        async def load() -> Any:
+            value = self.l2.get(key, MISSING, version=self._version)
+            if value is MISSING:
+                value = loader()
+                if inspect.isawaitable(value):
+                    value = await value
+                self.l2.set(key, value, version=self._version)
+            return value
+        return await self.l1.aget_or_load(key, load, ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"l1": self.l1.stats(), "l2": self.l2.stats()}
+
+    def _load_through(self, key: str, loader: Callable[[], Any]) -> Any:
+        value = self.l2.get(key, MISSING, version=self._version)
+        if value is MISSING:
+            value = loader()
+            self.l2.set(key, value, version=self._version)
+        return value
+
+# ---- reference maps ----
+# Builders produce each lookup structure from its source; with an L2 configured
+# they only run when the on-disk copy is missing or its version is stale.
+def _build_merchant_aliases() -> Dict[str, str]:
+    return {"AMZN Mkt": "Amazon", "GOOGLE*SVCS": "Google"}
+
+def _build_mcc_map() -> Dict[str, str]:
+    return {"5814": "Fast Food", "4111": "Transport"}
+
+def _build_category_rules() -> Dict[str, str]:
+    return {"Amazon": "Shopping", "Google": "Services"}
+
+REFERENCE_BUILDERS: Dict[str, Callable[[], Any]] = {
+    "merchant_aliases": _build_merchant_aliases,
+    "mcc_map": _build_mcc_map,
+    "category_rules": _build_category_rules,
+}
+
+# Set when SHARED_TABLES_PATH is configured: maps are then read from the
+# host-wide mmap'd file instead of being built per process.
+shared: Optional[shared_tables.SharedTables] = None
+
+def _loader(name: str) -> Callable[[], Any]:
+    if shared is not None:
+        # L1 only holds the zero-copy view; once its TTL lapses the next load
+        # goes through refresh() and picks up a newly published version.
+        return lambda: shared.table(name)
+    return REFERENCE_BUILDERS[name]
+
+def warm_reference_cache(c: Union[TTLCache, TieredCache]) -> None:
+    """Make every reference map available in `c`, building only what L2 lacks."""
+    for name in REFERENCE_BUILDERS:
+        c.get_or_load(name, _loader(name))
+
+def refresh_reference_cache(c: Union[TTLCache, TieredCache]) -> None:
+    """Rebuild every reference map from source and write it through all tiers."""
+    if shared is not None:
+        publish_reference_tables()
+        shared.refresh(force=True)
+    for name in REFERENCE_BUILDERS:
+        c.set(name, _loader(name)())
+
+def publish_reference_tables(path: Optional[str] = None) -> None:
+    """Build every reference map and atomically publish it for all workers on the host."""
+    shared_tables.publish(path or settings.SHARED_TABLES_PATH,
+                          {name: build() for name, build in REFERENCE_BUILDERS.items()},
+                          settings.REFERENCE_CACHE_VERSION)
+
+def _make_cache() -> Union[TTLCache, TieredCache]:
+    global shared
+    if settings.SHARED_TABLES_PATH:
+        if settings.REFERENCE_CACHE_PATH:
+            log.warning("SHARED_TABLES_PATH is set; REFERENCE_CACHE_PATH (%s) is not used",
+                        settings.REFERENCE_CACHE_PATH)
+        # a file left by an older deploy (other builder version or format) is rebuilt
+        if shared_tables.read_version(settings.SHARED_TABLES_PATH) != settings.REFERENCE_CACHE_VERSION:
+            publish_reference_tables()
+        shared = shared_tables.SharedTables(settings.SHARED_TABLES_PATH)
+        return TTLCache()
+    if settings.REFERENCE_CACHE_PATH:
+        return TieredCache(TTLCache(), SqliteCache(settings.REFERENCE_CACHE_PATH), settings.REFERENCE_CACHE_VERSION)
+    return TTLCache()
 
 # Preload typical reference maps (can be refreshed on a schedule)
-cache = TTLCache()
-cache.set("merchant_aliases", {"AMZN Mkt": "Amazon", "GOOGLE*SVCS": "Google"})
-cache.set("mcc_map", {"5814": "Fast Food", "4111": "Transport"})
-cache.set("category_rules", {"Amazon": "Shopping", "Google": "Services"})
+cache = _make_cache()
+warm_reference_cache(cache)
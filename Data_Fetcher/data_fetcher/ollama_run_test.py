@@ -1,9 +1,12 @@
 from xml.etree.ElementTree import tostring
 
+import os
 from rich import print_json
-from ollama_transformer import transform
+os.environ.setdefault("OLLAMA_CACHE_PATH", ".ollama_cache.sqlite")  # re-runs are served from disk
+from ollama_transformer import TransformTiming, cache_stats, transform
 from pathlib import Path
-from colorama import Fore, Style
+from colorama import Fore, Style, init
+init(autoreset=True)  # so colors reset automatically
 import time
 
 
@@ -30,11 +33,16 @@ def demo() -> None:
         print(Fore.LIGHTGREEN_EX + f"\n──── {case_name} — {filename} ────" + Style.RESET_ALL)
 
         try:
-            out = transform(s)
+            timing = TransformTiming()
+            out = transform(s, timing=timing)
             print_json(data=out)  # pretty, colored JSON
 
             count = len(out["transactions"])
             print(Fore.LIGHTCYAN_EX+"Number of transaction data processed: ", count)
+            t = timing.as_dict()
+            stages = ", ".join(f"{k} {v * 1000:.1f} ms" for k, v in t["stages_s"].items() if v)
+            print(Fore.LIGHTCYAN_EX + f"Time: {t['wall_s']:.2f} s ({stages}); "
+                  f"{t['prompt_tokens']} prompt tokens, {t['eval_tokens']} generated at {t['eval_tokens_per_s']} tokens/s")
         except Exception as e:
             print(Fore.RED + f"ERROR in {filename}: {e}" + Style.RESET_ALL)
 
@@ -43,3 +51,5 @@ if __name__ == "__main__":
     demo()
     end = time.time()  # mark script end
     print(Fore.RED +"Total runtime:", round((end - start),2), "seconds")
+    stats = cache_stats()
+    print(Fore.CYAN + f"Result cache: {stats.hits} hit(s), {stats.misses} miss(es)")
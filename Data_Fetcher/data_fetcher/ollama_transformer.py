@@ -4,26 +4,65 @@ Ollama Data-Format Transformer — Local Test Harness
 - Detects input type (CSV/HTML/XML/JSON)
 - Calls Ollama /api/chat with JSON Schema ("format")
 - Parses + minimally validates output
+- Splits large inputs into chunks transformed in parallel
+- Caches model results on disk by content (OLLAMA_CACHE_PATH)
+- Streams transactions as the model generates them (transform_stream)
+- Sends HTML/XML/JSON records as a compact CSV table (OLLAMA_COMPACT_PROMPT)
+- Breaks transform time down by stage (TransformTiming)
 - Runs demo tests
 Usage:
   python ollama_transformer_test.py
 Requirements:
   - Ollama running locally (http://localhost:11434), with model pulled:
       ollama pull llama3.2:1b
+  - or the stub (data_fetcher/testing/stub_ollama.py) with OLLAMA_URL pointing at it
 """
 
+import csv
+import hashlib
+import html
+import io
 import json
+import os
 import re
-from typing import Any, Dict, List
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 import urllib.request
+import xml.etree.ElementTree as ET
 from urllib.error import URLError, HTTPError
-from colorama import Fore, Style, init
-init(autoreset=True)  # so colors reset automatically
-from rich import print_json
+try:
+    from .disk_cache import DiskCacheStats, SqliteCache
+    from .parsers.stream_parser import JSONArrayStream
+except ImportError:  # run as a script from data_fetcher/
+    from disk_cache import DiskCacheStats, SqliteCache
+    from parsers.stream_parser import JSONArrayStream
 
 
-OLLAMA_URL = ""
-MODEL = "llama3.2:3b"
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434/api/chat")
+MODEL = os.environ.get("OLLAMA_MODEL", "llama3.2:3b")
+OLLAMA_TIMEOUT = float(os.environ.get("OLLAMA_TIMEOUT", "300"))
+
+# Chunked mode: inputs above CHUNK_THRESHOLD characters are split into chunks of
+# CHUNK_ROWS records and sent MAX_PARALLEL at a time.
+CHUNK_THRESHOLD = int(os.environ.get("OLLAMA_CHUNK_THRESHOLD", "8000"))
+CHUNK_ROWS = int(os.environ.get("OLLAMA_CHUNK_ROWS", "40"))
+MAX_PARALLEL = int(os.environ.get("OLLAMA_MAX_PARALLEL", "4"))
+CHUNK_RETRIES = int(os.environ.get("OLLAMA_CHUNK_RETRIES", "2"))
+
+# HTML/XML/JSON sources are sent as a CSV table instead of verbatim markup.
+COMPACT_PROMPT = os.environ.get("OLLAMA_COMPACT_PROMPT", "1").lower() not in ("0", "false", "no")
+
+# Result cache: a sqlite file keyed by sha256(model, schema, messages). Only
+# results that parse and pass the schema are stored. "" disables it;
+# OLLAMA_CACHE_BYPASS=1 skips lookups (fresh results are still written).
+OLLAMA_CACHE_PATH = os.environ.get("OLLAMA_CACHE_PATH", "")
+OLLAMA_CACHE_MAX_BYTES = int(os.environ.get("OLLAMA_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+OLLAMA_CACHE_BYPASS = os.environ.get("OLLAMA_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
 
 # ---- Define your canonical JSON schema here ----
 SCHEMA = {
@@ -80,15 +119,328 @@ def detect_input_type(text: str) -> str:
         return "csv"
     return "plain"
 
-def build_user_prompt(raw: str, account_hint: str = "") -> str:
+def build_user_prompt(raw: str, account_hint: str = "", compact: Optional[bool] = None) -> str:
+    """compact=None follows OLLAMA_COMPACT_PROMPT."""
     dtype = detect_input_type(raw)
+    fields = ""
+    if compact if compact is not None else COMPACT_PROMPT:
+        compacted = compact_source(raw)
+        if compacted is not None:
+            (fields, raw), dtype = compacted, f"csv (converted from {dtype})"
     header = f"Source type: {dtype}\n"
     if account_hint:
         header += f"Account hint: {account_hint}\n"
+    if fields:
+        header += "Document fields (apply to every row):\n" + fields
     header += "-----\nSOURCE:\n"
     return header + raw
 
-def call_ollama(messages: List[Dict[str, str]], schema: Dict[str, Any]) -> Dict[str, Any]:
+# ---- Compact prompt encoding ----
+# Prompt tokens dominate latency on CPU hosts, and markup is most of them: an
+# HTML row spends more tokens on <tr><td> than on its values. Record-shaped
+# HTML, XML and JSON sources are re-encoded as one CSV table, with the
+# header row once, in source order. What lies outside the records (account,
+# statement currency, balances) goes with it as "name: value" document
+# fields, and a source is only compacted if every value it holds survives.
+
+def _cell(value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]  # drop the {namespace-uri} ElementTree prefixes
+
+def _put(rec: Dict[str, Any], key: str, value: Any) -> None:
+    """rec[key] = value; a repeated key (e.g. two <Ustrd>) becomes key#2, key#3, ... instead of overwriting."""
+    k, i = key, 1
+    while k in rec:
+        i += 1
+        k = f"{key}#{i}"
+    rec[k] = value
+
+def _flatten_element(el: ET.Element, path: str, rec: Dict[str, Any]) -> None:
+    """Text and attributes of el and everything below it, under dotted paths; attributes as path@name."""
+    for k, v in el.attrib.items():
+        _put(rec, f"{path}@{_local(k)}" if path else _local(k), v)
+    for c in el:
+        _flatten_element(c, f"{path}.{_local(c.tag)}" if path else _local(c.tag), rec)
+    if not len(el) and ((el.text or "").strip() or not el.attrib):
+        _put(rec, path or _local(el.tag), el.text)
+
+def _record_tag(root: ET.Element) -> Optional[str]:
+    """Tag of the record elements: a known record name first, else the most repeated sibling tag."""
+    counts: Counter = Counter()
+    leaf = set()
+    for parent in root.iter():
+        for tag, n in Counter(c.tag for c in parent).items():
+            if n >= 2 or _local(tag).lower() in _RECORD_TAGS:
+                counts[tag] += n
+    for el in root.iter():
+        if el.tag in counts and not len(el) and not el.attrib:
+            leaf.add(el.tag)
+    if not counts:
+        return None
+    return min(counts, key=lambda t: (_local(t).lower() not in _RECORD_TAGS, t in leaf, -counts[t]))
+
+def _xml_document(text: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    root = ET.fromstring(text)
+    tag = _record_tag(root)
+    context: Dict[str, Any] = {}
+    rows: List[Dict[str, Any]] = []
+
+    def walk(el: ET.Element, parent: str) -> None:
+        if el.tag == tag:
+            rec: Dict[str, Any] = {}
+            _flatten_element(el, "", rec)
+            rows.append(rec)
+            return
+        name = f"{parent}.{_local(el.tag)}" if parent else _local(el.tag)
+        for k, v in el.attrib.items():
+            _put(context, f"{name}@{_local(k)}", v)
+        if not len(el) and (el.text or "").strip():
+            _put(context, name, el.text)
+        for c in el:
+            walk(c, _local(el.tag))
+
+    if tag is not None:
+        walk(root, "")
+    return context, rows
+
+def _html_document(text: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    rows = re.findall(r"<tr\b[^>]*>(.*?)</tr\s*>", text, re.S | re.I)
+    cells = [[html.unescape(re.sub(r"<[^>]+>", "", c))
+              for c in re.findall(r"<t[hd]\b[^>]*>(.*?)</t[hd]\s*>", r, re.S | re.I)] for r in rows]
+    has_header = bool(rows) and "<th" in rows[0].lower()
+    header = [h.strip() for h in cells[0]] if has_header else [f"col{i + 1}" for i in range(max(map(len, cells), default=0))]
+    context: Dict[str, Any] = {}
+    for piece in _markup_text(re.sub(r"<tr\b[^>]*>.*?</tr\s*>", " ", text, flags=re.S | re.I)):
+        _put(context, "text", piece)  # captions, headings, account lines around the table
+    return context, [dict(zip(header, c)) for c in cells[1 if has_header else 0:]]
+
+def _markup_text(text: str) -> List[str]:
+    pieces = (html.unescape(p).strip() for p in re.split(r"<!--.*?-->|<[^>]+>", text, flags=re.S))
+    return [p for p in pieces if p]
+
+def _json_document(obj: Any) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Records: the longest list of the object, followed down through single-item
+    lists such as {"accounts": [{"acct": ..., "txns": [...]}]}; every other
+    member on the way is a document field.
+    """
+    context: Dict[str, Any] = {}
+    prefix = ""
+    while isinstance(obj, dict):
+        lists = [k for k, v in obj.items() if isinstance(v, list)]
+        if not lists:
+            return context, [obj]
+        key = max(lists, key=lambda k: len(obj[k]))
+        for k, v in obj.items():
+            if k != key:
+                _put(context, prefix + k, v)
+        obj, prefix = obj[key], f"{prefix}{key}."
+        if len(obj) == 1 and isinstance(obj[0], dict) and any(
+                isinstance(v, list) and v and all(isinstance(x, dict) for x in v) for v in obj[0].values()):
+            obj = obj[0]
+    return context, [r for r in obj if isinstance(r, dict)] if isinstance(obj, list) else []
+
+def read_document(raw: str) -> Tuple[str, Dict[str, Any], List[str], List[Dict[str, Any]]]:
+    """
+    (source type, document fields, columns in first-seen order, rows as
+    {column: value}) for CSV/HTML/XML/JSON. XML records are flattened with
+    attributes and every nesting level (Amt@Ccy, NtryDtls.TxDtls.RmtInf.Ustrd),
+    without namespaces. Document fields are what lies outside the records.
+    """
+    dtype = detect_input_type(raw)
+    text = raw.strip()
+    context: Dict[str, Any] = {}
+    if dtype == "json":
+        context, rows = _json_document(json.loads(text))
+    elif dtype == "xml_or_html":
+        context, rows = _html_document(text) if re.search(r"<tr\b", text, re.I) else _xml_document(text)
+    else:
+        rows = list(csv.DictReader(io.StringIO(text)))
+    rows = [{str(k).strip(): _cell(v) for k, v in r.items() if k is not None} for r in rows]
+    columns = list(dict.fromkeys(k for r in rows for k in r))
+    context = {k: _cell(v) for k, v in context.items() if _cell(v) is not None}
+    return dtype, context, columns, rows
+
+def read_records(raw: str) -> Tuple[str, List[str], List[Dict[str, Any]]]:
+    """(source type, columns in first-seen order, rows as {column: value}); see read_document."""
+    dtype, _, columns, rows = read_document(raw)
+    return dtype, columns, rows
+
+def _leaves(obj: Any) -> Iterator[str]:
+    """Every scalar in obj as comparable text; None and blank strings are no value."""
+    if isinstance(obj, dict):
+        obj = list(obj.values())
+    if isinstance(obj, list):
+        for v in obj:
+            yield from _leaves(v)
+    elif isinstance(obj, str):
+        if obj.strip():
+            yield obj.strip()
+    elif obj is not None:
+        yield json.dumps(obj)
+
+def _source_values(raw: str, dtype: str) -> Counter:
+    """Every value a source holds, read independently of the record logic."""
+    text = raw.strip()
+    if dtype == "json":
+        return Counter(_leaves(json.loads(text)))
+    if re.search(r"<tr\b", text, re.I):
+        return Counter(_markup_text(text))
+    values: Counter = Counter()
+    for el in ET.fromstring(text).iter():
+        values.update(_leaves([el.text, el.tail, *el.attrib.values()]))
+    return values
+
+def compact_source(raw: str) -> Optional[Tuple[str, str]]:
+    """
+    HTML/XML/JSON records as (document fields as "name: value" lines, CSV
+    table without empty columns). None when the source is already CSV/plain,
+    has no records, cannot be read, would not get shorter, or when any of its
+    values would be lost (mixed text, a second kind of record, ...): the raw
+    source is sent then. Nested JSON values are kept as JSON text.
+    """
+    dtype = detect_input_type(raw)
+    if dtype not in ("json", "xml_or_html"):
+        return None
+    try:
+        _, context, columns, rows = read_document(raw)
+        source = _source_values(raw, dtype)
+    except (ValueError, ET.ParseError):  # e.g. SGML OFX: send as is
+        return None
+    columns = [c for c in columns if any(r.get(c) is not None for r in rows)]
+    if not rows or not columns:
+        return None
+    kept = Counter(columns)  # HTML header cells are values of the source
+    kept.update(_leaves(context))
+    kept.update(_leaves(rows))
+    if source - kept:
+        return None
+    fields = "".join(f"{k}: {json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v}\n"
+                     for k, v in context.items())
+    out = io.StringIO()
+    w = csv.writer(out, lineterminator="\n")
+    w.writerow(columns)
+    for r in rows:
+        w.writerow([json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list, bool)) else ("" if v is None else v)
+                    for v in (r.get(c) for c in columns)])
+    table = out.getvalue()
+    return (fields, table) if len(fields) + len(table) < len(raw) else None
+
+# ---- Timing ----
+
+_STAGES = ("prompt_build", "network", "decode", "parse", "validate", "cache")
+
+class TransformTiming:
+    """
+    Seconds spent per stage of transform(), summed over calls (and over
+    chunks, which overlap in time, so the sum can exceed `wall`), plus the
+    token counters Ollama reports with each response:
+
+    - prompt_build: source conversion, prompt text and request encoding
+    - network: from sending the request to the last response byte (includes generation)
+    - decode: response bytes -> Ollama's JSON envelope
+    - parse: message.content -> result JSON
+    - validate: schema check of the result
+    - cache: result-cache lookups that hit
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, float] = dict.fromkeys(_STAGES, 0.0)
+        self.calls = self.cache_hits = 0
+        self.prompt_tokens = self.eval_tokens = 0
+        self.prompt_eval_s = self.eval_s = self.model_total_s = 0.0
+        self.wall = 0.0
+
+    def add(self, cache_hits: int = 0, **stages: float) -> None:
+        with self._lock:
+            for name, seconds in stages.items():
+                self.stages[name] += seconds
+            self.cache_hits += cache_hits
+
+    def add_model_stats(self, obj: Dict[str, Any]) -> None:
+        """Counters of one /api/chat response; durations there are in nanoseconds."""
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += obj.get("prompt_eval_count") or 0
+            self.eval_tokens += obj.get("eval_count") or 0
+            self.prompt_eval_s += (obj.get("prompt_eval_duration") or 0) / 1e9
+            self.eval_s += (obj.get("eval_duration") or 0) / 1e9
+            self.model_total_s += (obj.get("total_duration") or 0) / 1e9
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "wall_s": round(self.wall, 6),
+                "stages_s": {k: round(v, 6) for k, v in self.stages.items()},
+                "calls": self.calls,
+                "cache_hits": self.cache_hits,
+                "prompt_tokens": self.prompt_tokens,
+                "eval_tokens": self.eval_tokens,
+                "prompt_tokens_per_s": round(self.prompt_tokens / self.prompt_eval_s, 2) if self.prompt_eval_s else None,
+                "eval_tokens_per_s": round(self.eval_tokens / self.eval_s, 2) if self.eval_s else None,
+                "model_total_s": round(self.model_total_s, 6),
+            }
+
+# ---- Result cache ----
+
+_cache: Optional[SqliteCache] = None
+_cache_lock = threading.Lock()
+
+def result_cache() -> Optional[SqliteCache]:
+    """The process-wide result cache, opened on first use; None when OLLAMA_CACHE_PATH is unset."""
+    global _cache
+    if _cache is None and OLLAMA_CACHE_PATH:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SqliteCache(OLLAMA_CACHE_PATH, OLLAMA_CACHE_MAX_BYTES)
+    return _cache
+
+def cache_key(model: str, schema: Dict[str, Any], messages: List[Dict[str, str]]) -> str:
+    blob = json.dumps([model, schema, messages], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def cache_stats() -> DiskCacheStats:
+    cache = result_cache()
+    return cache.stats() if cache is not None else DiskCacheStats()
+
+def call_ollama(messages: List[Dict[str, str]], schema: Dict[str, Any], bypass_cache: bool = False,
+                timing: Optional[TransformTiming] = None) -> Dict[str, Any]:
+    """
+    One /api/chat call whose result conforms to `schema`, else ValueError.
+    Results are validated once, whether they come from the model or the
+    result cache; a cached entry that fails the check is asked for again.
+    """
+    cache = result_cache()
+    key = cache_key(MODEL, schema, messages) if cache is not None else ""
+    if cache is not None and not (bypass_cache or OLLAMA_CACHE_BYPASS):
+        t0 = time.perf_counter()
+        hit = cache.get(key)
+        if hit is not None:
+            t1 = time.perf_counter()
+            errs = validate_minimal(hit, schema)
+            if timing is not None:
+                timing.add(cache=t1 - t0, validate=time.perf_counter() - t1, cache_hits=0 if errs else 1)
+            if not errs:
+                return hit
+    result = _request_ollama(messages, schema, timing)
+    t0 = time.perf_counter()
+    errs = validate_minimal(result, schema)
+    if timing is not None:
+        timing.add(validate=time.perf_counter() - t0)
+    if errs:
+        raise ValueError("Schema validation failed: \n  - " + "\n  - ".join(errs))
+    if cache is not None:
+        cache.set(key, result)
+    return result
+
+def _request_ollama(messages: List[Dict[str, str]], schema: Dict[str, Any],
+                    timing: Optional[TransformTiming] = None) -> Dict[str, Any]:
+    t0 = time.perf_counter()
     payload = {
         "model": MODEL,
         "stream": False,
@@ -101,78 +453,461 @@ def call_ollama(messages: List[Dict[str, str]], schema: Dict[str, Any]) -> Dict[
         data=data,
         headers={"Content-Type": "application/json"}
     )
+    t1 = time.perf_counter()
     try:
-        with urllib.request.urlopen(req, timeout=300) as resp:
-            body = resp.read().decode("utf-8")
-            obj = json.loads(body)
-            # Ollama wraps the model output inside obj["message"]["content"]
-            content = obj.get("message", {}).get("content", "")
-            # content should itself be JSON (string). If it's already a dict, handle gracefully.
-            if isinstance(content, str):
-                try:
-                    return json.loads(content)
-                except json.JSONDecodeError as e:
-                    raise ValueError(f"Model content is not valid JSON: {content[:200]}...") from e
-            elif isinstance(content, dict):
-                return content
-            else:
-                raise ValueError(f"Unexpected content type: {type(content)}")
+        with urllib.request.urlopen(req, timeout=OLLAMA_TIMEOUT) as resp:
+            raw_body = resp.read()
     except HTTPError as e:
         raise RuntimeError(f"HTTP error from Ollama: {e.code} {e.reason}") from e
     except URLError as e:
         raise RuntimeError(f"Cannot reach Ollama at {OLLAMA_URL}. Is it running?") from e
+    t2 = time.perf_counter()
+    obj = json.loads(raw_body.decode("utf-8"))
+    # Ollama wraps the model output inside obj["message"]["content"]
+    content = obj.get("message", {}).get("content", "")
+    t3 = time.perf_counter()
+    # content should itself be JSON (string). If it's already a dict, handle gracefully.
+    if isinstance(content, str):
+        try:
+            result = json.loads(content)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Model content is not valid JSON: {content[:200]}...") from e
+    elif isinstance(content, dict):
+        result = content
+    else:
+        raise ValueError(f"Unexpected content type: {type(content)}")
+    if timing is not None:
+        timing.add(prompt_build=t1 - t0, network=t2 - t1, decode=t3 - t2, parse=time.perf_counter() - t3)
+        timing.add_model_stats(obj)
+    return result
+
+# ---- Schema validation ----
+# A schema is compiled once into a tree of closures. Each node has a boolean
+# fast path (no paths, no allocations) used for the whole document; only when
+# that fails is the explaining variant run to collect error messages.
+
+Check = Callable[[Any], bool]
+Explain = Callable[[Any, str, List[str]], None]
 
-def _type_ok(value, expected):
-    def single(v, t):
-        if t == "null":   return v is None
-        if t == "string": return isinstance(v, str)
-        if t == "number": return isinstance(v, (int, float)) and not isinstance(v, bool)
-        if t == "boolean":return isinstance(v, bool)
-        if t == "array":  return isinstance(v, list)
-        if t == "object": return isinstance(v, dict)
+_TYPE_CHECKS: Dict[str, Check] = {
+    "null":    lambda v: v is None,
+    "string":  lambda v: isinstance(v, str),
+    "number":  lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "integer": lambda v: (isinstance(v, int) and not isinstance(v, bool)) or (isinstance(v, float) and v.is_integer()),
+    "boolean": lambda v: isinstance(v, bool),
+    "array":   lambda v: isinstance(v, list),
+    "object":  lambda v: isinstance(v, dict),
+}
+
+def _is_date(v: str) -> bool:
+    try:
+        date.fromisoformat(v)
+        return len(v) == 10
+    except ValueError:
+        return False
+
+def _is_datetime(v: str) -> bool:
+    try:
+        datetime.fromisoformat(v.replace("Z", "+00:00"))
+        return "T" in v or " " in v
+    except ValueError:
+        return False
+
+def _is_uuid(v: str) -> bool:
+    try:
+        uuid.UUID(v)
         return True
-    if isinstance(expected, list):
-        return any(single(value, t) for t in expected)
-    return single(value, expected)
+    except ValueError:
+        return False
 
-def validate_minimal(obj: Any, schema: Dict[str, Any]) -> List[str]:
-    """Very small validator for common cases; replace with 'jsonschema' for full checks."""
-    errors: List[str] = []
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_FORMATS: Dict[str, Check] = {
+    "date": _is_date,
+    "date-time": _is_datetime,
+    "email": lambda v: _EMAIL.match(v) is not None,
+    "uuid": _is_uuid,
+}
 
-    def check(o: Any, s: Dict[str, Any], path: str):
-        stype = s.get("type")
-        if stype and not _type_ok(o, stype):
-            errors.append(f"{path}: expected {stype}, got {type(o).__name__}")
-            return
-        if stype == "object":
-            props = s.get("properties", {})
-            required = s.get("required", [])
-            for req in required:
-                if not isinstance(o, dict) or req not in o:
-                    errors.append(f"{path}.{req}: missing required")
-            if isinstance(o, dict):
-                for k, v in o.items():
-                    if k in props:
-                        check(v, props[k], f"{path}.{k}")
-        if stype == "array":
-            item_schema = s.get("items")
-            if isinstance(o, list) and item_schema:
+_PY_TYPES = {"null": type(None), "string": str, "number": (int, float), "boolean": bool, "array": list, "object": dict}
+
+def _type_check(expected: Any) -> Check:
+    types = expected if isinstance(expected, list) else [expected]
+    if any(t not in _TYPE_CHECKS for t in types):
+        return lambda v: True  # unknown type keyword: accept, as before
+    if "integer" in types:
+        checks = [_TYPE_CHECKS[t] for t in types]
+        return lambda v: any(c(v) for c in checks)
+    # specialize to one isinstance() call; bool is an int subclass, so exclude it from "number"
+    py: Tuple[type, ...] = ()
+    for t in types:
+        py += _PY_TYPES[t] if isinstance(_PY_TYPES[t], tuple) else (_PY_TYPES[t],)
+    if "number" in types and "boolean" not in types:
+        return lambda v: isinstance(v, py) and v.__class__ is not bool
+    return lambda v: isinstance(v, py)
+
+def _compile(s: Dict[str, Any]) -> Tuple[Check, Explain]:
+    stype = s.get("type")
+    type_ok = _type_check(stype) if stype else None
+    checks: List[Check] = []
+    explains: List[Explain] = []
+
+    if "enum" in s:
+        allowed = s["enum"]
+        try:
+            allowed_set = frozenset(allowed)
+            in_enum: Check = lambda v: v in allowed_set if isinstance(v, (str, int, float, bool, type(None))) else v in allowed
+        except TypeError:  # unhashable members (objects/arrays)
+            in_enum = lambda v: v in allowed
+        checks.append(in_enum)
+        def explain_enum(v, path, errors):
+            if not in_enum(v):
+                errors.append(f"{path}: {v!r} is not one of {allowed}")
+        explains.append(explain_enum)
+
+    fmt = _FORMATS.get(s.get("format"))
+    if fmt is not None:
+        fmt_name = s["format"]
+        fmt_ok: Check = lambda v: not isinstance(v, str) or fmt(v)
+        checks.append(fmt_ok)
+        def explain_format(v, path, errors):
+            if not fmt_ok(v):
+                errors.append(f"{path}: {v!r} is not a valid {fmt_name}")
+        explains.append(explain_format)
+
+    if stype == "object" or "properties" in s:
+        props = {k: _compile(sub) for k, sub in s.get("properties", {}).items()}
+        required = tuple(s.get("required", []))
+        extra = s.get("additionalProperties", True)
+        extra_node = _compile(extra) if isinstance(extra, dict) else None
+        prop_checks = {k: c for k, (c, _) in props.items()}
+
+        def check_obj(o) -> bool:
+            if not isinstance(o, dict):
+                return stype != "object"
+            for r in required:
+                if r not in o:
+                    return False
+            for k, v in o.items():
+                c = prop_checks.get(k)
+                if c is not None:
+                    if not c(v):
+                        return False
+                elif extra is False:
+                    return False
+                elif extra_node is not None and not extra_node[0](v):
+                    return False
+            return True
+
+        def explain_obj(o, path, errors):
+            if not isinstance(o, dict):
+                return
+            for r in required:
+                if r not in o:
+                    errors.append(f"{path}.{r}: missing required")
+            for k, v in o.items():
+                node = props.get(k)
+                if node is not None:
+                    node[1](v, f"{path}.{k}", errors)
+                elif extra is False:
+                    errors.append(f"{path}.{k}: additional property not allowed")
+                elif extra_node is not None:
+                    extra_node[1](v, f"{path}.{k}", errors)
+        checks.append(check_obj)
+        explains.append(explain_obj)
+
+    if (stype == "array" or "items" in s) and isinstance(s.get("items"), dict):
+        item_check, item_explain = _compile(s["items"])
+
+        def check_arr(o) -> bool:
+            if not isinstance(o, list):
+                return stype != "array"
+            for item in o:
+                if not item_check(item):
+                    return False
+            return True
+
+        def explain_arr(o, path, errors):
+            if isinstance(o, list):
                 for i, item in enumerate(o):
-                    check(item, item_schema, f"{path}[{i}]")
+                    if not item_check(item):
+                        item_explain(item, f"{path}[{i}]", errors)
+        checks.append(check_arr)
+        explains.append(explain_arr)
+
+    if type_ok is not None:
+        checks.insert(0, type_ok)
+    if not checks:
+        check: Check = lambda v: True
+    elif len(checks) == 1:
+        check = checks[0]
+    elif len(checks) == 2:
+        c0, c1 = checks
+        check = lambda v: c0(v) and c1(v)
+    else:
+        check = lambda v: all(c(v) for c in checks)
+
+    def explain(v, path, errors):
+        if type_ok is not None and not type_ok(v):
+            errors.append(f"{path}: expected {stype}, got {type(v).__name__}")
+            return
+        for e in explains:
+            e(v, path, errors)
+
+    return check, explain
+
+_compiled: Dict[int, Tuple[Dict[str, Any], Callable[[Any], List[str]]]] = {}
+
+def compile_schema(schema: Dict[str, Any]) -> Callable[[Any], List[str]]:
+    """
+    Validator for `schema`, built once and cached by schema identity (do not
+    mutate a schema after using it). Returns a list of error strings, empty
+    when the document is valid. Supports type, properties, required, items,
+    enum, format (date, date-time, email, uuid) and additionalProperties.
+    """
+    hit = _compiled.get(id(schema))
+    if hit is not None and hit[0] is schema:
+        return hit[1]
+    check, explain = _compile(schema)
+
+    def validate(obj: Any) -> List[str]:
+        if check(obj):
+            return []
+        errors: List[str] = []
+        explain(obj, "$", errors)
+        return errors
+
+    _compiled[id(schema)] = (schema, validate)
+    return validate
+
+def validate_minimal(obj: Any, schema: Dict[str, Any]) -> List[str]:
+    """Validate obj against schema; see compile_schema for what is checked."""
+    return compile_schema(schema)(obj)
+
+# ---- Chunking ----
+# Splits happen only at record boundaries, and every chunk carries the context a
+# record needs to be read on its own: the CSV header, the markup around the
+# records (table/header row or XML root), or the other members of a JSON object.
+
+_RECORD_TAGS = {"tr", "stmttrn", "ntry", "txn", "tx", "transaction", "record", "row", "item", "entry"}
+
+def _csv_records(raw: str) -> List[str]:
+    records, cur = [], ""
+    for line in raw.splitlines(keepends=True):
+        cur += line
+        if cur.count('"') % 2 == 0:  # not inside a quoted field
+            if cur.strip():
+                records.append(cur)
+            cur = ""
+    if cur.strip():
+        records.append(cur)
+    return records
+
+def _split_csv(raw: str, n: int) -> List[str]:
+    header, *rows = _csv_records(raw)
+    return [header + "".join(rows[i:i + n]) for i in range(0, len(rows), n)] or [raw]
+
+def _split_json(raw: str, n: int) -> List[str]:
+    obj = json.loads(raw)
+    if isinstance(obj, list):
+        return [json.dumps(obj[i:i + n], ensure_ascii=False) for i in range(0, len(obj), n)] or [raw]
+    lists = [k for k, v in obj.items() if isinstance(v, list)] if isinstance(obj, dict) else []
+    if not lists:
+        return [raw]
+    key = max(lists, key=lambda k: len(obj[k]))
+    items = obj[key]
+    return [json.dumps({**obj, key: items[i:i + n]}, ensure_ascii=False) for i in range(0, len(items), n)] or [raw]
 
-    check(obj, schema, "$")
-    return errors
+def _record_spans(raw: str) -> List[Tuple[int, int]]:
+    """
+    (start, end) of the record elements in HTML/XML: the <tr> data rows of a
+    table, else the elements _record_tag picks, so chunks split exactly where
+    read_document sees records. Markup ElementTree cannot read (SGML OFX)
+    falls back to the most repeated known record tag.
+    """
+    text = raw.strip()
+    if re.search(r"<tr\b", text, re.I):
+        tag = "tr"
+    else:
+        try:
+            tag = _record_tag(ET.fromstring(text))
+        except ET.ParseError:
+            counts = Counter(m.group(1) for m in re.finditer(r"<([A-Za-z][\w.-]*)[\s>]", raw)
+                             if m.group(1).lower() in _RECORD_TAGS)
+            tag = max(counts, key=counts.get) if counts else None
+        if tag is None:
+            return []
+    name = re.escape(_local(tag))
+    # <name .../> or <name ...>...</name>, with or without a namespace prefix
+    pattern = rf"<(?P<t>(?:[\w.-]+:)?{name})(?=[\s/>])(?:[^>]*?/>|[^>]*>(?P<body>.*?)</(?P=t)\s*>)"
+    return [(m.start(), m.end()) for m in re.finditer(pattern, raw, re.S | (re.I if tag == "tr" else 0))
+            if "<th" not in (m.group("body") or "").lower()]  # a header row stays in the prefix
 
-def transform(raw_source: str) -> Dict[str, Any]:
-    user_prompt = build_user_prompt(raw_source)
+def _split_markup(raw: str, n: int) -> List[str]:
+    spans = _record_spans(raw)
+    if not spans:
+        return [raw]
+    starts = [a for a, _ in spans]
+    prefix, suffix = raw[:starts[0]], raw[spans[-1][1]:]
+    chunks = []
+    for i in range(0, len(spans), n):
+        j = min(i + n, len(spans))
+        end = starts[j] if j < len(spans) else spans[-1][1]  # keep comments/whitespace between records
+        chunks.append(prefix + raw[starts[i]:end] + suffix)
+    return chunks
+
+def _split_lines(raw: str, n: int) -> List[str]:
+    lines = raw.splitlines(keepends=True)
+    return ["".join(lines[i:i + n]) for i in range(0, len(lines), n)] or [raw]
+
+def split_source(raw: str, rows_per_chunk: int = CHUNK_ROWS) -> List[str]:
+    """Split raw input into self-contained chunks of at most rows_per_chunk records, in order."""
+    n = max(1, rows_per_chunk)
+    dtype = detect_input_type(raw)
+    if dtype == "csv":
+        return _split_csv(raw, n)
+    if dtype == "json":
+        return _split_json(raw, n)
+    if dtype == "xml_or_html":
+        return _split_markup(raw, n)
+    return _split_lines(raw, n)
+
+def _transform_one(raw_source: str, retries: int = 0, label: Optional[str] = None,
+                   bypass_cache: bool = False, timing: Optional[TransformTiming] = None) -> Dict[str, Any]:
+    attempt = 0
+    while True:
+        try:
+            t0 = time.perf_counter()
+            user_prompt = build_user_prompt(raw_source)
+            messages = [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ]
+            if timing is not None:
+                timing.add(prompt_build=time.perf_counter() - t0)
+            return call_ollama(messages, SCHEMA, bypass_cache, timing)
+        except (RuntimeError, ValueError) as e:
+            if attempt >= retries:
+                if label is None:
+                    raise
+                raise type(e)(f"{label} failed after {attempt + 1} attempt(s): {e}") from e
+            time.sleep(0.5 * 2 ** attempt)
+            attempt += 1
+
+def merge_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Concatenate per-chunk outputs in chunk order; account_id is the first one reported."""
+    account_id = next((r.get("account_id") for r in results if r.get("account_id")), None)
+    transactions: List[Dict[str, Any]] = []
+    for r in results:
+        transactions.extend(r.get("transactions") or [])
+    return {"account_id": account_id, "transactions": transactions}
+
+def transform_chunked(
+    raw_source: str,
+    rows_per_chunk: int = CHUNK_ROWS,
+    max_workers: int = MAX_PARALLEL,
+    retries: int = CHUNK_RETRIES,
+    bypass_cache: bool = False,
+    timing: Optional[TransformTiming] = None,
+) -> Dict[str, Any]:
+    """
+    Transform a large input as independent chunks, at most max_workers in
+    flight. Each chunk is retried on its own; the transactions come back in
+    source order.
+    """
+    chunks = split_source(raw_source, rows_per_chunk)
+    if len(chunks) == 1:
+        return _transform_one(chunks[0], retries, bypass_cache=bypass_cache, timing=timing)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+        futures = [pool.submit(_transform_one, c, retries, f"chunk {i + 1}/{len(chunks)}", bypass_cache, timing)
+                   for i, c in enumerate(chunks)]
+        return merge_results([f.result() for f in futures])
+
+def transform(raw_source: str, chunked: Optional[bool] = None, bypass_cache: bool = False,
+              timing: Optional[TransformTiming] = None) -> Dict[str, Any]:
+    """
+    chunked=None chunks automatically above CHUNK_THRESHOLD characters.
+    bypass_cache=True asks the model even if the result cache has an answer.
+    Pass a TransformTiming to collect the per-stage breakdown.
+    """
+    t0 = time.perf_counter()
+    try:
+        if chunked or (chunked is None and len(raw_source) > CHUNK_THRESHOLD):
+            return transform_chunked(raw_source, bypass_cache=bypass_cache, timing=timing)
+        return _transform_one(raw_source, bypass_cache=bypass_cache, timing=timing)
+    finally:
+        if timing is not None:
+            timing.wall += time.perf_counter() - t0
+
+# ---- Streaming ----
+# With "stream": true Ollama sends one JSON object per line, each carrying the
+# next piece of message.content. The pieces are fed to JSONArrayStream, which
+# hands back every element of "transactions" as soon as its object closes.
+
+def stream_ollama(messages: List[Dict[str, str]], schema: Dict[str, Any]) -> Iterator[str]:
+    """Yield message.content pieces of a streamed /api/chat reply."""
+    payload = {"model": MODEL, "stream": True, "format": schema, "messages": messages}
+    req = urllib.request.Request(
+        OLLAMA_URL,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=OLLAMA_TIMEOUT) as resp:
+            for line in resp:
+                if not line.strip():
+                    continue
+                obj = json.loads(line)
+                if obj.get("error"):
+                    raise RuntimeError(f"Ollama stream error: {obj['error']}")
+                piece = obj.get("message", {}).get("content", "")
+                if piece:
+                    yield piece
+                if obj.get("done"):
+                    return
+    except HTTPError as e:
+        raise RuntimeError(f"HTTP error from Ollama: {e.code} {e.reason}") from e
+    except URLError as e:
+        raise RuntimeError(f"Cannot reach Ollama at {OLLAMA_URL}. Is it running?") from e
+    raise RuntimeError("Ollama stream ended without a done message")
+
+def transform_stream(
+    raw_source: str,
+    account_hint: str = "",
+    parser: Optional[JSONArrayStream] = None,
+    bypass_cache: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield validated transactions while the model is still generating. Pass
+    `parser` to read parser.top["account_id"] afterwards. A transaction that
+    fails the schema raises ValueError at that point; records already yielded
+    stay valid. The completed result is stored in the result cache, and a
+    cached result is replayed without calling the model.
+    """
+    parser = parser or JSONArrayStream({"transactions"})
     messages = [
         {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": user_prompt}
+        {"role": "user", "content": build_user_prompt(raw_source, account_hint)}
     ]
-    result = call_ollama(messages, SCHEMA)
-    errs = validate_minimal(result, SCHEMA)
-
-    if errs:
-        raise ValueError("Schema validation failed: \n  - " + "\n  - ".join(errs))
-    return result
-
+    cache = result_cache()
+    key = cache_key(MODEL, SCHEMA, messages) if cache is not None else ""
+    if cache is not None and not (bypass_cache or OLLAMA_CACHE_BYPASS):
+        hit = cache.get(key)
+        if hit is not None and not validate_minimal(hit, SCHEMA):
+            parser.top["account_id"] = hit.get("account_id")
+            yield from hit["transactions"]
+            return
+    check = compile_schema(SCHEMA["properties"]["transactions"]["items"])
+    transactions: List[Dict[str, Any]] = []
+    for piece in stream_ollama(messages, SCHEMA):
+        for _, tx in parser.feed(piece):
+            errs = check(tx)
+            if errs:
+                raise ValueError(f"transaction {len(transactions)} failed validation: \n  - " + "\n  - ".join(errs))
+            transactions.append(tx)
+            yield tx
+    parser.feed(" ")  # flush a trailing value held back as possibly incomplete
+    if not parser.done:
+        raise ValueError("Model output ended before the JSON document was complete")
+    result = {"account_id": parser.top.get("account_id"), "transactions": transactions}
+    if cache is not None and not validate_minimal(result, SCHEMA):
+        cache.set(key, result)
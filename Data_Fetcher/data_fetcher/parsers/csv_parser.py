@@ -1,55 +1,90 @@
 from __future__ import annotations
 import csv
 from io import StringIO
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterable, AsyncIterator, Optional
+from .quarantine import QuarantineSink, RowGuard, guard_for, to_amount
+from .stream_parser import aiter_csv_records
 
-def parse_csv_transactions(csv_text: str) -> Dict[str, Any]:
+def csv_row_to_raw(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Map one CSV row (bankA, bankB or unknown headers) to the internal raw transaction."""
+    # bankA style
+    if {"date","amount","currency","merchant","category","account_id"}.issubset(row.keys()):
+        amt = to_amount(row["amount"])
+        return {
+            "txn_id": row.get("txn_id"),
+            "account_id": row["account_id"],
+            "date": row["date"],
+            "amount": amt,
+            "currency": row["currency"],
+            "merchant_raw": row["merchant"],
+            "mcc": None,
+            "category": row.get("category"),
+        }
+    # bankB style
+    elif {"txn_date","debit_amount","ccy","vendor","txn_category","acct_ref"}.issubset(row.keys()):
+        amt = -abs(to_amount(row["debit_amount"], "debit_amount"))  # outflow to negative
+        date = row["txn_date"].replace("/", "-")
+        return {
+            "txn_id": row.get("id"),
+            "account_id": row["acct_ref"],
+            "date": date,
+            "amount": amt,
+            "currency": row["ccy"],
+            "merchant_raw": row["vendor"],
+            "mcc": None,
+            "category": row.get("txn_category"),
+        }
+    else:
+        # pass through unknown schema minimally
+        return {
+            "txn_id": row.get("id"),
+            "account_id": row.get("account_id") or row.get("acct_ref"),
+            "date": row.get("date") or row.get("txn_date"),
+            "amount": to_amount(row.get("amount") or row.get("debit_amount") or 0),
+            "currency": row.get("currency") or row.get("ccy"),
+            "merchant_raw": row.get("merchant") or row.get("vendor"),
+            "mcc": row.get("mcc"),
+            "category": row.get("category") or row.get("txn_category"),
+        }
+
+def parse_csv_transactions(
+    csv_text: str,
+    tolerant: bool = False,
+    quarantine: Optional[QuarantineSink] = None,
+    source: str = "csv",
+    guard: Optional[RowGuard] = None,
+) -> Dict[str, Any]:
     """
     Supports bankA (standard headers) and bankB (vendor/txn_category, debit_amount positive).
     Returns {"transactions":[...], "meta": {...}}
+    tolerant=True quarantines bad rows (by line number) instead of failing the file;
+    meta["quarantine"] then holds the per-file counters. A `guard` passed in
+    replaces the one tolerant/quarantine would build.
     """
     rdr = csv.DictReader(StringIO(csv_text))
     out: List[Dict[str, Any]] = []
     meta = {"source": "csv", "columns": rdr.fieldnames}
+    guard = guard or guard_for(source, tolerant, quarantine)
 
     for row in rdr:
-        # bankA style
-        if {"date","amount","currency","merchant","category","account_id"}.issubset(row.keys()):
-            amt = float(row["amount"])
-            out.append({
-                "txn_id": row.get("txn_id"),
-                "account_id": row["account_id"],
-                "date": row["date"],
-                "amount": amt,
-                "currency": row["currency"],
-                "merchant_raw": row["merchant"],
-                "mcc": None,
-                "category": row.get("category"),
-            })
-        # bankB style
-        elif {"txn_date","debit_amount","ccy","vendor","txn_category","acct_ref"}.issubset(row.keys()):
-            amt = -abs(float(row["debit_amount"]))  # outflow to negative
-            date = row["txn_date"].replace("/", "-")
-            out.append({
-                "txn_id": row.get("id"),
-                "account_id": row["acct_ref"],
-                "date": date,
-                "amount": amt,
-                "currency": row["ccy"],
-                "merchant_raw": row["vendor"],
-                "mcc": None,
-                "category": row.get("txn_category"),
-            })
-        else:
-            # pass through unknown schema minimally
-            out.append({
-                "txn_id": row.get("id"),
-                "account_id": row.get("account_id") or row.get("acct_ref"),
-                "date": row.get("date") or row.get("txn_date"),
-                "amount": float(row.get("amount") or row.get("debit_amount") or 0),
-                "currency": row.get("currency") or row.get("ccy"),
-                "merchant_raw": row.get("merchant") or row.get("vendor"),
-                "mcc": row.get("mcc"),
-                "category": row.get("category") or row.get("txn_category"),
-            })
+        tx = guard.run(rdr.line_num, row, lambda: csv_row_to_raw(row))
+        if tx is not None:
+            out.append(tx)
+    stats = guard.finish()
+    if guard.sink is not None:
+        meta["quarantine"] = stats
     return {"transactions": out, "meta": meta}
+
+async def aparse_csv_transactions(
+    chunks: AsyncIterable[bytes], guard: Optional[RowGuard] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant: yields raw transactions while the CSV is still downloading.
+    Pass guard_for(source, tolerant=True) to quarantine bad rows; read guard.stats afterwards.
+    """
+    guard = guard or RowGuard("csv")
+    async for line_num, row in aiter_csv_records(chunks):
+        tx = guard.run(line_num, row, lambda: csv_row_to_raw(row))
+        if tx is not None:
+            yield tx
+    guard.finish()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from bs4 import BeautifulSoup  # pip install beautifulsoup4
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from .quarantine import QuarantineSink, RowGuard, guard_for, to_amount
 
 def parse_html_accounts(html_text: str) -> Dict[str, Any]:
     soup = BeautifulSoup(html_text, "html.parser")
@@ -22,22 +23,39 @@ def parse_html_accounts(html_text: str) -> Dict[str, Any]:
         })
     return {"accounts": out, "meta": {"source": "html"}}
 
-def parse_html_transactions(html_text: str) -> Dict[str, Any]:
+def _html_tx(rec: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "txn_id": None,
+        "account_id": rec.get("acct") or rec.get("account_id"),
+        "date": rec.get("date"),
+        "amount": to_amount(rec.get("amount") or 0),
+        "currency": rec.get("cur") or rec.get("currency"),
+        "merchant_raw": rec.get("merchant") or rec.get("name"),
+        "mcc": None,
+        "category": None,
+    }
+
+def parse_html_transactions(
+    html_text: str,
+    tolerant: bool = False,
+    quarantine: Optional[QuarantineSink] = None,
+    source: str = "html",
+    guard: Optional[RowGuard] = None,
+) -> Dict[str, Any]:
+    """tolerant=True quarantines bad <tr> rows (by source line) instead of failing the page."""
     soup = BeautifulSoup(html_text, "html.parser")
     rows = soup.select("table#tx tr")
     headers = [th.get_text(strip=True).lower() for th in rows[0].find_all("th")]
     out: List[Dict[str, Any]] = []
-    for r in rows[1:]:
+    guard = guard or guard_for(source, tolerant, quarantine)
+    for i, r in enumerate(rows[1:], start=1):
         cells = [td.get_text(strip=True) for td in r.find_all("td")]
         rec = dict(zip(headers, cells))
-        out.append({
-            "txn_id": None,
-            "account_id": rec.get("acct") or rec.get("account_id"),
-            "date": rec.get("date"),
-            "amount": float(rec.get("amount") or 0),
-            "currency": rec.get("cur") or rec.get("currency"),
-            "merchant_raw": rec.get("merchant") or rec.get("name"),
-            "mcc": None,
-            "category": None,
-        })
-    return {"transactions": out, "meta": {"source": "html"}}
+        tx = guard.run(r.sourceline or f"tr[{i}]", rec, lambda: _html_tx(rec))
+        if tx is not None:
+            out.append(tx)
+    meta = {"source": "html"}
+    stats = guard.finish()
+    if guard.sink is not None:
+        meta["quarantine"] = stats
+    return {"transactions": out, "meta": meta}
@@ -1,6 +1,6 @@
 # data_fetcher/parsers/json_parser.py
 from __future__ import annotations
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 def parse_json_accounts(obj: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -84,3 +84,26 @@ def parse_json_transactions(obj: Dict[str, Any]) -> Dict[str, Any]:
                 "category": t.get("category"),
             })
     return {"transactions": items, "meta": meta}
+
+def parse_plaid_transactions(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Plaid transaction objects (e.g. /transactions/sync `added` / `modified`).
+    Plaid amounts are positive for outflows, so the sign is flipped to match the
+    internal convention (outflow negative).
+    Returns {"transactions":[...], "meta": {...}}
+    """
+    out = []
+    for t in items:
+        amt = t.get("amount")
+        pfc = t.get("personal_finance_category") or {}
+        out.append({
+            "txn_id": t.get("transaction_id"),
+            "account_id": t.get("account_id"),
+            "date": t.get("date"),
+            "amount": -amt if amt is not None else None,
+            "currency": t.get("iso_currency_code") or t.get("unofficial_currency_code"),
+            "merchant_raw": t.get("merchant_name") or t.get("name"),
+            "mcc": t.get("merchant_category_code"),
+            "category": pfc.get("primary"),
+        })
+    return {"transactions": out, "meta": {"source": "json", "format": "plaid"}}
@@ -0,0 +1,146 @@
+# data_fetcher/parsers/quarantine.py
+'''
+tolerant parsing: a row that fails to parse is recorded in a quarantine sink
+(with its position and an error code from utils/error_handler) and skipped,
+so the rest of the file still comes through. A file whose share of bad rows
+exceeds a threshold is aborted, since at that point it is the file, not a
+row, that is broken.
+'''
+
+from __future__ import annotations
+import json
+import threading
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Protocol, TypeVar, Union
+from config.settings import settings
+from ..utils.error_handler import FetchError, RowValueError, map_row_exception
+
+T = TypeVar("T")
+
+@dataclass
+class QuarantinedRow:
+    source: str                    # file name or other label of the input
+    position: Union[int, str]      # CSV/HTML line number, or element path such as "STMTTRN[3]"
+    code: str                      # error code, e.g. ROW_BAD_AMOUNT
+    message: str
+    raw: Any = None                # the offending row as read, for reprocessing
+    index: Optional[int] = None    # 0-based ordinal of the row among all rows of the file
+    meta: Dict[str, Any] = field(default_factory=dict)  # FetchError.meta, e.g. the field that failed
+
+class QuarantineSink(Protocol):
+    def put(self, row: QuarantinedRow) -> None: ...
+
+class MemoryQuarantine:
+    def __init__(self):
+        self.rows: List[QuarantinedRow] = []
+
+    def put(self, row: QuarantinedRow) -> None:
+        self.rows.append(row)
+
+class JsonlQuarantine:
+    """Appends one JSON object per quarantined row; safe to share between threads."""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def put(self, row: QuarantinedRow) -> None:
+        line = json.dumps(asdict(row), default=str, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+def default_sink() -> QuarantineSink:
+    return JsonlQuarantine(settings.QUARANTINE_PATH) if settings.QUARANTINE_PATH else MemoryQuarantine()
+
+@dataclass
+class ParseStats:
+    rows: int = 0
+    ok: int = 0
+    quarantined: int = 0
+    errors: Counter = field(default_factory=Counter)  # by error code
+
+    @property
+    def error_rate(self) -> float:
+        return self.quarantined / self.rows if self.rows else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"rows": self.rows, "ok": self.ok, "quarantined": self.quarantined,
+                "errors": dict(self.errors), "error_rate": round(self.error_rate, 6)}
+
+class RowGuard:
+    """
+    Wraps per-row parsing for one file. In strict mode (sink is None) errors
+    propagate as before; otherwise they are quarantined and counted, and
+    PARSE_ERROR_RATE_EXCEEDED is raised once the error rate passes
+    max_error_rate. The rate is only meaningful after min_rows rows, so a
+    smaller file is aborted by finish() only if none of its rows parsed.
+    `check`, if given, is called with each parsed row and may raise to treat
+    a row that parsed but is unusable like one that failed.
+    """
+    def __init__(
+        self,
+        source: str,
+        sink: Optional[QuarantineSink] = None,
+        max_error_rate: float = settings.PARSE_MAX_ERROR_RATE,
+        min_rows: int = settings.PARSE_MIN_ROWS_FOR_ABORT,
+        check: Optional[Callable[[Any], None]] = None,
+    ):
+        self.source, self.sink = source, sink
+        self.max_error_rate, self.min_rows = max_error_rate, min_rows
+        self.check = check
+        self.stats = ParseStats()
+
+    def run(self, position: Union[int, str], raw: Any, fn: Callable[[], T]) -> Optional[T]:
+        """
+        fn() for one row; None if the row was quarantined. `raw` may be a
+        zero-argument callable, evaluated only if the row fails.
+        """
+        self.stats.rows += 1
+        if self.sink is None:
+            result = fn()
+            if self.check is not None:
+                self.check(result)
+            self.stats.ok += 1
+            return result
+        try:
+            result = fn()
+            if self.check is not None:
+                self.check(result)
+        except Exception as e:
+            err = map_row_exception(e)
+            self.stats.quarantined += 1
+            self.stats.errors[err.code] += 1
+            self.sink.put(QuarantinedRow(self.source, position, err.code, str(err), raw() if callable(raw) else raw,
+                                         self.stats.rows - 1, err.meta))
+            if self.stats.rows >= self.min_rows:
+                self._check()
+            return None
+        self.stats.ok += 1
+        return result
+
+    def finish(self) -> Dict[str, Any]:
+        """Final error-rate check; returns the counters for the parser's meta."""
+        if self.sink is not None and (self.stats.rows >= self.min_rows or not self.stats.ok):
+            self._check()
+        return self.stats.as_dict()
+
+    def _check(self) -> None:
+        if self.stats.error_rate > self.max_error_rate:
+            raise FetchError(
+                "PARSE_ERROR_RATE_EXCEEDED",
+                f"{self.source}: {self.stats.quarantined}/{self.stats.rows} rows failed to parse",
+                422,
+                {"source": self.source, **self.stats.as_dict()},
+            )
+
+def guard_for(source: str, tolerant: bool, sink: Optional[QuarantineSink] = None, **kwargs) -> RowGuard:
+    """RowGuard for a parser call: strict unless tolerant, with the default sink if none given."""
+    return RowGuard(source, (sink if sink is not None else default_sink()) if tolerant else None, **kwargs)
+
+def to_amount(value: Any, field_name: str = "amount") -> float:
+    """float(value), or ROW_BAD_AMOUNT (a ValueError) naming the field and the text that failed."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise RowValueError("ROW_BAD_AMOUNT", f"bad {field_name}: {value!r}", 422,
+                         {"field": field_name, "value": value}) from None
@@ -1,5 +1,216 @@
 # data_fetcher/parsers/stream_parser.py
-# placeholder for large-file streaming; implement as needed
-def parse_stream(iterable_bytes):
+'''
+incremental parsing for large payloads: records are produced while bytes are
+still arriving, and only the record currently being read is buffered.
+'''
+from __future__ import annotations
+import codecs
+import csv
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+_WS = re.compile(r"[ \t\n\r]*")
+_STRUCT = re.compile(r'[][{}"]')           # outside strings only these change nesting
+_IN_STR = re.compile(r'["\\]')            # inside a string: its end or an escape
+_SCALAR_END = re.compile(r"[ \t\n\r,:\]}]")
+_decoder = json.JSONDecoder()
+
+class JSONArrayStream:
+    """
+    Push parser for a JSON object whose large members are arrays, e.g.
+    {"transactions": [...], "next_cursor": "...", "has_more": false}.
+
+    feed() returns (key, element) for every element of the arrays named in `keys`
+    as soon as the element is complete. Other top-level members are decoded into
+    `top`. Input may be split at arbitrary byte positions; only the unfinished
+    tail is buffered, and each element is decoded by the C json scanner once
+    all of it has arrived; until then the scan for its end resumes where the
+    previous chunk stopped, so a large value costs linear time. Malformed JSON
+    raises ValueError as soon as the broken value is complete; call close()
+    at end of input to catch a truncated document.
+    """
+    # states
+    _OBJ, _KEY, _COLON, _VALUE, _AFTER_VALUE, _ELEM, _AFTER_ELEM, _DONE = range(8)
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = set(keys)
+        self.top: Dict[str, Any] = {}
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._state = self._OBJ
+        self._key: Optional[str] = None
+        self._scan: Optional[Tuple[int, int, bool]] = None  # (offset, depth, in_string) into a pending value
+
+    @property
+    def done(self) -> bool:
+        return self._state == self._DONE
+
+    def feed(self, chunk: Union[bytes, str]) -> List[Tuple[str, Any]]:
+        buf = self._buf + (self._text.decode(chunk) if isinstance(chunk, (bytes, bytearray)) else chunk)
+        out: List[Tuple[str, Any]] = []
+        pos, n, state = 0, len(buf), self._state
+        while True:
+            pos = _WS.match(buf, pos).end()
+            if pos >= n or state == self._DONE:
+                break
+            c = buf[pos]
+            if state == self._OBJ:
+                if c != "{":
+                    raise ValueError(f"expected a JSON object, got {c!r}")
+                pos, state = pos + 1, self._KEY
+            elif state == self._KEY:
+                if c == "}":
+                    pos, state = pos + 1, self._DONE
+                    continue
+                if c == ",":
+                    pos += 1
+                    continue
+                value, end = self._decode(buf, pos)
+                if end is None:
+                    break
+                self._key, pos, state = value, end, self._COLON
+            elif state == self._COLON:
+                if c != ":":
+                    raise ValueError(f"expected ':' after key {self._key!r}")
+                pos, state = pos + 1, self._VALUE
+            elif state == self._VALUE:
+                if c == "[" and self._key in self.keys:
+                    pos, state = pos + 1, self._ELEM
+                    continue
+                value, end = self._decode(buf, pos)
+                if end is None:
+                    break
+                self.top[self._key], pos, state = value, end, self._AFTER_VALUE
+            elif state == self._AFTER_VALUE:
+                if c not in ",}":
+                    raise ValueError(f"unexpected {c!r} after member {self._key!r}")
+                pos, state = pos + 1, (self._KEY if c == "," else self._DONE)
+            elif state == self._ELEM:
+                if c == "]":
+                    pos, state = pos + 1, self._AFTER_VALUE
+                    continue
+                value, end = self._decode(buf, pos)
+                if end is None:
+                    break
+                out.append((self._key, value))
+                pos, state = end, self._AFTER_ELEM
+            elif state == self._AFTER_ELEM:
+                if c not in ",]":
+                    raise ValueError(f"unexpected {c!r} in array {self._key!r}")
+                pos, state = pos + 1, (self._ELEM if c == "," else self._AFTER_VALUE)
+        self._buf, self._state = buf[pos:], state
+        return out
+
+    def close(self) -> None:
+        """End of input: raises ValueError unless the whole document was read."""
+        tail = self._text.decode(b"", final=True)  # raises on a split UTF-8 sequence
+        if not self.done or (self._buf + tail).strip():
+            raise ValueError("JSON stream ended before the document was complete")
+
+    def _decode(self, buf: str, pos: int) -> Tuple[Any, Optional[int]]:
+        """Decode the value at pos, or (None, None) while it is still incomplete."""
+        end = self._extent(buf, pos)
+        if end is None:
+            return None, None
+        self._scan = None
+        value, stop = _decoder.raw_decode(buf, pos)  # JSONDecodeError: complete but malformed
+        if stop != end:
+            raise json.JSONDecodeError("Extra data", buf, stop)
+        return value, end
+
+    def _extent(self, buf: str, pos: int) -> Optional[int]:
+        """End of the value starting at pos if all of it is buffered; else None, remembering how far it got."""
+        if buf[pos] not in '{["':
+            # a number/literal at the very end could still grow ("12" -> "123")
+            m = _SCALAR_END.search(buf, pos)
+            return m.start() if m else None
+        offset, depth, in_str = self._scan or (0, 0, False)
+        i, n = pos + offset, len(buf)
+        while True:
+            if in_str:
+                m = _IN_STR.search(buf, i)
+                if m is None:
+                    break
+                if m.group() == "\\":
+                    if m.end() >= n:  # the escaped character is in the next chunk
+                        i = m.start()
+                        break
+                    i = m.end() + 1
+                    continue
+                in_str, i = False, m.end()
+                if depth == 0:
+                    return i
+            else:
+                m = _STRUCT.search(buf, i)
+                if m is None:
+                    break
+                c, i = m.group(), m.end()
+                if c == '"':
+                    in_str = True
+                elif c in "[{":
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        return i
+        self._scan = (min(i, n) - pos, depth, in_str)
+        return None
+
+def parse_stream(iterable_bytes: Iterable[bytes], keys: Iterable[str]) -> Iterator[Tuple[str, Any]]:
+    """Yield (key, element) for the named top-level arrays of a JSON byte stream; ValueError if it is truncated or malformed."""
+    parser = JSONArrayStream(keys)
     for chunk in iterable_bytes:
-        yield chunk  # parse incrementally in your handler
+        yield from parser.feed(chunk)
+    parser.close()
+
+async def aparse_stream(chunks: AsyncIterable[bytes], keys: Iterable[str],
+                        parser: Optional[JSONArrayStream] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """Async variant for httpx byte streams (same errors); pass `parser` to read `top` afterwards."""
+    parser = parser or JSONArrayStream(keys)
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+    parser.close()
+
+async def aiter_csv_rows(chunks: AsyncIterable[bytes], encoding: str = "utf-8") -> AsyncIterator[Dict[str, Any]]:
+    """csv.DictReader-style rows from a CSV byte stream; quoted fields may span lines and chunks."""
+    async for _, row in aiter_csv_records(chunks, encoding):
+        yield row
+
+async def aiter_csv_records(chunks: AsyncIterable[bytes], encoding: str = "utf-8") -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """(line_num, row) pairs; line_num is the record's last physical line, as in csv.DictReader."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending, record = "", ""
+    header: Optional[List[str]] = None
+    line_num = 0
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            line_num += 1
+            record += line + "\n"
+            if record.count('"') % 2:  # inside a quoted field; the record continues
+                continue
+            header, row = _csv_record(record, header)
+            record = ""
+            if row is not None:
+                yield line_num, row
+    record += pending + decoder.decode(b"", final=True)
+    if record.strip():
+        _, row = _csv_record(record, header)
+        if row is not None:
+            yield line_num + 1, row
+
+def _csv_record(record: str, header: Optional[List[str]]) -> Tuple[Optional[List[str]], Optional[Dict[str, Any]]]:
+    values = next(csv.reader([record]), [])
+    if not values:
+        return header, None
+    if header is None:
+        return values, None
+    row: Dict[str, Any] = dict(zip(header, values))
+    if len(values) > len(header):
+        row[None] = values[len(header):]  # same restkey convention as csv.DictReader
+    elif len(values) < len(header):
+        row.update({k: None for k in header[len(values):]})
+    return header, row
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from typing import Dict, Any, List, Optional
 import xml.etree.ElementTree as ET
+from .quarantine import QuarantineSink, RowGuard, guard_for, to_amount
 
 NS_CAMT = {"c": "urn:iso:std:iso:20022:tech:xsd:camt.053.001.02"}
 
@@ -62,27 +63,44 @@ def parse_custom_bankB_statement(xml_text: str) -> Dict[str, Any]:
             })
     return {"accounts": out_accounts, "transactions": out_tx, "meta": {"source": "xml", "format": "custom"}}
 
-def parse_ofx_transactions(xml_text: str) -> Dict[str, Any]:
+def _ofx_tx(st: ET.Element, ccy: str) -> Dict[str, Any]:
+    date = st.findtext("DTPOSTED", default="")
+    if len(date) >= 8:
+        date = f"{date[0:4]}-{date[4:6]}-{date[6:8]}"
+    amt = to_amount(st.findtext("TRNAMT", default="0"), "TRNAMT")
+    name = st.findtext("NAME", default=None)
+    return {
+        "txn_id": None,
+        "account_id": None,
+        "date": date,
+        "amount": amt,
+        "currency": ccy,
+        "merchant_raw": name,
+        "mcc": None,
+        "category": None,
+    }
+
+def parse_ofx_transactions(
+    xml_text: str,
+    tolerant: bool = False,
+    quarantine: Optional[QuarantineSink] = None,
+    source: str = "ofx",
+    guard: Optional[RowGuard] = None,
+) -> Dict[str, Any]:
     """
     Simple OFX/QFX transaction parser (non-namespace).
+    tolerant=True quarantines bad STMTTRN elements (by index) instead of failing the file.
     """
     root = ET.fromstring(xml_text)
     items: List[Dict[str, Any]] = []
     ccy = (root.find(".//CURDEF").text if root.find(".//CURDEF") is not None else "USD")
-    for st in root.findall(".//STMTTRN"):
-        date = st.findtext("DTPOSTED", default="")
-        if len(date) >= 8:
-            date = f"{date[0:4]}-{date[4:6]}-{date[6:8]}"
-        amt = float(st.findtext("TRNAMT", default="0"))
-        name = st.findtext("NAME", default=None)
-        items.append({
-            "txn_id": None,
-            "account_id": None,
-            "date": date,
-            "amount": amt,
-            "currency": ccy,
-            "merchant_raw": name,
-            "mcc": None,
-            "category": None,
-        })
-    return {"transactions": items, "meta": {"source": "ofx"}}
+    guard = guard or guard_for(source, tolerant, quarantine)
+    for i, st in enumerate(root.findall(".//STMTTRN"), start=1):
+        tx = guard.run(f"STMTTRN[{i}]", lambda: ET.tostring(st, encoding="unicode"), lambda: _ofx_tx(st, ccy))
+        if tx is not None:
+            items.append(tx)
+    meta = {"source": "ofx"}
+    stats = guard.finish()
+    if guard.sink is not None:
+        meta["quarantine"] = stats
+    return {"transactions": items, "meta": meta}
@@ -0,0 +1,187 @@
+# data_fetcher/shared_tables.py
+'''
+immutable, compact encoding of str -> str reference tables (merchant aliases,
+MCC map, category rules) in one file that every worker on a host mmaps.
+Lookups read straight from the shared pages; a new version is published by
+writing a fresh file and renaming it over the old one.
+'''
+
+import mmap
+import os
+import struct
+import time
+import zlib
+from collections.abc import Mapping
+from typing import Dict, Iterator, Optional, Tuple
+
+# Layout (little endian, offsets are absolute file positions):
+#   header    : magic "DFST", format u32, table count u32, builder version (32 bytes utf-8, NUL padded)
+#   directory : per table -> name_off u32, name_len u32, table_off u32
+#   table     : slot count u32 (power of two), entry count u32, then slots
+#   slot      : crc32 u32, key_off u32, key_len u32, val_off u32, val_len u32
+#               (key_off == 0 marks an empty slot; linear probing, load <= 0.5)
+#   heap      : utf-8 bytes of names, keys and values
+MAGIC = b"DFST"
+FORMAT = 2
+_HEADER = struct.Struct("<4sII32s")
+_DIR = struct.Struct("<III")
+_TABLE = struct.Struct("<II")
+_SLOT = struct.Struct("<IIIII")
+
+def encode_tables(tables: Dict[str, Dict[str, str]], version: str = "") -> bytes:
+    """
+    Serialize {table_name: {key: value}} into the shared binary layout.
+    `version` identifies the builders that produced the tables (see read_version).
+    """
+    vb = version.encode("utf-8")
+    if len(vb) > 32:
+        raise ValueError(f"table version {version!r} is longer than 32 bytes")
+    names = sorted(tables)
+    layouts = []
+    pos = _HEADER.size + _DIR.size * len(names)
+    for name in names:
+        n_slots = 1
+        while n_slots < 2 * max(1, len(tables[name])):
+            n_slots *= 2
+        layouts.append((name, n_slots, pos))
+        pos += _TABLE.size + _SLOT.size * n_slots
+
+    heap = bytearray()
+    def put(data: bytes) -> Tuple[int, int]:
+        off = pos + len(heap)
+        heap.extend(data)
+        return off, len(data)
+
+    out = bytearray(pos)
+    _HEADER.pack_into(out, 0, MAGIC, FORMAT, len(names), vb)
+    for i, (name, n_slots, table_off) in enumerate(layouts):
+        name_off, name_len = put(name.encode("utf-8"))
+        _DIR.pack_into(out, _HEADER.size + i * _DIR.size, name_off, name_len, table_off)
+        entries = tables[name]
+        _TABLE.pack_into(out, table_off, n_slots, len(entries))
+        slots_off, mask = table_off + _TABLE.size, n_slots - 1
+        for key, value in entries.items():
+            kb, vb = str(key).encode("utf-8"), str(value).encode("utf-8")
+            h = zlib.crc32(kb)
+            slot = h & mask
+            while _SLOT.unpack_from(out, slots_off + slot * _SLOT.size)[1]:
+                slot = (slot + 1) & mask
+            key_off, key_len = put(kb)
+            val_off, val_len = put(vb)
+            _SLOT.pack_into(out, slots_off + slot * _SLOT.size, h, key_off, key_len, val_off, val_len)
+    out.extend(heap)
+    if len(out) > 0xFFFFFFFF:
+        raise ValueError("reference tables exceed the 4 GiB shared table format")
+    return bytes(out)
+
+def publish(path: str, tables: Dict[str, Dict[str, str]], version: str = "") -> None:
+    """Atomically replace the table file at `path`; readers pick it up on refresh()."""
+    data = encode_tables(tables, version)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def read_version(path: str) -> Optional[str]:
+    """Builder version of a published file; None if it is missing or not in the current format."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(_HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(head) < _HEADER.size:
+        return None
+    magic, fmt, _, vb = _HEADER.unpack(head)
+    if magic != MAGIC or fmt != FORMAT:
+        return None
+    return vb.rstrip(b"\0").decode("utf-8")
+
+class SharedTable(Mapping):
+    """Read-only str -> str view over one table inside a mapped file."""
+    __slots__ = ("_buf", "_slots_off", "_mask", "_count")
+
+    def __init__(self, buf: memoryview, table_off: int):
+        n_slots, self._count = _TABLE.unpack_from(buf, table_off)
+        self._buf, self._slots_off, self._mask = buf, table_off + _TABLE.size, n_slots - 1
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        if not isinstance(key, str):
+            return default
+        kb = key.encode("utf-8")
+        h = zlib.crc32(kb)
+        buf, i = self._buf, h & self._mask
+        while True:
+            sh, key_off, key_len, val_off, val_len = _SLOT.unpack_from(buf, self._slots_off + i * _SLOT.size)
+            if not key_off:
+                return default
+            if sh == h and key_len == len(kb) and buf[key_off:key_off + key_len] == kb:
+                return str(buf[val_off:val_off + val_len], "utf-8")
+            i = (i + 1) & self._mask
+
+    def __getitem__(self, key: str) -> str:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.get(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        buf = self._buf
+        for i in range(self._mask + 1):
+            _, key_off, key_len, _, _ = _SLOT.unpack_from(buf, self._slots_off + i * _SLOT.size)
+            if key_off:
+                yield str(buf[key_off:key_off + key_len], "utf-8")
+
+    def __len__(self) -> int:
+        return self._count
+
+class SharedTables:
+    """
+    Maps the published file read-only. Every process mapping the same file shares
+    its page-cache pages, so RAM use does not grow with the worker count (put the
+    file on /dev/shm to keep it off disk entirely). refresh() remaps after a publish;
+    views handed out earlier stay valid on the old mapping until they are dropped.
+    """
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self._check_interval = check_interval
+        self._checked_at = 0.0
+        self._ident: Optional[Tuple[int, int]] = None
+        self._tables: Dict[str, SharedTable] = {}
+        self.version = ""
+        self.refresh(force=True)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Remap if a new version was published; returns True when it did."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self._check_interval:
+            return False
+        self._checked_at = now
+        st = os.stat(self.path)
+        ident = (st.st_ino, st.st_mtime_ns)
+        if ident == self._ident:
+            return False
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(mm)
+        magic, fmt, n_tables, vb = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or fmt != FORMAT:
+            raise ValueError(f"{self.path} is not a shared table file (format {FORMAT})")
+        tables = {}
+        for i in range(n_tables):
+            name_off, name_len, table_off = _DIR.unpack_from(buf, _HEADER.size + i * _DIR.size)
+            tables[str(buf[name_off:name_off + name_len], "utf-8")] = SharedTable(buf, table_off)
+        self._tables, self._ident = tables, ident
+        self.version = vb.rstrip(b"\0").decode("utf-8")
+        return True
+
+    def table(self, name: str) -> SharedTable:
+        self.refresh()
+        return self._tables[name]
+
+    def names(self) -> Tuple[str, ...]:
+        return tuple(self._tables)
@@ -0,0 +1,97 @@
+# data_fetcher/testing/bench_transformer.py
+'''
+benchmark for ollama_transformer. Runs sample statements through transform()
+against the stub model and prints one JSON report with the per-stage
+breakdown (TransformTiming), so the transformer's own overhead and throughput
+can be diffed across commits without a GPU or a live model:
+
+  # once, with a real model: record its responses through the stub as a proxy
+  python -m data_fetcher.testing.bench_transformer --record rec.jsonl --upstream http://localhost:11434/api/chat
+  # any time after: replay them
+  python -m data_fetcher.testing.bench_transformer --replay rec.jsonl --repeat 20 --out bench.json
+
+Without --replay the stub answers synthetically; the stages are still
+measured, but the token rates then describe the stub, not a model.
+'''
+
+import argparse
+import statistics
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from .. import ollama_transformer as ot
+from .report import emit, run_metadata
+from .server import serve_app
+from .stub_ollama import Faults, create_app, load_recordings
+
+SAMPLES_DIR = Path(__file__).resolve().parent.parent / "samples_for_LLM"
+
+def load_inputs(paths: List[str]) -> List[Tuple[str, str]]:
+    files = [Path(p) for p in paths] if paths else sorted(SAMPLES_DIR.iterdir())
+    return [(f.name, f.read_text(encoding="utf-8")) for f in files if f.is_file()]
+
+def bench_input(raw: str, repeat: int, chunked: Optional[bool] = None) -> Dict[str, Any]:
+    """transform() `repeat` times with the result cache bypassed; medians per stage in ms."""
+    runs = []
+    for _ in range(repeat):
+        timing = ot.TransformTiming()
+        result = ot.transform(raw, chunked=chunked, bypass_cache=True, timing=timing)
+        runs.append(timing.as_dict())
+    last = runs[-1]
+    wall = [r["wall_s"] for r in runs]
+    stages = {k: round(statistics.median(r["stages_s"][k] for r in runs) * 1000, 3) for k in runs[0]["stages_s"]}
+    overhead = sum(v for k, v in stages.items() if k != "network")
+    return {
+        "rows": len(result["transactions"]),
+        "chars": len(raw),
+        "wall_ms": {"median": round(statistics.median(wall) * 1000, 3), "min": round(min(wall) * 1000, 3),
+                    "max": round(max(wall) * 1000, 3)},
+        "stages_ms": stages,
+        "overhead_ms": round(overhead, 3),  # everything but the wait for the model
+        "calls": last["calls"],
+        "prompt_tokens": last["prompt_tokens"],
+        "eval_tokens": last["eval_tokens"],
+        "prompt_tokens_per_s": last["prompt_tokens_per_s"],
+        "eval_tokens_per_s": last["eval_tokens_per_s"],
+        "model_total_ms": round(last["model_total_s"] * 1000, 3),
+    }
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    ap = argparse.ArgumentParser(description="ollama_transformer benchmark (JSON report on stdout)")
+    ap.add_argument("inputs", nargs="*", help="statement files; default samples_for_LLM/*")
+    ap.add_argument("--replay", help="recordings file to answer from")
+    ap.add_argument("--record", help="append live responses to this file (needs --upstream)")
+    ap.add_argument("--upstream", help="real /api/chat URL to proxy to while recording")
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("--chunked", choices=("auto", "on", "off"), default="auto")
+    ap.add_argument("--latency", default="none", help="stub latency spec, e.g. fixed:0.05")
+    ap.add_argument("--out", help="also write the report to this file")
+    args = ap.parse_args(argv)
+    if args.record and not args.upstream:
+        ap.error("--record needs --upstream")
+
+    replay = load_recordings(args.replay) if args.replay else None
+    app = create_app(Faults(latency=args.latency), replay=replay, upstream=args.upstream, record=args.record)
+    url, server, _ = serve_app(app)
+    previous_url, ot.OLLAMA_URL = ot.OLLAMA_URL, url + "/api/chat"
+    chunked = {"auto": None, "on": True, "off": False}[args.chunked]
+    try:
+        # recording needs one pass only; the model is the slow part
+        repeat = 1 if args.record else args.repeat
+        results = {name: bench_input(raw, repeat, chunked) for name, raw in load_inputs(args.inputs)}
+    finally:
+        ot.OLLAMA_URL = previous_url
+        server.should_exit = True
+    report = {
+        "inputs": results,
+        "mode": "record" if args.record else "replay" if replay is not None else "synthetic",
+        "stub_calls": dict(app.state.calls),
+        "repeat": repeat,
+        "model": ot.MODEL,
+        "compact_prompt": ot.COMPACT_PROMPT,
+        **run_metadata(),
+    }
+    emit(report, args.out)
+    return report
+
+if __name__ == "__main__":
+    main()
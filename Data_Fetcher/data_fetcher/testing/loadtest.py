@@ -0,0 +1,127 @@
+# data_fetcher/testing/loadtest.py
+'''
+load-test harness for the connector layer. Drives PlaidConnector (pooled
+clients, retries, breakers) at a fixed concurrency against the stub bank or
+any compatible URL and prints one machine-readable JSON report, so runs can
+be diffed across commits:
+
+  python -m data_fetcher.testing.loadtest --requests 5000 --concurrency 64 \\
+      --latency lognormal:0.02,0.5 --throttle-rate 0.02 --out bench.json
+'''
+
+import argparse
+import asyncio
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import uvicorn
+from ..connectors.batch import FanOut
+from ..connectors.connector_base import RequestCtx
+from ..connectors.http_pool import ClientPool, PoolConfig
+from ..connectors.plaid_connector import PlaidConnector
+from ..connectors.resilience import Resilience
+from ..utils.adaptive_rate import AIMDController
+from ..utils.rate_limiter import RateLimiter
+from .report import emit, run_metadata
+from .server import serve_app
+from .stub_bank import Faults, create_app
+
+ENDPOINTS = {"balance": "fetch_balance", "auth": "fetch_auth"}
+UNLIMITED = (1e9, 1_000_000)  # rate, burst: the harness measures the connector, not the bank's quota
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+def start_stub(faults: Faults) -> Tuple[str, uvicorn.Server, threading.Thread]:
+    """Serve the stub bank on a free localhost port in a background thread."""
+    return serve_app(create_app(faults))
+
+async def run_load(
+    base_url: str,
+    endpoint: str = "balance",
+    requests: int = 1000,
+    concurrency: int = 32,
+    retries: int = 2,
+    timeout: int = 10,
+    pool_config: Optional[PoolConfig] = None,
+) -> Dict[str, Any]:
+    resilience = Resilience()
+    async with ClientPool(default=pool_config) as pool:
+        conn = PlaidConnector(base_url, pool=pool, resilience=resilience, institution_id="loadtest",
+                              rate_control=AIMDController(RateLimiter(default=UNLIMITED)))
+        # distinct tokens and no cache/coalescing: every request really goes upstream
+        ctxs = (RequestCtx(f"tok-{i}", timeout, retries, {"no_cache": True, "no_coalesce": True})
+                for i in range(requests))
+        run = FanOut(getattr(conn, ENDPOINTS[endpoint]), ctxs, concurrency=concurrency, limiter=None)
+        latencies: List[float] = []
+        errors: Counter = Counter()
+        async for item in run:
+            if item.ok:
+                latencies.append(item.elapsed)
+            else:
+                errors[item.error.code] += 1
+    latencies.sort()
+    stats = resilience.snapshot()
+    ms = lambda v: round(v * 1000, 3)
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": requests,
+        "ok": len(latencies),
+        "errors": dict(errors),
+        "elapsed_s": round(run.stats.elapsed, 4),
+        "throughput_rps": round(run.stats.throughput, 2),
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 0.50)),
+            "p90": ms(percentile(latencies, 0.90)),
+            "p99": ms(percentile(latencies, 0.99)),
+            "max": ms(latencies[-1]) if latencies else 0.0,
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        },
+        "retries": stats.retries,
+        "budget_exhausted": stats.budget_exhausted,
+        "circuit_rejections": stats.circuit_rejections,
+    }
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    ap = argparse.ArgumentParser(description="Connector load test (JSON report on stdout)")
+    ap.add_argument("--url", help="target base URL; default starts the local stub bank")
+    ap.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="balance")
+    ap.add_argument("--requests", type=int, default=1000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--retries", type=int, default=2)
+    ap.add_argument("--timeout", type=int, default=10)
+    ap.add_argument("--max-connections", type=int, default=None)
+    ap.add_argument("--latency", default="none", help="stub latency spec, e.g. lognormal:0.02,0.5")
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--throttle-rate", type=float, default=0.0)
+    ap.add_argument("--retry-after", type=float, default=0.05)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", help="also write the report to this file")
+    args = ap.parse_args(argv)
+
+    server = None
+    url = args.url
+    if not url:
+        faults = Faults(latency=args.latency, error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                        retry_after=args.retry_after, seed=args.seed)
+        url, server, _ = start_stub(faults)
+    pool_config = PoolConfig(max_connections=args.max_connections) if args.max_connections else None
+    try:
+        report = asyncio.run(run_load(url, args.endpoint, args.requests, args.concurrency,
+                                      args.retries, args.timeout, pool_config))
+    finally:
+        if server is not None:
+            server.should_exit = True
+    report["target"] = "stub" if server is not None else url
+    report["stub"] = {"latency": args.latency, "error_rate": args.error_rate,
+                      "throttle_rate": args.throttle_rate} if server is not None else None
+    report.update(run_metadata())
+    emit(report, args.out)
+    return report
+
+if __name__ == "__main__":
+    main()
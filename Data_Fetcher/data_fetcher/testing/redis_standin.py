@@ -0,0 +1,63 @@
+# data_fetcher/testing/redis_standin.py
+'''
+in-process stand-in for the slice of a Redis client that RedisGCRABackend
+uses, so the shared limiter can be exercised without a server:
+
+  limiter = SharedRateLimiter(RedisGCRABackend(RedisStandIn()))
+
+eval() cannot run Lua; it dispatches on the script text to a Python
+equivalent registered in SCRIPTS.
+'''
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from ..utils.shared_rate_limiter import GCRA_LUA, gcra
+
+def _gcra_script(r: "RedisStandIn", keys: List[str], args: List[Any]) -> str:
+    interval, burst = float(args[0]), int(args[1])
+    now = r.time_float()
+    raw = r.get(keys[0])
+    tat, wait = gcra(float(raw) if raw is not None else now, now, interval, burst)
+    if wait:
+        return repr(wait)
+    r.set(keys[0], repr(tat), px=int((tat - now) * 1000) + 1)
+    return "0"
+
+SCRIPTS: Dict[str, Callable[["RedisStandIn", List[str], List[Any]], Any]] = {GCRA_LUA: _gcra_script}
+
+class RedisStandIn:
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._data: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._lock = threading.RLock()  # scripts run atomically, as on a real server
+        self.calls = 0
+
+    def time_float(self) -> float:
+        return self._clock()
+
+    def time(self) -> Tuple[int, int]:
+        now = self._clock()
+        return int(now), int((now % 1) * 1_000_000)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            value, expires = self._data.get(key, (None, None))
+            if expires is not None and expires <= self._clock():
+                self._data.pop(key, None)
+                return None
+            return value
+
+    def set(self, key: str, value: Any, px: Optional[int] = None) -> bool:
+        with self._lock:
+            self._data[key] = (value, self._clock() + px / 1000 if px else None)
+            return True
+
+    def eval(self, script: str, numkeys: int, *keys_and_args: Any) -> Any:
+        fn = SCRIPTS.get(script)
+        if fn is None:
+            head = script.strip().splitlines()[0] if script.strip() else ""
+            raise ValueError(f"unknown script {head!r}: RedisStandIn only runs scripts registered in SCRIPTS")
+        with self._lock:
+            self.calls += 1
+            return fn(self, [str(k) for k in keys_and_args[:numkeys]], list(keys_and_args[numkeys:]))
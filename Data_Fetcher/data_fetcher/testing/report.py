@@ -0,0 +1,30 @@
+# data_fetcher/testing/report.py
+'''
+run metadata and JSON report output shared by the benchmark harnesses
+(loadtest, bench_transformer), so their reports can be diffed across commits.
+'''
+
+import json
+import platform
+import subprocess
+from typing import Any, Dict, Optional
+
+def git_commit() -> Optional[str]:
+    """Short hash of the checked-out commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+def run_metadata() -> Dict[str, Any]:
+    """What a report was measured on: the commit and the Python version."""
+    return {"commit": git_commit(), "python": platform.python_version()}
+
+def emit(report: Dict[str, Any], out: Optional[str] = None) -> None:
+    """Print the report as JSON and, with `out`, also write it to that file."""
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
@@ -0,0 +1,15 @@
+# data_fetcher/testing/server.py
+import threading
+import time
+from typing import Any, Tuple
+import uvicorn
+
+def serve_app(app: Any) -> Tuple[str, uvicorn.Server, threading.Thread]:
+    """Serve an ASGI app on a free localhost port in a background thread; stop with server.should_exit = True."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return f"http://127.0.0.1:{port}", server, thread
@@ -0,0 +1,175 @@
+# data_fetcher/testing/stub_bank.py
+'''
+local, fault-injecting stand-in for the bank endpoints PlaidConnector calls
+(/accounts/balance/get, /auth/get, /transactions/get, /transactions/sync) with
+configurable latency distributions, error rates and 429 injection;
+/transactions/sync replays the recorded pages in sample_data/plaid.
+
+  uvicorn data_fetcher.testing.stub_bank:app --port 8099      (faults from STUB_* env vars)
+
+or in-process, without sockets:
+
+  pool = ClientPool(transport_factory=lambda _: httpx.ASGITransport(app=create_app(Faults(error_rate=0.3))))
+'''
+
+import asyncio
+import json
+import math
+import os
+import random
+from collections import Counter
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SAMPLE_DIR = Path(__file__).parents[1] / "sample_data"
+
+@dataclass
+class Faults:
+    error_rate: float = 0.0      # share of requests answered with error_status
+    error_status: int = 503
+    timeout_rate: float = 0.0    # share of requests that hang for hang_seconds
+    hang_seconds: float = 30.0
+    fail_first: int = 0          # deterministically fail the first N requests per endpoint
+    throttle_rate: float = 0.0   # share of requests answered 429 with a Retry-After header
+    retry_after: float = 1.0
+    latency: str = "none"        # none | fixed:S | uniform:LO,HI | exp:MEAN | lognormal:MEDIAN,SIGMA (seconds)
+    seed: Optional[int] = None
+    sync_mutations: int = 0      # answer the first N mid-pagination /transactions/sync calls with
+                                 # TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION
+    truncate_at: int = 0         # end streamed /transactions/get bodies after this many bytes (0 = whole body)
+
+    @classmethod
+    def from_env(cls) -> "Faults":
+        kw: Dict[str, Any] = {}
+        for f in fields(cls):
+            raw = os.environ.get(f"STUB_{f.name.upper()}")
+            if raw is not None:
+                kw[f.name] = raw if f.name == "latency" else int(raw) if f.name in ("error_status", "fail_first", "seed", "sync_mutations", "truncate_at") else float(raw)
+        return cls(**kw)
+
+def sample_latency(spec: str, rng: random.Random) -> float:
+    """Draw one response delay in seconds from a latency spec (see Faults.latency)."""
+    kind, _, args = spec.partition(":")
+    a = [float(x) for x in args.split(",") if x]
+    if kind == "none":
+        return 0.0
+    if kind == "fixed":
+        return a[0]
+    if kind == "uniform":
+        return rng.uniform(a[0], a[1])
+    if kind == "exp":
+        return rng.expovariate(1 / a[0])
+    if kind == "lognormal":
+        return rng.lognormvariate(math.log(a[0]), a[1])
+    raise ValueError(f"unknown latency spec {spec!r}")
+
+def _balance_body() -> Dict[str, Any]:
+    return json.loads((SAMPLE_DIR / "bankA" / "accounts.json").read_text())
+
+def _auth_body() -> Dict[str, Any]:
+    body = _balance_body()
+    body["numbers"] = {"ach": [
+        {"account_id": a["account_id"], "account": f"00000000{a['mask']}", "routing": "011000015"}
+        for a in body["accounts"]
+    ]}
+    return body
+
+def _sync_pages() -> Dict[str, Dict[str, Any]]:
+    """Recorded /transactions/sync pages keyed by the cursor they answer."""
+    recorded = json.loads((SAMPLE_DIR / "plaid" / "transactions_sync_pages.json").read_text())
+    pages = {p["cursor"]: p for p in recorded["pages"]}
+    last = recorded["pages"][-1]["next_cursor"]
+    pages[last] = {"cursor": last, "added": [], "modified": [], "removed": [], "next_cursor": last, "has_more": False}
+    return pages
+
+def _all_transactions(pages: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    latest: Dict[str, Dict[str, Any]] = {}
+    for page in pages.values():
+        for t in page["added"] + page["modified"]:
+            latest[t["transaction_id"]] = t
+        for r in page["removed"]:
+            latest.pop(r["transaction_id"], None)
+    return list(latest.values())
+
+async def _chunked(body: bytes, size: int) -> AsyncIterator[bytes]:
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+        await asyncio.sleep(0)
+
+def create_app(faults: Optional[Faults] = None) -> FastAPI:
+    app = FastAPI(title="stub bank")
+    app.state.faults = faults or Faults()
+    app.state.calls = Counter()
+    app.state.rng = random.Random(app.state.faults.seed)
+    app.state.sync_pages = _sync_pages()
+
+    async def inject(endpoint: str) -> Optional[JSONResponse]:
+        f: Faults = app.state.faults
+        app.state.calls[endpoint] += 1
+        rng = app.state.rng
+        delay = sample_latency(f.latency, rng)
+        if delay:
+            await asyncio.sleep(delay)
+        if app.state.calls[endpoint] <= f.fail_first or rng.random() < f.error_rate:
+            return JSONResponse({"error_code": "INJECTED_FAULT"}, status_code=f.error_status)
+        if rng.random() < f.throttle_rate:
+            app.state.calls["429"] += 1
+            return JSONResponse({"error_code": "RATE_LIMIT_EXCEEDED"}, status_code=429,
+                                headers={"Retry-After": f"{f.retry_after:g}"})
+        if rng.random() < f.timeout_rate:
+            await asyncio.sleep(f.hang_seconds)
+        return None
+
+    @app.post("/accounts/balance/get")
+    async def balance_get(request: Request):
+        return await inject("/accounts/balance/get") or _balance_body()
+
+    @app.post("/auth/get")
+    async def auth_get(request: Request):
+        return await inject("/auth/get") or _auth_body()
+
+    @app.post("/transactions/sync")
+    async def transactions_sync(body: Dict[str, Any]):
+        fault = await inject("/transactions/sync")
+        if fault:
+            return fault
+        if body.get("cursor") and app.state.calls["sync_mutation"] < app.state.faults.sync_mutations:
+            app.state.calls["sync_mutation"] += 1
+            return JSONResponse({"error_code": "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION"}, status_code=400)
+        page = app.state.sync_pages.get(body.get("cursor") or "")
+        if page is None:
+            return JSONResponse({"error_code": "INVALID_CURSOR"}, status_code=400)
+        return {k: v for k, v in page.items() if k != "cursor"}
+
+    @app.post("/transactions/get")
+    async def transactions_get(body: Dict[str, Any]):
+        fault = await inject("/transactions/get")
+        if fault:
+            return fault
+        txns = _all_transactions(app.state.sync_pages)
+        opts = body.get("options") or {}
+        offset, count = int(opts.get("offset", 0)), int(opts.get("count", 100))
+        doc = {"accounts": _balance_body()["accounts"], "transactions": txns[offset:offset + count],
+               "total_transactions": len(txns)}
+        body = json.dumps(doc).encode("utf-8")
+        if app.state.faults.truncate_at:
+            body = body[:app.state.faults.truncate_at]  # the connection "drops" mid-body
+        # small chunks so clients really see the body arrive piecewise
+        return StreamingResponse(_chunked(body, 256), media_type="application/json")
+
+    @app.post("/_faults")
+    async def set_faults(body: Dict[str, Any]):
+        app.state.faults = Faults(**{**asdict(app.state.faults), **body})
+        app.state.rng = random.Random(app.state.faults.seed)
+        return asdict(app.state.faults)
+
+    @app.get("/_stats")
+    async def stats():
+        return {"calls": dict(app.state.calls), "faults": asdict(app.state.faults)}
+
+    return app
+
+app = create_app(Faults.from_env())
@@ -0,0 +1,216 @@
+# data_fetcher/testing/stub_ollama.py
+'''
+local stand-in for Ollama's /api/chat, for exercising ollama_transformer
+without a model. Instead of generating, it reads the SOURCE section of the
+user prompt (CSV, HTML table, XML records or JSON) and maps columns to the
+transformer schema by header name, so outputs are deterministic and line up
+with the input rows; mapping requests from llm_mapping are answered the same
+way from the column names. "stream": true is answered with NDJSON pieces,
+the injected latency spread across them. Latency and errors are injected with
+stub_bank.Faults (re-exported here for harnesses that only run this stub).
+
+Recorded responses of a real model can be replayed (create_app(replay=...)),
+so benchmarks see real outputs and token counters without a GPU; see
+testing/bench_transformer.py.
+
+  uvicorn data_fetcher.testing.stub_ollama:app --port 11434    (faults from STUB_* env vars)
+  OLLAMA_URL=http://127.0.0.1:11434/api/chat python ollama_run_test.py
+'''
+
+import asyncio
+import json
+import threading
+import random
+import re
+import time
+from collections import Counter
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from ..ollama_transformer import cache_key, read_records
+from .stub_bank import Faults, sample_latency
+
+# schema field -> header names (lower case) a source may use for it
+FIELD_ALIASES = {
+    "tx_id": ("tx_id", "txn_id", "id", "fitid", "ref_id"),
+    "date": ("date", "dt", "when", "posted", "dtposted", "txn_date", "bookingdate", "d"),
+    "amount": ("amount", "amt", "val", "value", "trnamt", "debit_amount"),
+    "currency": ("currency", "cur", "curr", "ccy", "curdef"),
+    "merchant": ("merchant", "vendor", "payee", "who", "name", "m"),
+    "description": ("description", "des", "desc", "narr.", "narr", "narrative", "memo", "ref", "details", "ustrd"),
+    "category": ("category", "cat", "txn_category"),
+}
+_ALIAS_TO_FIELD = {alias: f for f, aliases in FIELD_ALIASES.items() for alias in aliases}
+
+def _field_of(column: str) -> Optional[str]:
+    # flattened XML columns (BookgDt.Dt, Amt@Ccy) are known by their last name
+    return _ALIAS_TO_FIELD.get(re.split(r"[.@]", str(column).strip().lower())[-1])
+
+def map_record(rec: Dict[str, Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {f: None for f in FIELD_ALIASES}
+    for key, value in rec.items():
+        field = _field_of(key)
+        if field is None or out[field] is not None:
+            continue
+        if field == "amount":
+            try:
+                value = float(value) if value is not None else None
+            except (TypeError, ValueError):
+                value = None
+        out[field] = value
+    if out["date"] and len(out["date"]) >= 8 and out["date"][:8].isdigit():
+        d = out["date"]
+        out["date"] = f"{d[0:4]}-{d[4:6]}-{d[6:8]}"
+    return out
+
+def fake_mapping(user_prompt: str) -> Dict[str, Any]:
+    """Answer a llm_mapping request: candidates are the columns whose names are known aliases."""
+    m = re.search(r"^Columns: (.+)$", user_prompt, re.M)
+    columns = json.loads(m.group(1)) if m else []
+    fields = {}
+    for f in FIELD_ALIASES:
+        candidates = [c for c in columns if _field_of(c) == f]
+        fields[f] = {"candidates": candidates, "cast": "float" if f == "amount" else None, "default": None}
+    return {"fields": fields}
+
+def fake_transform(user_prompt: str) -> Dict[str, Any]:
+    source = user_prompt.split("SOURCE:\n", 1)[-1]
+    hint = re.search(r"^Account hint: (.+)$", user_prompt, re.M)
+    return {"account_id": hint.group(1).strip() if hint else None,
+            "transactions": [map_record(r) for r in read_records(source)[2]]}
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)  # rough: ~4 characters per token
+
+STREAM_PIECE = 16  # characters of content per streamed line (a few tokens)
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _final(model: Optional[str], prompt: str, content: str, started: float, message: Dict[str, str]) -> Dict[str, Any]:
+    """The closing object of a reply: the whole reply when not streaming, the done line when streaming."""
+    elapsed_ns = int((time.perf_counter() - started) * 1e9)
+    return {
+        "model": model,
+        "created_at": _now(),
+        "message": message,
+        "done": True,
+        "done_reason": "stop",
+        "total_duration": elapsed_ns,
+        "prompt_eval_count": _tokens(prompt),
+        "eval_count": _tokens(content),
+        "eval_duration": max(1, elapsed_ns),
+    }
+
+def load_recordings(path: str) -> Dict[str, Dict[str, Any]]:
+    """Recorded /api/chat responses by request key, from a file written by create_app(record=...)."""
+    out: Dict[str, Dict[str, Any]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                rec = json.loads(line)
+                out[rec["key"]] = rec["response"]
+    return out
+
+def create_app(
+    faults: Optional[Faults] = None,
+    replay: Optional[Dict[str, Dict[str, Any]]] = None,
+    upstream: Optional[str] = None,
+    record: Optional[str] = None,
+) -> FastAPI:
+    """
+    replay: recorded responses (load_recordings) returned verbatim for the same
+    model, format and messages; other requests are answered synthetically.
+    upstream/record: forward non-streaming requests to a real /api/chat URL
+    and append each exchange to the `record` file for later replay.
+    """
+    app = FastAPI(title="stub ollama")
+    record_lock = threading.Lock()
+    app.state.faults = faults or Faults()
+    app.state.rng = random.Random(app.state.faults.seed)
+    app.state.calls = Counter()
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+
+    @app.post("/api/chat")
+    async def chat(body: Dict[str, Any]):
+        f: Faults = app.state.faults
+        app.state.calls["chat"] += 1
+        app.state.in_flight += 1
+        app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+        started = time.perf_counter()
+        streaming = False
+        try:
+            delay = sample_latency(f.latency, app.state.rng)
+            if app.state.calls["chat"] <= f.fail_first or app.state.rng.random() < f.error_rate:
+                app.state.calls["errors"] += 1
+                if delay:
+                    await asyncio.sleep(delay)
+                return JSONResponse({"error": "injected fault"}, status_code=f.error_status)
+            if not body.get("stream") and (replay is not None or upstream):
+                key = cache_key(body.get("model"), body.get("format"), body.get("messages"))
+                if replay is not None and key in replay:
+                    app.state.calls["replayed"] += 1
+                    if delay:
+                        await asyncio.sleep(delay)
+                    return replay[key]
+                if upstream:
+                    async with httpx.AsyncClient(timeout=None) as client:
+                        r = await client.post(upstream, json=body)
+                    if r.status_code != 200:
+                        return JSONResponse(r.json(), status_code=r.status_code)
+                    response = r.json()
+                    if record:
+                        with record_lock, open(record, "a", encoding="utf-8") as f:
+                            f.write(json.dumps({"key": key, "response": response}, ensure_ascii=False) + "\n")
+                    app.state.calls["proxied"] += 1
+                    return response
+            user = next((m["content"] for m in reversed(body.get("messages", [])) if m.get("role") == "user"), "")
+            prompt = "".join(m.get("content", "") for m in body.get("messages", []))
+            schema = body.get("format") or {}
+            answer = fake_mapping(user) if "fields" in schema.get("properties", {}) else fake_transform(user)
+            content = json.dumps(answer, ensure_ascii=False)
+            if body.get("stream"):
+                streaming = True
+                return StreamingResponse(_stream(body.get("model"), content, prompt, delay, started),
+                                         media_type="application/x-ndjson")
+            if delay:
+                await asyncio.sleep(delay)
+            return _final(body.get("model"), prompt, content, started, {"role": "assistant", "content": content})
+        finally:
+            if not streaming:
+                app.state.in_flight -= 1
+
+    async def _stream(model: Optional[str], content: str, prompt: str, delay: float,
+                      started: float) -> AsyncIterator[bytes]:
+        # generation time is spread over the pieces, as a model emits tokens
+        try:
+            pieces = [content[i:i + STREAM_PIECE] for i in range(0, len(content), STREAM_PIECE)]
+            for piece in pieces:
+                if delay:
+                    await asyncio.sleep(delay / len(pieces))
+                line = {"model": model, "created_at": _now(), "message": {"role": "assistant", "content": piece},
+                        "done": False}
+                yield (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8")
+            final = _final(model, prompt, content, started, {"role": "assistant", "content": ""})
+            yield (json.dumps(final, ensure_ascii=False) + "\n").encode("utf-8")
+        finally:
+            app.state.in_flight -= 1
+
+    @app.post("/_faults")
+    async def set_faults(body: Dict[str, Any]):
+        app.state.faults = Faults(**{**asdict(app.state.faults), **body})
+        app.state.rng = random.Random(app.state.faults.seed)
+        return asdict(app.state.faults)
+
+    @app.get("/_stats")
+    async def stats():
+        return {"calls": dict(app.state.calls), "max_in_flight": app.state.max_in_flight,
+                "faults": asdict(app.state.faults)}
+
+    return app
+
+app = create_app(Faults.from_env())
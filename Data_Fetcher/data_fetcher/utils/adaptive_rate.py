@@ -0,0 +1,114 @@
+# data_fetcher/utils/adaptive_rate.py
+'''
+AIMD control of per-institution request rates. Connectors report every
+upstream outcome; clean responses raise an institution's rate additively,
+429s, timeouts and (optionally) slow responses cut it multiplicatively, and
+the new rate is pushed into the limiter that connectors draw tokens from.
+An institution starts at the rate its profile configures and may climb past
+it to find headroom, up to its profile's max_rate_per_sec (RATE_AIMD_MAX_RATE
+when it sets none).
+'''
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple, Union
+from config.settings import settings
+from .rate_limiter import RateLimiter, default_limiter, load_ceilings
+from .shared_rate_limiter import SharedRateLimiter
+
+@dataclass(frozen=True)
+class AIMDConfig:
+    min_rate: float = settings.RATE_AIMD_MIN_RATE
+    max_rate: float = settings.RATE_AIMD_MAX_RATE
+    increase: float = settings.RATE_AIMD_INCREASE        # rps per second of clean traffic
+    decrease: float = settings.RATE_AIMD_DECREASE        # multiplier on a congestion signal
+    latency_target: float = settings.RATE_AIMD_LATENCY_TARGET  # 0 disables the latency signal
+    cooldown: float = settings.RATE_AIMD_COOLDOWN         # one decrease per window, not one per 429
+    ewma_alpha: float = 0.2
+
+@dataclass
+class RateState:
+    rate: float
+    configured: float           # the profile's rate_per_sec, where AIMD starts
+    ceiling: float              # increases stop here
+    latency_ewma: float = 0.0
+    increases: int = 0
+    decreases: int = 0
+    last_decrease: float = float("-inf")
+
+class AIMDController:
+    def __init__(
+        self,
+        limiter: Union[RateLimiter, SharedRateLimiter] = default_limiter,
+        config: Optional[AIMDConfig] = None,
+        clock: Callable[[], float] = time.monotonic,
+        ceilings: Optional[Dict[str, float]] = None,
+    ):
+        self.limiter = limiter
+        self.config = config or AIMDConfig()
+        self.ceilings = dict(ceilings or {})  # per-institution max_rate_per_sec; others use config.max_rate
+        self._clock = clock
+        self._states: Dict[str, RateState] = {}
+
+    def state(self, key: str) -> RateState:
+        s = self._states.get(key)
+        if s is None:
+            rate = self.limiter.limits.get(key, self.limiter.default)[0]
+            s = self._states[key] = RateState(rate, rate, self.ceilings.get(key, self.config.max_rate))
+        return s
+
+    def on_success(self, key: str, latency: float) -> None:
+        s, c = self.state(key), self.config
+        s.latency_ewma = latency if not s.latency_ewma else (1 - c.ewma_alpha) * s.latency_ewma + c.ewma_alpha * latency
+        if c.latency_target and s.latency_ewma > c.latency_target:
+            self._decrease(key, s)
+            return
+        # +increase/rate per response adds ~`increase` rps per second at the current rate
+        if s.rate < s.ceiling:
+            self._apply(key, s, min(s.ceiling, s.rate + c.increase / s.rate))
+            s.increases += 1
+
+    def on_throttle(self, key: str, retry_after: Optional[float] = None) -> None:
+        """A 429 or a timeout: back off, and honour Retry-After before the next token."""
+        s = self.state(key)
+        self._decrease(key, s)
+        if retry_after:
+            self.limiter.pause(key, retry_after)
+
+    def reload_limits(self, limits: Dict[str, Tuple[float, int]], default: Tuple[float, int],
+                      ceilings: Optional[Dict[str, float]] = None) -> None:
+        """
+        Take over newly configured limits (and ceilings, when given). An
+        institution whose configured rate changed starts again from the new
+        one; the others keep their learned rate, within the new ceiling.
+        """
+        self.limiter.reload(limits, default)
+        if ceilings is not None:
+            self.ceilings = dict(ceilings)
+        for key, s in self._states.items():
+            configured = self.limiter.limits.get(key, default)[0]
+            s.ceiling = self.ceilings.get(key, self.config.max_rate)
+            if configured != s.configured:
+                s.configured = s.rate = configured
+            else:
+                s.rate = min(s.rate, s.ceiling)
+            self.limiter.set_rate(key, s.rate)
+
+    def rates(self) -> Dict[str, float]:
+        """Current rate (requests/s) per institution seen so far."""
+        return {k: round(s.rate, 3) for k, s in self._states.items()}
+
+    def _decrease(self, key: str, s: RateState) -> None:
+        now = self._clock()
+        if now - s.last_decrease < self.config.cooldown:
+            return
+        s.last_decrease = now
+        s.decreases += 1
+        self._apply(key, s, max(self.config.min_rate, s.rate * self.config.decrease))
+
+    def _apply(self, key: str, s: RateState, rate: float) -> None:
+        s.rate = rate
+        self.limiter.set_rate(key, rate)
+
+# Feeds default_limiter; shared by all connectors unless one is given its own.
+default_rate_control = AIMDController(ceilings=load_ceilings())
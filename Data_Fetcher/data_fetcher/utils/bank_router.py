@@ -1,13 +1,287 @@
 # data_fetcher/utils/bank_router.py
-import yaml
+'''
+institution registry built from config/bank_profiles.yaml. The file is
+validated once into typed profiles, each institution gets its connector and
+parser pipelines built up front, and the result is indexed by id, alias and
+routing number. A changed file (by mtime) is reloaded and swapped in whole,
+and its rate limits are handed to the rate controller; a bad edit is logged
+and the previous registry stays in service.
+'''
+
+import importlib
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import yaml
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
+from config.settings import settings
+from .adaptive_rate import AIMDController, default_rate_control
+from .error_handler import FetchError
+from .rate_limiter import DEFAULT_LIMIT, PROFILES_PATH
+
+log = logging.getLogger(__name__)
+
+# (kind, format) -> "module:function" under data_fetcher.parsers
+PARSERS = {
+    ("accounts", "json"): "json_parser:parse_json_accounts",
+    ("accounts", "html"): "html_parser:parse_html_accounts",
+    ("accounts", "camt"): "xml_ofx_parser:parse_camt_accounts",
+    ("accounts", "bankb_xml"): "xml_ofx_parser:parse_custom_bankB_statement",
+    ("transactions", "json"): "json_parser:parse_json_transactions",
+    ("transactions", "csv"): "csv_parser:parse_csv_transactions",
+    ("transactions", "html"): "html_parser:parse_html_transactions",
+    ("transactions", "ofx"): "xml_ofx_parser:parse_ofx_transactions",
+    ("transactions", "bankb_xml"): "xml_ofx_parser:parse_custom_bankB_statement",
+    ("transactions", "plaid"): "json_parser:parse_plaid_transactions",
+}
+CONNECTORS = {"plaid": "plaid_connector:PlaidConnector"}
+_ROUTING = re.compile(r"^\d{9}$")
+
+class RateLimitProfile(BaseModel):
+    rate_per_sec: float = Field(gt=0)
+    burst: int = Field(ge=1)
+    max_rate_per_sec: Optional[float] = Field(default=None, gt=0)  # adaptive rate ceiling
+
+    @model_validator(mode="after")
+    def _ceiling_above_rate(self) -> "RateLimitProfile":
+        if self.max_rate_per_sec is not None and self.max_rate_per_sec < self.rate_per_sec:
+            raise ValueError("max_rate_per_sec is below rate_per_sec")
+        return self
+
+class InstitutionProfile(BaseModel):
+    model_config = ConfigDict(extra="allow")  # unknown keys are kept for resolve() callers
+
+    id: str
+    name: str
+    aliases: List[str] = []
+    routing_numbers: List[str] = []
+    connector: Optional[str] = None
+    base_url: Optional[str] = None
+    formats: Dict[str, str] = {}  # kind ("accounts" | "transactions") -> format
+    rate_limit: Optional[RateLimitProfile] = None
+
+    @field_validator("routing_numbers")
+    @classmethod
+    def _aba(cls, v: List[str]) -> List[str]:
+        bad = [r for r in v if not _ROUTING.match(r)]
+        if bad:
+            raise ValueError(f"routing numbers must be 9 digits: {bad}")
+        return v
+
+    @field_validator("connector")
+    @classmethod
+    def _known_connector(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and v not in CONNECTORS:
+            raise ValueError(f"unknown connector {v!r}; expected one of {sorted(CONNECTORS)}")
+        return v
+
+    @field_validator("formats")
+    @classmethod
+    def _known_formats(cls, v: Dict[str, str]) -> Dict[str, str]:
+        unknown = [f"{k}:{f}" for k, f in v.items() if (k, f) not in PARSERS]
+        if unknown:
+            raise ValueError(f"no parser for {unknown}")
+        return v
+
+def _import(spec: str, package: str) -> Any:
+    module, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(f"..{package}.{module}", __package__), attr)
+
+def _unavailable(kind: str, fmt: str, reason: str) -> Callable[[Any], Dict]:
+    def parse(_payload: Any) -> Dict:
+        raise FetchError("PARSER_UNAVAILABLE", f"{kind}/{fmt} parser unavailable: {reason}", 500)
+    return parse
+
+@dataclass(frozen=True)
+class Pipeline:
+    """Parser plus canonical transform for one (kind, format), resolved at load time."""
+    kind: str
+    format: str
+    parse: Callable[[Any], Dict]
+    transform: Callable[[Dict], Dict]
+
+    def __call__(self, payload: Any) -> Dict:
+        return self.transform(self.parse(payload))
+
+def _build_pipeline(kind: str, fmt: str) -> Pipeline:
+    from ..transformers.finance import to_canonical_accounts, to_canonical_transactions
+    try:
+        parse = _import(PARSERS[(kind, fmt)], "parsers")
+    except ImportError as e:
+        # an optional parser dependency (e.g. bs4 for HTML) is missing; fail on use, not on load
+        log.warning("parser for %s/%s not available: %s", kind, fmt, e)
+        parse = _unavailable(kind, fmt, str(e))
+    transform = to_canonical_accounts if kind == "accounts" else to_canonical_transactions
+    return Pipeline(kind, fmt, parse, transform)
+
+@dataclass(frozen=True)
+class Institution:
+    profile: InstitutionProfile
+    connector: Optional[Any]           # ConnectorBase, ready to use
+    pipelines: Dict[str, Pipeline]     # by kind
+
+    @property
+    def id(self) -> str:
+        return self.profile.id
 
-_PROFILE = yaml.safe_load((Path(__file__).parents[2] / "config" / "bank_profiles.yaml").read_text())
+    def parse(self, kind: str, payload: Any) -> Dict:
+        """Raw bank payload -> canonical {"accounts"|"transactions": [...]}."""
+        pipeline = self.pipelines.get(kind)
+        if pipeline is None:
+            raise FetchError("NO_PIPELINE", f"{self.id} has no {kind} format configured", 400)
+        return pipeline(payload)
+
+def _build_institution(profile: InstitutionProfile) -> Institution:
+    connector = None
+    if profile.connector:
+        if not profile.base_url:
+            raise ValueError(f"{profile.id}: connector {profile.connector!r} needs a base_url")
+        cls = _import(CONNECTORS[profile.connector], "connectors")
+        connector = cls(profile.base_url, institution_id=profile.id)
+    pipelines = {kind: _build_pipeline(kind, fmt) for kind, fmt in profile.formats.items()}
+    return Institution(profile, connector, pipelines)
+
+def _norm_alias(alias: str) -> str:
+    return " ".join(alias.split()).casefold()
+
+class _Index:
+    """One immutable generation of the registry; swapped in as a whole."""
+    __slots__ = ("by_id", "by_alias", "by_routing")
+
+    def __init__(self, institutions: Dict[str, Institution]):
+        self.by_id = institutions
+        self.by_alias: Dict[str, Institution] = {}
+        self.by_routing: Dict[str, Institution] = {}
+        for inst in institutions.values():
+            for alias in [inst.id, inst.profile.name, *inst.profile.aliases]:
+                self._put(self.by_alias, _norm_alias(alias), inst, "alias")
+            for rn in inst.profile.routing_numbers:
+                self._put(self.by_routing, rn, inst, "routing number")
+
+    @staticmethod
+    def _put(index: Dict[str, Institution], key: str, inst: Institution, what: str) -> None:
+        other = index.get(key)
+        if other is not None and other is not inst:
+            raise ValueError(f"{what} {key!r} is claimed by both {other.id} and {inst.id}")
+        index[key] = inst
+
+def _rate_limits(index: _Index, default: Optional[RateLimitProfile]) -> Tuple[Dict[str, Tuple[float, int]], Tuple[float, int]]:
+    """(per-institution limits, default) from validated profiles, shaped like rate_limiter.load_limits."""
+    limits = {inst.id: (rl.rate_per_sec, rl.burst) for inst in index.by_id.values() if (rl := inst.profile.rate_limit)}
+    return limits, ((default.rate_per_sec, default.burst) if default else DEFAULT_LIMIT)
+
+def _ceilings(index: _Index) -> Dict[str, float]:
+    return {inst.id: rl.max_rate_per_sec for inst in index.by_id.values()
+            if (rl := inst.profile.rate_limit) and rl.max_rate_per_sec is not None}
+
+class InstitutionRegistry:
+    def __init__(
+        self,
+        path: Path = PROFILES_PATH,
+        check_interval: float = settings.BANK_PROFILES_CHECK_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+        rate_control: Optional[AIMDController] = None,
+    ):
+        self.path = Path(path)
+        self._rate_control = rate_control  # gets the file's rate limits on every reload
+        self._check_interval, self._clock = check_interval, clock
+        self._checked_at = clock()
+        self._ident: Optional[Tuple[int, int, int]] = None
+        self._index = _Index({})
+        self._reload_lock = threading.Lock()
+        self.reloads = 0
+        self.refresh(force=True)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload if the file changed since the last load; returns True when it did."""
+        now = self._clock()
+        if not force and now - self._checked_at < self._check_interval:
+            return False
+        if not self._reload_lock.acquire(blocking=force):
+            return False  # another thread is already reloading; keep serving the current index
+        try:
+            self._checked_at = now
+            try:
+                st = os.stat(self.path)
+                ident = (st.st_ino, st.st_mtime_ns, st.st_size)
+            except FileNotFoundError:
+                ident = (0, 0, 0)
+            if ident == self._ident:
+                return False
+            try:
+                index, default_limit = self._load()
+            except Exception:
+                if self._ident is None:
+                    raise
+                log.exception("invalid %s; keeping the previous institution registry", self.path)
+                self._ident = ident  # do not retry the same broken file on every lookup
+                return False
+            self._index, self._ident = index, ident
+            self.reloads += 1
+            if self._rate_control is not None:
+                self._rate_control.reload_limits(*_rate_limits(index, default_limit), ceilings=_ceilings(index))
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def _load(self) -> Tuple[_Index, Optional[RateLimitProfile]]:
+        raw = (yaml.safe_load(self.path.read_text()) if self.path.exists() else None) or {}
+        rl = (raw.get("defaults") or {}).get("rate_limit")
+        try:
+            default_limit = RateLimitProfile.model_validate(rl) if rl else None
+        except ValidationError as e:
+            raise ValueError(f"defaults.rate_limit in {self.path}: {e}") from e
+        old = self._index.by_id
+        built: Dict[str, Institution] = {}
+        for inst_id, body in (raw.get("institutions") or {}).items():
+            try:
+                profile = InstitutionProfile.model_validate({"id": inst_id, **(body or {})})
+            except ValidationError as e:
+                raise ValueError(f"institution {inst_id!r} in {self.path}: {e}") from e
+            prev = old.get(inst_id)
+            # unchanged profiles keep their connector (and its caches) across reloads
+            built[inst_id] = prev if prev is not None and prev.profile == profile else _build_institution(profile)
+        return _Index(built), default_limit
+
+    def get(self, institution_id: str) -> Optional[Institution]:
+        self.refresh()
+        return self._index.by_id.get(institution_id)
+
+    def by_alias(self, alias: str) -> Optional[Institution]:
+        self.refresh()
+        return self._index.by_alias.get(_norm_alias(alias))
+
+    def by_routing(self, routing_number: str) -> Optional[Institution]:
+        self.refresh()
+        return self._index.by_routing.get(routing_number.strip())
+
+    def lookup(self, key: str) -> Optional[Institution]:
+        """Match `key` as an id, then a routing number, then an alias."""
+        self.refresh()
+        index = self._index  # one generation for all three probes
+        return index.by_id.get(key) or index.by_routing.get(key.strip()) or index.by_alias.get(_norm_alias(key))
+
+    def __iter__(self) -> Iterator[Institution]:
+        self.refresh()
+        return iter(list(self._index.by_id.values()))
+
+    def __len__(self) -> int:
+        return len(self._index.by_id)
+
+registry = InstitutionRegistry(rate_control=default_rate_control)
 
 def resolve(institution_id: str) -> dict:
-    inst = _PROFILE["institutions"].get(institution_id)
+    """
+    The institution's entry as written in the YAML: no defaults filled in and
+    no `id` key. Exact ids only; registry.lookup() also matches aliases and
+    routing numbers.
+    """
+    inst = registry.get(institution_id)
     if not inst:
         raise ValueError(f"Unknown institution_id: {institution_id}")
-    return inst
-
-
+    return inst.profile.model_dump(exclude={"id"}, exclude_unset=True)
@@ -1,15 +1,72 @@
 # data_fetcher/utils/error_handler.py
-from typing import Dict
+from typing import Dict, Optional
+import httpx
 
 class FetchError(Exception):
-    def __init__(self, code: str, message: str, status: int = 502, meta: Dict | None = None):
+    def __init__(
+        self,
+        code: str,
+        message: str,
+        status: int = 502,
+        meta: Dict | None = None,
+        retryable: bool = False,
+        retry_after: Optional[float] = None,
+    ):
         super().__init__(message)
         self.code, self.status, self.meta = code, status, meta or {}
+        self.retryable, self.retry_after = retryable, retry_after
+
+class RowValueError(FetchError, ValueError):
+    """A row value that does not convert; still a ValueError for callers of strict parsing."""
+
+def _retry_after(r: httpx.Response) -> Optional[float]:
+    value = r.headers.get("Retry-After")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None  # HTTP-date form; let the backoff decide
+
+def _upstream_code(r: httpx.Response) -> Optional[str]:
+    """Plaid-style `error_code` from a JSON error body, if there is one."""
+    try:
+        body = r.json()
+    except Exception:
+        return None
+    return body.get("error_code") if isinstance(body, dict) else None
 
 def map_exception(e: Exception) -> FetchError:
     if isinstance(e, FetchError):
         return e
-    # add mappings for httpx.TimeoutException, etc.
+    if isinstance(e, httpx.TimeoutException):
+        return FetchError("BANK_TIMEOUT", str(e) or "upstream timed out", 504, retryable=True)
+    if isinstance(e, httpx.HTTPStatusError):
+        r = e.response
+        meta = {"upstream_status": r.status_code}
+        code = _upstream_code(r)
+        if code:
+            meta["upstream_code"] = code
+        if r.status_code == 429:
+            return FetchError("RATE_LIMITED", "upstream rate limited", 429, meta, retryable=True,
+                              retry_after=_retry_after(r))
+        if r.status_code in (500, 502, 503, 504):
+            return FetchError("BANK_UNAVAILABLE", f"upstream {r.status_code}", 502, meta, retryable=True,
+                              retry_after=_retry_after(r))
+        if r.status_code in (401, 403):
+            return FetchError("BANK_AUTH_FAILED", f"upstream {r.status_code}", r.status_code, meta)
+        return FetchError("BANK_REJECTED", f"upstream {r.status_code}", r.status_code, meta)
+    if isinstance(e, httpx.TransportError):
+        # connect/read/protocol failures: the request may not have reached the bank
+        return FetchError("BANK_UNREACHABLE", str(e) or type(e).__name__, 503, retryable=True)
+    if isinstance(e, ValueError):
+        return FetchError("BANK_BAD_RESPONSE", str(e), 502)
     return FetchError("FETCH_UNEXPECTED", str(e), 502)
 
-
+def map_row_exception(e: Exception) -> FetchError:
+    """Classify a failure to parse one row/element of an otherwise readable file."""
+    if isinstance(e, FetchError):
+        return e
+    if isinstance(e, KeyError):
+        return FetchError("ROW_MISSING_FIELD", f"missing field {e.args[0]!r}", 422, {"field": e.args[0]})
+    if isinstance(e, (ValueError, TypeError, AttributeError, IndexError)):
+        return FetchError("ROW_MALFORMED", str(e), 422)
+    return FetchError("ROW_UNEXPECTED", f"{type(e).__name__}: {e}", 422)
@@ -1,28 +1,167 @@
 # data_fetcher/utils/rate_limiter.py
+import asyncio
 import time
-from collections import defaultdict
-from typing import Callable
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, Optional, Tuple
+import yaml
+from config.settings import settings
+from .error_handler import FetchError
+
+PROFILES_PATH = Path(settings.BANK_PROFILES_PATH or Path(__file__).parents[2] / "config" / "bank_profiles.yaml")
+DEFAULT_LIMIT = (5.0, 10)  # 5 rps, burst 10
+
+def load_limits(path: Path = PROFILES_PATH) -> Tuple[Dict[str, Tuple[float, int]], Tuple[float, int]]:
+    """(per-institution limits, default) from `institutions.<id>.rate_limit` and `defaults.rate_limit`."""
+    profile = (yaml.safe_load(path.read_text()) if path.exists() else None) or {}
+    d = ((profile.get("defaults") or {}).get("rate_limit")) or {}
+    default = (float(d.get("rate_per_sec", DEFAULT_LIMIT[0])), int(d.get("burst", DEFAULT_LIMIT[1])))
+    limits = {}
+    for inst_id, inst in (profile.get("institutions") or {}).items():
+        rl = (inst or {}).get("rate_limit")
+        if rl:
+            limits[inst_id] = (float(rl.get("rate_per_sec", default[0])), int(rl.get("burst", default[1])))
+    return limits, default
+
+def load_ceilings(path: Path = PROFILES_PATH) -> Dict[str, float]:
+    """Adaptive-rate ceilings from `institutions.<id>.rate_limit.max_rate_per_sec`, where set."""
+    profile = (yaml.safe_load(path.read_text()) if path.exists() else None) or {}
+    return {inst_id: float(rl["max_rate_per_sec"]) for inst_id, inst in (profile.get("institutions") or {}).items()
+            if (rl := (inst or {}).get("rate_limit")) and rl.get("max_rate_per_sec")}
 
 class TokenBucket:
-    def __init__(self, rate_per_sec: float, capacity: int):
+    def __init__(self, rate_per_sec: float, capacity: int, clock: Callable[[], float] = time.monotonic):
         self.rate, self.capacity = rate_per_sec, capacity
-        self.tokens, self.last = capacity, time.time()
+        self._clock = clock
+        self.tokens, self.last = float(capacity), clock()
+        self.last_used = self.last
+        self.waiters: Deque["asyncio.Future[None]"] = deque()
 
-    def allow(self) -> bool:
-        now = time.time()
+    def _refill(self) -> float:
+        now = self._clock()
         self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
         self.last = now
+        return now
+
+    def allow(self) -> bool:
+        self.last_used = self._refill()
         if self.tokens >= 1:
             self.tokens -= 1
             return True
         return False
 
+    def time_until_token(self) -> float:
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def set_rate(self, rate_per_sec: float, capacity: Optional[int] = None) -> None:
+        self._refill()  # tokens earned so far are kept at the old rate
+        self.rate = rate_per_sec
+        if capacity is not None:
+            self.capacity = capacity
+            self.tokens = min(self.tokens, capacity)
+
+    def idle(self, idle_ttl: float) -> bool:
+        """No waiters, unused for idle_ttl and refilled: dropping it loses nothing."""
+        now = self._refill()
+        return not self.waiters and now - self.last_used >= idle_ttl and self.tokens >= self.capacity
+
 class RateLimiter:
-    def __init__(self):
-        self.buckets = defaultdict(lambda: TokenBucket(5, 10))  # default 5 rps, burst 10
+    """
+    Per-key token buckets. acquire() waits for a token (FIFO per key, monotonic
+    clock) so callers are smoothed instead of failed; guard() keeps the old
+    fail-fast behaviour for synchronous callers. Per-key rates come from
+    `limits` (see from_profiles); unused buckets are evicted after idle_ttl.
+    """
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[float, int]]] = None,
+        default: Tuple[float, int] = DEFAULT_LIMIT,
+        idle_ttl: float = settings.RATE_LIMIT_IDLE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limits = dict(limits or {})
+        self.default = default
+        self.idle_ttl = idle_ttl
+        self._clock = clock
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._swept_at = clock()
+
+    @classmethod
+    def from_profiles(cls, path: Path = PROFILES_PATH, **kwargs) -> "RateLimiter":
+        limits, default = load_limits(path)
+        return cls(limits, default, **kwargs)
+
+    def bucket(self, key: str) -> TokenBucket:
+        b = self.buckets.get(key)
+        if b is None:
+            self._maybe_evict()
+            rate, burst = self.limits.get(key, self.default)
+            b = self.buckets[key] = TokenBucket(rate, burst, self._clock)
+        return b
+
+    def reload(self, limits: Dict[str, Tuple[float, int]], default: Tuple[float, int]) -> None:
+        """New configured limits (e.g. bank_profiles.yaml changed); live buckets take them over in place."""
+        self.limits, self.default = dict(limits), default
+        for key, bucket in self.buckets.items():
+            bucket.set_rate(*self.limits.get(key, default))
+
+    def set_rate(self, key: str, rate_per_sec: float) -> None:
+        """Change one key's rate in place (burst unchanged); used by adaptive rate control."""
+        self.limits[key] = (rate_per_sec, self.limits.get(key, self.default)[1])
+        if key in self.buckets:
+            self.buckets[key].set_rate(rate_per_sec)
+
+    def pause(self, key: str, seconds: float) -> None:
+        """Hand out no tokens for `key` for about `seconds`, e.g. after a Retry-After."""
+        bucket = self.bucket(key)
+        bucket._refill()
+        bucket.tokens = min(bucket.tokens, 1 - seconds * bucket.rate)
 
     def guard(self, key: str, fn: Callable, *args, **kwargs):
-        if not self.buckets[key].allow():
-            from .error_handler import FetchError
-            raise FetchError("RATE_LIMITED", f"rate limited for {key}", 429)
+        bucket = self.bucket(key)
+        if not bucket.allow():
+            raise FetchError("RATE_LIMITED", f"rate limited for {key}", 429, retryable=True,
+                             retry_after=bucket.time_until_token())
         return fn(*args, **kwargs)
+
+    async def acquire(self, key: str) -> None:
+        """Wait for a token for `key`; waiters are served strictly in arrival order."""
+        bucket = self.bucket(key)
+        if not bucket.waiters and bucket.allow():
+            return
+        fut = asyncio.get_running_loop().create_future()
+        bucket.waiters.append(fut)
+        try:
+            if bucket.waiters[0] is not fut:
+                await fut  # woken by the previous head once it got its token
+            while not bucket.allow():
+                await asyncio.sleep(bucket.time_until_token())
+        finally:
+            was_head = bucket.waiters[0] is fut
+            bucket.waiters.remove(fut)
+            if was_head and bucket.waiters and not bucket.waiters[0].done():
+                bucket.waiters[0].set_result(None)
+
+    def evict_idle(self) -> int:
+        """Drop buckets nobody used for idle_ttl; returns how many were removed."""
+        idle = [k for k, b in self.buckets.items() if b.idle(self.idle_ttl)]
+        for k in idle:
+            del self.buckets[k]
+        self._swept_at = self._clock()
+        return len(idle)
+
+    def _maybe_evict(self) -> None:
+        # Amortized: sweep at most twice per idle_ttl, when a new bucket is created.
+        if self._clock() - self._swept_at >= self.idle_ttl / 2:
+            self.evict_idle()
+
+def _make_limiter():
+    if settings.SHARED_RATE_LIMIT_PATH:
+        # one budget per bank for every worker on the host
+        from .shared_rate_limiter import MmapGCRABackend, SharedRateLimiter
+        return SharedRateLimiter.from_profiles(MmapGCRABackend(settings.SHARED_RATE_LIMIT_PATH))
+    return RateLimiter.from_profiles()
+
+# Process-wide limiter shared by connectors and batch fan-out.
+default_limiter = _make_limiter()
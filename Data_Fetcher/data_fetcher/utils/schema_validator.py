@@ -1,5 +1,9 @@
-from typing import Any, Dict, List
-from pydantic import BaseModel, Field, ValidationError
+import random
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from typing_extensions import Annotated, TypedDict
 
 class AccountBalance(BaseModel):
     account_id: str
@@ -17,3 +21,110 @@ def validate_balance(payload: Dict[str, Any]) -> Dict[str, Any]:
     except ValidationError as e:
         # Map to your platform's error format or raise upstream
         raise ValueError(f"Schema validation failed: {e}") from e
+
+# Canonical v1 shapes (sample_data/README.md). TypedDicts are validated by
+# pydantic-core without building model instances, which keeps batch validation
+# cheap; output rows are plain dicts, as the transformers produce.
+Currency = Annotated[str, Field(pattern=r"^[A-Z]{3}$")]
+IsoDate = Annotated[str, Field(pattern=r"^\d{4}-\d{2}-\d{2}$")]
+
+class CanonicalAccount(TypedDict):
+    account_id: str
+    type: Optional[Literal["depository", "credit", "loan", "investment", "other"]]
+    subtype: Optional[str]
+    mask: Optional[str]
+    currency: Currency
+    current: Optional[float]
+    available: Optional[float]
+    name: Optional[str]
+
+class CanonicalTransaction(TypedDict):
+    txn_id: Optional[str]       # HTML/OFX statements carry no id
+    account_id: Optional[str]
+    date: IsoDate
+    amount: float
+    currency: Currency
+    merchant_raw: Optional[str]
+    merchant_norm: Optional[str]
+    mcc: Optional[str]
+    category: Optional[str]
+    meta: Dict[str, Any]
+
+_SCHEMAS = {"accounts": CanonicalAccount, "transactions": CanonicalTransaction}
+
+@lru_cache(maxsize=None)
+def _batch_adapter(kind: str) -> TypeAdapter:
+    """Built once per kind; TypeAdapter construction is the expensive part."""
+    return TypeAdapter(List[_SCHEMAS[kind]])
+
+@dataclass
+class RowError:
+    index: int        # position of the row in the submitted batch
+    field: str        # dotted path inside the row, "" for the row itself
+    type: str         # pydantic error type, e.g. "float_parsing", "missing"
+    message: str
+    value: Any = None
+
+@dataclass
+class BatchValidation:
+    kind: str
+    total: int
+    checked: int                               # rows actually validated (< total when sampling)
+    valid: List[Dict[str, Any]] = field(default_factory=list)
+    errors: List[RowError] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @property
+    def invalid_rows(self) -> List[int]:
+        return sorted({e.index for e in self.errors})
+
+def validate_batch(
+    kind: str,
+    rows: List[Dict[str, Any]],
+    sample_rate: float = 1.0,
+    seed: Optional[int] = None,
+) -> BatchValidation:
+    """
+    Validate canonical "accounts" or "transactions" rows in one call.
+
+    With sample_rate < 1 (trusted high-volume feeds) only that share of rows is
+    checked; unchecked rows pass through as-is. `valid` holds every row that
+    was not rejected, in input order; `errors` has one entry per failing field.
+    """
+    adapter = _batch_adapter(kind)
+    n = len(rows)
+    if sample_rate >= 1.0:
+        picked = None
+        subset = rows
+    else:
+        k = min(n, max(1, round(n * sample_rate))) if n else 0
+        picked = sorted(random.Random(seed).sample(range(n), k))
+        subset = [rows[i] for i in picked]
+    result = BatchValidation(kind, n, len(subset))
+    try:
+        checked = adapter.validate_python(subset)
+    except ValidationError as e:
+        bad = set()
+        for err in e.errors(include_url=False):
+            pos, *loc = err["loc"]
+            index = picked[pos] if picked is not None else pos
+            bad.add(pos)
+            result.errors.append(RowError(index, ".".join(map(str, loc)), err["type"], err["msg"], err.get("input")))
+        good = [r for i, r in enumerate(subset) if i not in bad]
+        checked = adapter.validate_python(good)  # the rest validates; this yields their coerced form
+        rejected = {picked[i] if picked is not None else i for i in bad}
+    else:
+        rejected = set()
+    if picked is None:
+        result.valid = checked
+    else:
+        coerced = dict(zip((i for i in picked if i not in rejected), checked))
+        result.valid = [coerced.get(i, r) for i, r in enumerate(rows) if i not in rejected]
+    return result
+
+def validate_canonical(payload: Dict[str, Any], sample_rate: float = 1.0) -> Dict[str, BatchValidation]:
+    """validate_batch for each of "accounts"/"transactions" present in a transformer output."""
+    return {kind: validate_batch(kind, payload[kind], sample_rate) for kind in _SCHEMAS if kind in payload}
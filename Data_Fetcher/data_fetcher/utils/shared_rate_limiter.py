@@ -0,0 +1,205 @@
+# data_fetcher/utils/shared_rate_limiter.py
+'''
+rate limiting shared by every worker process, so N workers together stay
+within one bank's budget instead of N times it. Uses GCRA: the whole state
+per key is one "theoretical arrival time", updated under a lock by whichever
+process asks next. State lives in an mmap'd file on the host (default) or,
+across hosts, in any Redis-protocol server via a Lua script.
+'''
+
+import asyncio
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Protocol, Tuple
+from .error_handler import FetchError
+from .rate_limiter import DEFAULT_LIMIT, PROFILES_PATH, load_limits
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; the Redis backend still works there
+    fcntl = None
+
+def gcra(tat: float, now: float, interval: float, burst: int) -> Tuple[float, float]:
+    """
+    One GCRA step. Returns (new_tat, wait): wait == 0 means the request is
+    admitted and new_tat must be stored; otherwise retry in `wait` seconds
+    and keep the old state.
+    """
+    # clamp stale or foreign state (clock reset, rate raised) to a full burst
+    tat = min(max(tat, now), now + burst * interval)
+    new_tat = tat + interval
+    allow_at = new_tat - burst * interval
+    if now < allow_at:
+        return tat, allow_at - now
+    return new_tat, 0.0
+
+class GCRABackend(Protocol):
+    def take(self, key: str, interval: float, burst: int) -> float: ...
+
+# Layout (little endian): header magic "DFGC", format u32, slot count u32 (power
+# of two), then slots of key hash u64 (0 = empty) + tat f64. Linear probing; a
+# slot whose tat has passed holds no information and may be reused by any key.
+MAGIC = b"DFGC"
+FORMAT = 1
+_HEADER = struct.Struct("<4sII")
+_SLOT = struct.Struct("<Qd")
+
+class MmapGCRABackend:
+    """
+    GCRA state in a small file every process on the host maps (put it on
+    /dev/shm). Updates are serialized with flock plus a thread lock; a take()
+    is a few microseconds. Times are CLOCK_MONOTONIC, which is host-wide.
+    """
+    def __init__(self, path: str, slots: int = 4096, clock: Callable[[], float] = time.monotonic):
+        if fcntl is None:
+            raise RuntimeError("MmapGCRABackend needs fcntl (POSIX); use RedisGCRABackend instead")
+        n = 1
+        while n < slots:
+            n *= 2
+        self.path, self._clock = path, clock
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, _HEADER.size + _SLOT.size * n)
+                os.pwrite(self._fd, _HEADER.pack(MAGIC, FORMAT, n), 0)
+            magic, fmt, n = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        if magic != MAGIC or fmt != FORMAT:
+            os.close(self._fd)
+            raise ValueError(f"{path} is not a rate-limit state file")
+        self.slots, self._mask = n, n - 1
+        self._mm = mmap.mmap(self._fd, _HEADER.size + _SLOT.size * n)
+
+    def take(self, key: str, interval: float, burst: int) -> float:
+        h = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") or 1
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                now = self._clock()
+                slot, tat = self._find(h, now)
+                tat, wait = gcra(tat, now, interval, burst)
+                if not wait:
+                    _SLOT.pack_into(self._mm, _HEADER.size + slot * _SLOT.size, h, tat)
+                return wait
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _find(self, h: int, now: float) -> Tuple[int, float]:
+        """Slot holding `h` (or where to put it) and its stored tat."""
+        i, reuse = h & self._mask, None
+        for _ in range(self.slots):
+            kh, tat = _SLOT.unpack_from(self._mm, _HEADER.size + i * _SLOT.size)
+            if kh == h:
+                return i, tat
+            if kh == 0:
+                break
+            if reuse is None and tat <= now:
+                reuse = i
+            i = (i + 1) & self._mask
+        else:
+            # every slot is live; overwrite the home slot rather than fail the caller
+            i = h & self._mask
+        return (i if reuse is None else reuse), now
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+# KEYS[1] = bucket key, ARGV = interval, burst. Uses the server clock so every
+# client agrees on "now"; the reply is a string because Lua numbers come back
+# truncated to integers.
+GCRA_LUA = """
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+tat = math.min(math.max(tat, now), now + burst * interval)
+local new_tat = tat + interval
+local allow_at = new_tat - burst * interval
+if now < allow_at then
+  return tostring(allow_at - now)
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000) + 1)
+return '0'
+"""
+
+class RedisGCRABackend:
+    """
+    GCRA state in a Redis-protocol server, for workers on several hosts.
+    `client` is anything with redis-py's eval(script, numkeys, *keys_and_args);
+    redis is not a dependency of this package.
+    """
+    def __init__(self, client: Any, prefix: str = "df:rl:"):
+        self.client, self.prefix = client, prefix
+
+    def take(self, key: str, interval: float, burst: int) -> float:
+        reply = self.client.eval(GCRA_LUA, 1, self.prefix + key, repr(interval), burst)
+        return float(reply.decode() if isinstance(reply, bytes) else reply)
+
+class SharedRateLimiter:
+    """
+    Same interface as RateLimiter (acquire/guard), but the budget is enforced
+    across processes by `backend`. Waiting is a sleep-and-retry, so ordering
+    between processes is not strictly FIFO.
+    """
+    def __init__(
+        self,
+        backend: GCRABackend,
+        limits: Optional[Dict[str, Tuple[float, int]]] = None,
+        default: Tuple[float, int] = DEFAULT_LIMIT,
+    ):
+        self.backend = backend
+        self.limits = dict(limits or {})
+        self.default = default
+        self._paused_until: Dict[str, float] = {}
+
+    @classmethod
+    def from_profiles(cls, backend: GCRABackend, path: Path = PROFILES_PATH) -> "SharedRateLimiter":
+        limits, default = load_limits(path)
+        return cls(backend, limits, default)
+
+    def reload(self, limits: Dict[str, Tuple[float, int]], default: Tuple[float, int]) -> None:
+        """New configured limits for this process; the shared state adapts on the next take."""
+        self.limits, self.default = dict(limits), default
+
+    def set_rate(self, key: str, rate_per_sec: float) -> None:
+        """This process's rate for `key`; the shared state adapts on the next take."""
+        self.limits[key] = (rate_per_sec, self.limits.get(key, self.default)[1])
+
+    def pause(self, key: str, seconds: float) -> None:
+        """Stop taking tokens for `key` in this process for `seconds`."""
+        until = time.monotonic() + seconds
+        self._paused_until[key] = max(until, self._paused_until.get(key, 0.0))
+
+    def try_acquire(self, key: str) -> float:
+        """Take a token if one is free; returns 0.0, or the seconds until one will be."""
+        paused = self._paused_until.get(key)
+        if paused is not None:
+            left = paused - time.monotonic()
+            if left > 0:
+                return left
+            del self._paused_until[key]
+        rate, burst = self.limits.get(key, self.default)
+        return self.backend.take(key, 1.0 / rate, burst)
+
+    async def acquire(self, key: str) -> None:
+        while True:
+            wait = self.try_acquire(key)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def guard(self, key: str, fn: Callable, *args, **kwargs):
+        wait = self.try_acquire(key)
+        if wait:
+            raise FetchError("RATE_LIMITED", f"rate limited for {key}", 429, retryable=True, retry_after=wait)
+        return fn(*args, **kwargs)
@@ -0,0 +1,28 @@
+# data_fetcher/utils/singleflight.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    """
+    Collapses concurrent calls that share a key into one in-flight task: the
+    first caller starts it, later callers await the same result or exception.
+    Cancelling one waiter does not cancel the shared task.
+    """
+    def __init__(self):
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self.calls = 0
+        self.shared = 0  # calls served by joining a flight another caller started
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(fn())
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda _f: self._inflight.pop(key, None))
+        else:
+            self.shared += 1
+        return await asyncio.shield(fut)
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
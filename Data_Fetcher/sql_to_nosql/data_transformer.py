@@ -1,7 +1,10 @@
+from __future__ import annotations
 import re
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
-import pandas as pd
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd  # only the DataFrame helpers need pandas; mapping itself is pure Python
 
 # --- Core config structures (from dict, not YAML) ---
 @dataclass
@@ -74,6 +77,7 @@ def dataframe_to_docs(df: pd.DataFrame, cfg: MappingConfig) -> List[Dict[str, An
 
 def select_and_rename_columns(df: pd.DataFrame, cfg: MappingConfig) -> pd.DataFrame:
     # For NoSQL->SQL direction (pick/rename columns deterministically)
+    import pandas as pd
     if df.empty: return df
     out = pd.DataFrame()
     for tgt, fr in cfg.fields.items():
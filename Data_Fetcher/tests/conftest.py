@@ -0,0 +1,50 @@
+import sys
+from pathlib import Path
+
+# Data_Fetcher root: the package imports config.settings and sql_to_nosql top-level
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+import pytest
+
+from data_fetcher import ollama_transformer as ot
+from data_fetcher.connectors.http_pool import ClientPool
+from data_fetcher.connectors.plaid_connector import PlaidConnector
+from data_fetcher.connectors.resilience import Backoff, Resilience
+from data_fetcher.testing import stub_ollama
+from data_fetcher.testing.server import serve_app
+from data_fetcher.testing.stub_bank import Faults, create_app
+from data_fetcher.utils.adaptive_rate import AIMDController
+from data_fetcher.utils.rate_limiter import RateLimiter
+from data_fetcher.utils.singleflight import SingleFlight
+
+UNLIMITED = (1e9, 1_000_000)
+
+@pytest.fixture
+def stub_bank():
+    """create(**faults) -> (stub bank app, connector factory); connectors talk to the app in-process."""
+    def create(**faults):
+        app = create_app(Faults(**faults))
+
+        def connector(**kwargs) -> PlaidConnector:
+            kwargs.setdefault("resilience", Resilience(backoff=Backoff(base=0.001, cap=0.005)))
+            kwargs.setdefault("rate_control", AIMDController(RateLimiter(default=UNLIMITED)))
+            kwargs.setdefault("singleflight", SingleFlight())
+            pool = ClientPool(transport_factory=lambda _: httpx.ASGITransport(app=app))
+            return PlaidConnector("http://stub-bank", pool=pool, institution_id="stub", **kwargs)
+        return app, connector
+    return create
+
+@pytest.fixture(scope="session")
+def stub_model_url():
+    url, server, _ = serve_app(stub_ollama.create_app())
+    yield url + "/api/chat"
+    server.should_exit = True
+
+@pytest.fixture
+def stub_model(stub_model_url, monkeypatch):
+    """ollama_transformer pointed at the synthetic stub model, with no result cache."""
+    monkeypatch.setattr(ot, "OLLAMA_URL", stub_model_url)
+    monkeypatch.setattr(ot, "_cache", None)
+    monkeypatch.setattr(ot, "OLLAMA_CACHE_PATH", "")
+    return stub_model_url
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from data_fetcher.connectors.connector_base import RequestCtx
+from data_fetcher.utils.adaptive_rate import AIMDConfig, AIMDController
+from data_fetcher.utils.rate_limiter import RateLimiter
+
+CONFIG = AIMDConfig(min_rate=1.0, max_rate=8.0, increase=1.0, decrease=0.5, latency_target=0.0, cooldown=1.0)
+
+def controller(ceilings=None, limits=None):
+    now = [0.0]
+    limiter = RateLimiter(limits if limits is not None else {"a": (5.0, 10)}, default=(2.0, 4), clock=lambda: now[0])
+    return AIMDController(limiter, CONFIG, clock=lambda: now[0], ceilings=ceilings), now
+
+def test_starts_at_the_configured_rate_and_climbs_past_it():
+    c, _ = controller()
+    assert c.state("a").rate == 5.0
+    for _ in range(10):
+        c.on_success("a", 0.01)
+    assert c.state("a").rate > 5.0
+    assert c.limiter.bucket("a").rate == c.state("a").rate
+
+def test_increase_stops_at_the_profile_ceiling():
+    c, _ = controller(ceilings={"a": 6.0})
+    for _ in range(1000):
+        c.on_success("a", 0.01)
+    assert c.state("a").rate == 6.0
+
+def test_increase_falls_back_to_max_rate():
+    c, _ = controller()
+    for _ in range(1000):
+        c.on_success("a", 0.01)
+    assert c.state("a").rate == CONFIG.max_rate
+
+def test_throttle_decreases_multiplicatively_once_per_cooldown():
+    c, now = controller()
+    c.on_throttle("a")
+    c.on_throttle("a")  # same cooldown window
+    assert c.state("a").rate == 2.5
+    now[0] += CONFIG.cooldown
+    c.on_throttle("a")
+    assert c.state("a").rate == 1.25
+    assert c.state("a").decreases == 2
+
+def test_decrease_stops_at_the_floor():
+    c, now = controller()
+    for _ in range(10):
+        c.on_throttle("a")
+        now[0] += CONFIG.cooldown
+    assert c.state("a").rate == CONFIG.min_rate
+
+def test_reload_restarts_changed_rates_and_keeps_learned_ones():
+    c, now = controller(limits={"a": (5.0, 10), "b": (4.0, 8)})
+    c.on_throttle("a")
+    c.on_throttle("b")
+    c.reload_limits({"a": (5.0, 10), "b": (3.0, 8)}, (2.0, 4), ceilings={"a": 2.0})
+    assert (c.state("a").rate, c.state("a").ceiling) == (2.0, 2.0)  # learned 2.5, within the new ceiling
+    assert (c.state("b").rate, c.state("b").ceiling) == (3.0, CONFIG.max_rate)
+    assert c.limiter.bucket("b").rate == 3.0
+
+@pytest.mark.parametrize("status", [429, 504])
+def test_connector_backs_off_on_throttle_statuses(stub_bank, status):
+    app, connector = stub_bank(fail_first=1, error_status=status, retry_after=0.001)
+    control = AIMDController(RateLimiter(default=(100.0, 100)), AIMDConfig(max_rate=100.0, decrease=0.5))
+    conn = connector(rate_control=control)
+    asyncio.run(conn.fetch_balance(RequestCtx("tok", 5, 2, {"no_cache": True})))
+    assert control.state("stub").decreases == 1
+    assert control.rates()["stub"] == pytest.approx(50.0, abs=0.1)  # halved, then one clean response
@@ -0,0 +1,73 @@
+import pytest
+
+from data_fetcher.utils import bank_router
+from data_fetcher.utils.adaptive_rate import AIMDController
+from data_fetcher.utils.bank_router import InstitutionRegistry
+from data_fetcher.utils.rate_limiter import RateLimiter
+
+PROFILES = """
+defaults:
+  rate_limit: {rate_per_sec: 4, burst: 8}
+institutions:
+  bank_a:
+    name: Bank A
+    aliases: [bank_b_legacy]
+    routing_numbers: ["011000015"]
+    formats: {transactions: csv}
+    rate_limit: {rate_per_sec: 10, burst: 20}
+  bank_b:
+    name: Bank B
+    formats: {transactions: ofx}
+"""
+
+@pytest.fixture
+def profiles(tmp_path):
+    path = tmp_path / "bank_profiles.yaml"
+    path.write_text(PROFILES)
+    return path
+
+def test_lookup_matches_id_routing_number_and_alias(profiles):
+    reg = InstitutionRegistry(profiles, check_interval=0)
+    assert reg.lookup("bank_a").id == "bank_a"
+    assert reg.lookup("011000015").id == "bank_a"
+    assert reg.lookup("  BANK   a ").id == "bank_a"
+    assert reg.get("Bank A") is None
+
+def test_resolve_is_exact_id_only(profiles, monkeypatch):
+    monkeypatch.setattr(bank_router, "registry", InstitutionRegistry(profiles, check_interval=0))
+    assert bank_router.resolve("bank_b") == {"name": "Bank B", "formats": {"transactions": "ofx"}}
+    with pytest.raises(ValueError):
+        bank_router.resolve("bank_b_legacy")  # an alias of bank_a, not bank_b
+
+def test_hot_reload_and_bad_edit_keeps_previous(profiles):
+    reg = InstitutionRegistry(profiles, check_interval=0)
+    connector_a = reg.get("bank_a")
+    profiles.write_text(PROFILES.replace("name: Bank B", "name: Bank B Renamed"))
+    assert reg.get("bank_b").profile.name == "Bank B Renamed"
+    assert reg.get("bank_a") is connector_a  # unchanged profiles are reused
+    profiles.write_text(PROFILES.replace('["011000015"]', '["12345"]'))  # not a 9-digit ABA number
+    assert reg.get("bank_b").profile.name == "Bank B Renamed"
+    assert reg.reloads == 2
+
+def test_reload_hands_validated_limits_to_rate_control(profiles):
+    control = AIMDController(RateLimiter())
+    InstitutionRegistry(profiles, check_interval=0, rate_control=control)
+    assert control.limiter.limits == {"bank_a": (10.0, 20)}
+    assert control.limiter.default == (4.0, 8)
+
+def test_invalid_default_rate_limit_is_rejected(profiles):
+    profiles.write_text(PROFILES.replace("rate_per_sec: 4", "rate_per_sec: -1"))
+    with pytest.raises(ValueError, match="defaults.rate_limit"):
+        InstitutionRegistry(profiles, check_interval=0)
+
+def test_reload_hands_ceilings_to_rate_control(profiles):
+    profiles.write_text(PROFILES.replace("rate_per_sec: 10, burst: 20", "rate_per_sec: 10, burst: 20, max_rate_per_sec: 25"))
+    control = AIMDController(RateLimiter())
+    InstitutionRegistry(profiles, check_interval=0, rate_control=control)
+    assert control.ceilings == {"bank_a": 25.0}
+    assert control.state("bank_a").ceiling == 25.0
+
+def test_ceiling_below_the_configured_rate_is_rejected(profiles):
+    profiles.write_text(PROFILES.replace("rate_per_sec: 10, burst: 20", "rate_per_sec: 10, burst: 20, max_rate_per_sec: 5"))
+    with pytest.raises(ValueError, match="max_rate_per_sec"):
+        InstitutionRegistry(profiles, check_interval=0)
@@ -0,0 +1,20 @@
+import json
+
+from data_fetcher import ollama_transformer as ot
+from data_fetcher.testing import bench_transformer
+
+def test_bench_smoke(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(ot, "_cache", None)
+    monkeypatch.setattr(ot, "OLLAMA_CACHE_PATH", "")
+    url = ot.OLLAMA_URL
+    sample = str(bench_transformer.SAMPLES_DIR / "Tx.xml")
+    out = tmp_path / "bench.json"
+    report = bench_transformer.main([sample, "--repeat", "2", "--out", str(out)])
+    assert ot.OLLAMA_URL == url  # restored
+    assert report["mode"] == "synthetic" and report["repeat"] == 2
+    tx = report["inputs"]["Tx.xml"]
+    assert tx["rows"] == 3 and tx["calls"] == 1
+    assert set(tx["stages_ms"]) >= {"prompt_build", "network", "parse", "validate"}
+    assert report["stub_calls"]["chat"] == 2
+    assert "python" in report and "commit" in report
+    assert json.loads(out.read_text()) == json.loads(capsys.readouterr().out)
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import pytest
+
+from data_fetcher import ollama_transformer as ot
+
+DATA = Path(__file__).resolve().parents[1] / "data_fetcher"
+
+def _csv(n: int) -> str:
+    rows = [f"2024-07-{i % 28 + 1:02d},Shop {i},{-(i + 1) * 1.5:.2f},USD" for i in range(n)]
+    return "dt,DES,VAL,CUR\n" + "\n".join(rows) + "\n"
+
+def test_split_source_keeps_every_row_once():
+    raw = _csv(25)
+    chunks = ot.split_source(raw, 10)
+    assert len(chunks) == 3
+    assert all(c.startswith("dt,DES,VAL,CUR\n") for c in chunks)
+    assert "".join(c.split("\n", 1)[1] for c in chunks) == raw.split("\n", 1)[1]
+
+def test_chunks_merge_in_source_order(stub_model):
+    raw = _csv(25)
+    whole = ot.transform(raw, chunked=False)
+    chunked = ot.transform_chunked(raw, rows_per_chunk=10, max_workers=3)
+    assert len(chunked["transactions"]) == 25
+    assert [t["description"] for t in chunked["transactions"]] == [f"Shop {i}" for i in range(25)]
+    assert chunked["transactions"] == whole["transactions"]
+
+def test_markup_chunks_merge_in_source_order(stub_model):
+    raw = (DATA / "samples_for_LLM/Tx.xml").read_text()
+    assert len(ot.split_source(raw, 1)) == 3
+    chunked = ot.transform_chunked(raw, rows_per_chunk=1)
+    assert [t["date"] for t in chunked["transactions"]] == ["2024-07-05", "2024-07-06", "2024-07-07"]
+    assert chunked["transactions"] == ot.transform(raw, chunked=False)["transactions"]
+
+def test_merge_results_takes_the_first_account_id():
+    merged = ot.merge_results([
+        {"account_id": None, "transactions": [{"tx_id": "1"}]},
+        {"account_id": "ACC-2", "transactions": []},
+        {"account_id": "ACC-3", "transactions": [{"tx_id": "2"}, {"tx_id": "3"}]},
+    ])
+    assert merged == {"account_id": "ACC-2", "transactions": [{"tx_id": "1"}, {"tx_id": "2"}, {"tx_id": "3"}]}
+
+MARKUP = sorted(p for d in ("sample_data", "samples_for_LLM") for p in (DATA / d).rglob("*")
+                if p.suffix in (".xml", ".ofx", ".html"))
+
+@pytest.mark.parametrize("path", MARKUP, ids=lambda p: p.name)
+def test_markup_chunks_hold_the_records_read_document_sees(path):
+    # chunk boundaries and compacted rows come from the same record detection
+    raw = path.read_text()
+    rows = ot.read_document(raw)[3]
+    chunks = ot.split_source(raw, 1)
+    assert len(chunks) == max(1, len(rows))
+    assert [r for c in chunks for r in ot.read_document(c)[3]] == rows
+
+def test_namespaced_and_self_closing_records_are_split():
+    raw = ('<x:Doc xmlns:x="urn:t"><x:Acct>A-1</x:Acct>'
+           + "".join(f'<x:Booking x:amt="{i}"/>' for i in range(4)) + "</x:Doc>")
+    chunks = ot.split_source(raw, 2)
+    assert len(chunks) == 2
+    assert [r for c in chunks for r in ot.read_document(c)[3]] == ot.read_document(raw)[3]
+
+def test_sgml_ofx_falls_back_to_known_record_tags():
+    raw = "<OFX><BANKTRANLIST>" + "".join(
+        f"<STMTTRN><TRNAMT>{i}<FITID>F{i}</STMTTRN>" for i in range(3)) + "</BANKTRANLIST></OFX>"
+    assert len(ot.split_source(raw, 1)) == 3
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+from data_fetcher.ollama_transformer import build_user_prompt, compact_source
+
+DATA = Path(__file__).resolve().parents[1] / "data_fetcher"
+SAMPLES = sorted(p for d in ("sample_data", "samples_for_LLM") for p in (DATA / d).rglob("*")
+                 if p.suffix in (".xml", ".ofx", ".json", ".html"))
+
+def source_values(raw: str):
+    """Every non-blank value of a sample, read without the transformer's code."""
+    text = raw.strip()
+    if text.startswith(("{", "[")):
+        def walk(o):
+            if isinstance(o, dict):
+                o = list(o.values())
+            if isinstance(o, list):
+                for v in o:
+                    yield from walk(v)
+            elif o is not None and str(o).strip():
+                yield o
+        return list(walk(json.loads(text)))
+    if re.search(r"<tr\b", text, re.I):
+        return [p.strip() for p in re.split(r"<!--.*?-->|<[^>]+>", text, flags=re.S) if p.strip()]
+    root = ET.fromstring(text)
+    return [v.strip() for el in root.iter() for v in (el.text, el.tail, *el.attrib.values()) if v and v.strip()]
+
+def compact_values(fields: str, table: str):
+    values = [line.split(": ", 1)[1] for line in fields.splitlines()]
+    for row in csv.reader(io.StringIO(table)):
+        values += row
+    return values
+
+@pytest.mark.parametrize("path", SAMPLES, ids=lambda p: p.name)
+def test_compaction_keeps_every_value(path):
+    raw = path.read_text(encoding="utf-8")
+    compacted = compact_source(raw)
+    if compacted is None:
+        return  # sent verbatim, nothing to lose
+    kept = "\n".join(compact_values(*compacted))
+    for v in source_values(raw):
+        text = json.dumps(v) if isinstance(v, (bool, int, float)) else str(v)
+        assert text in kept, f"{path.name}: {text!r} lost"
+
+def test_attribute_records_and_account_context():
+    fields, table = compact_source((DATA / "sample_data/bankB/statement_v2.xml").read_text())
+    assert "B-CHK-11" in fields and "CAD" in fields
+    rows = list(csv.DictReader(io.StringIO(table)))
+    assert [(r["d"], r["amt"], r["m"]) for r in rows] == [("2025-07-28", "-23.45", "Amazon CA"),
+                                                          ("2025-07-30", "-12.99", "CoffeeShop")]
+
+def test_statement_currency_is_kept():
+    fields, _ = compact_source((DATA / "sample_data/bankC/statement.ofx").read_text())
+    assert "CURDEF: EUR" in fields
+    prompt = build_user_prompt((DATA / "sample_data/bankC/statement.ofx").read_text(), compact=True)
+    assert "EUR" in prompt.split("SOURCE:")[0]
+
+def test_camt_keeps_attributes_nesting_and_drops_namespaces():
+    fields, table = compact_source((DATA / "sample_data/bankA/statement.xml").read_text())
+    header = table.splitlines()[0]
+    assert "{" not in header and "{" not in fields
+    rows = list(csv.DictReader(io.StringIO(table)))
+    assert [r["Amt@Ccy"] for r in rows] == ["USD", "USD"]
+    assert [r["NtryDtls.TxDtls.RmtInf.Ustrd"] for r in rows] == ["AMZN Mkt", "Starbcks"]
+
+def test_lossy_source_is_sent_raw():
+    # text mixed into a record element has no column to go to
+    raw = "<Statement>" + "".join(f"<Tx amt='{i}'>note {i}<d>2025-07-0{i}</d></Tx>" for i in range(1, 4)) + "</Statement>"
+    assert compact_source(raw) is None
+    assert build_user_prompt(raw, compact=True).endswith(raw)
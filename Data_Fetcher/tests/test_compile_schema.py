@@ -0,0 +1,62 @@
+import pytest
+
+from data_fetcher.ollama_transformer import SCHEMA, compile_schema, validate_minimal
+
+TX = {"tx_id": None, "date": "2025-07-01", "amount": -12.5, "currency": "USD", "merchant": "Amazon",
+      "description": "AMZN Mkt", "category": None}
+
+def test_canonical_schema():
+    assert validate_minimal({"account_id": "A1", "transactions": [TX, TX]}, SCHEMA) == []
+    bad = {"account_id": "A1", "transactions": [TX, {**TX, "amount": "12.50"}, {k: v for k, v in TX.items() if k != "date"}]}
+    assert validate_minimal(bad, SCHEMA) == ["$.transactions[1].amount: expected ['number', 'null'], got str",
+                                             "$.transactions[2].date: missing required"]
+
+def test_number_excludes_bool_and_integer_excludes_floats():
+    number = compile_schema({"type": "number"})
+    assert number(1) == number(1.5) == []
+    assert number(True) == ["$: expected number, got bool"]
+    integer = compile_schema({"type": "integer"})
+    assert integer(3) == [] and integer(3.5) and integer(False)
+
+@pytest.mark.parametrize("value, ok", [("USD", True), ("EUR", True), ("usd", False), (None, True), (3, False)])
+def test_enum(value, ok):
+    schema = {"type": ["string", "null"], "enum": ["USD", "EUR", None]}
+    errors = validate_minimal(value, schema)
+    assert (errors == []) is ok
+    if not ok and isinstance(value, str):
+        assert errors == [f"$: {value!r} is not one of ['USD', 'EUR', None]"]
+
+def test_enum_with_unhashable_members():
+    validate = compile_schema({"enum": [{"a": 1}, [1, 2], "x"]})
+    assert validate({"a": 1}) == validate([1, 2]) == validate("x") == []
+    assert validate({"a": 2})
+
+@pytest.mark.parametrize("fmt, good, bad", [
+    ("date", "2025-07-01", ["2025-7-1", "07/01/2025", "2025-02-30"]),
+    ("date-time", "2025-07-01T10:00:00Z", ["2025-07-01", "tomorrow"]),
+    ("email", "ops@example.com", ["ops@", "no at.com"]),
+    ("uuid", "12345678-1234-5678-1234-567812345678", ["1234"]),
+])
+def test_formats(fmt, good, bad):
+    validate = compile_schema({"type": "string", "format": fmt})
+    assert validate(good) == []
+    for v in bad:
+        assert validate(v) == [f"$: {v!r} is not a valid {fmt}"]
+
+def test_format_applies_to_strings_only_and_unknown_formats_pass():
+    assert validate_minimal(None, {"type": ["string", "null"], "format": "date"}) == []
+    assert validate_minimal("anything", {"type": "string", "format": "hostname"}) == []
+
+def test_additional_properties():
+    base = {"type": "object", "properties": {"a": {"type": "string"}}}
+    assert validate_minimal({"a": "x", "b": 1}, base) == []
+    closed = {**base, "additionalProperties": False}
+    assert validate_minimal({"a": "x", "b": 1}, closed) == ["$.b: additional property not allowed"]
+    typed = {**base, "additionalProperties": {"type": "number"}}
+    assert validate_minimal({"a": "x", "b": 1, "c": 2.5}, typed) == []
+    assert validate_minimal({"a": "x", "b": "1"}, typed) == ["$.b: expected number, got str"]
+
+def test_validators_are_cached_by_schema_identity():
+    schema = {"type": "object", "required": ["a"]}
+    assert compile_schema(schema) is compile_schema(schema)
+    assert compile_schema(dict(schema)) is not compile_schema(schema)
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from data_fetcher.disk_cache import SqliteCache
+from data_fetcher.memory_store import MISSING, TieredCache, TTLCache
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "ref.sqlite")
+
+def test_values_survive_reopening(db):
+    SqliteCache(db).set("aliases", {"AMZN Mkt": "Amazon"}, version="1")
+    l2 = SqliteCache(db)
+    assert l2.get("aliases", version="1") == {"AMZN Mkt": "Amazon"}
+    assert l2.get("aliases", MISSING, version="2") is MISSING  # stale build
+
+def test_expired_entries_are_misses(db):
+    l2 = SqliteCache(db)
+    l2.set("k", 1, ttl=-1)
+    assert l2.get("k", MISSING) is MISSING
+    assert l2.purge_expired() == 1
+
+def test_byte_bound_evicts_least_recently_read(db):
+    l2 = SqliteCache(db, max_bytes=2500)
+    for k in "abc":
+        l2.set(k, "x" * 1000)
+        l2.get("a")
+    assert l2.get("a") is not None and l2.get("b") is None
+    assert l2.nbytes() <= 2500
+
+def test_restarted_worker_reloads_from_l2(db):
+    built = []
+
+    def build():
+        built.append(1)
+        return {"5814": "Fast Food"}
+
+    first = TieredCache(TTLCache(), SqliteCache(db), version="1")
+    assert first.get_or_load("mcc_map", build) == {"5814": "Fast Food"}
+    restarted = TieredCache(TTLCache(), SqliteCache(db), version="1")
+    assert restarted.get_or_load("mcc_map", build) == {"5814": "Fast Food"}
+    assert len(built) == 1  # read back from disk, not rebuilt
+    assert restarted.l2.stats().hits == 1
+    bumped = TieredCache(TTLCache(), SqliteCache(db), version="2")
+    bumped.get_or_load("mcc_map", build)
+    assert len(built) == 2  # a new builder version rebuilds
+
+def test_l2_hits_are_promoted_to_l1(db):
+    SqliteCache(db).set("k", "v")
+    tiered = TieredCache(TTLCache(), SqliteCache(db))
+    assert tiered.get("k") == "v"
+    assert tiered.l1.get("k") == "v"
+
+def test_aget_or_load_reads_through(db):
+    SqliteCache(db).set("k", "disk", version="1")
+    tiered = TieredCache(TTLCache(), SqliteCache(db), version="1")
+    assert asyncio.run(tiered.aget_or_load("k", lambda: pytest.fail("must come from L2"))) == "disk"
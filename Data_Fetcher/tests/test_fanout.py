@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from data_fetcher.connectors.batch import FanOut
+from data_fetcher.connectors.connector_base import RequestCtx
+from data_fetcher.utils.rate_limiter import RateLimiter
+
+def ctxs(n: int):
+    return [RequestCtx(f"tok-{i}", 5, 0, {"no_cache": True}) for i in range(n)]
+
+def test_collect_returns_submission_order(stub_bank):
+    app, connector = stub_bank(latency="uniform:0.001,0.01")
+    items = asyncio.run(connector().fan_out("fetch_balance", ctxs(20), concurrency=5).collect())
+    assert [i.index for i in items] == list(range(20))
+    assert all(i.ok for i in items)
+    assert app.state.calls["/accounts/balance/get"] == 20
+
+def test_early_exit_stops_workers(stub_bank):
+    app, connector = stub_bank(latency="fixed:0.01")
+
+    async def run():
+        run = connector().fan_out("fetch_balance", ctxs(200), concurrency=4)
+        async with run:
+            async for item in run:
+                if run.stats.completed >= 3:
+                    break
+        assert run.stats.finished_at is not None
+        calls = app.state.calls["/accounts/balance/get"]
+        await asyncio.sleep(0.05)
+        assert app.state.calls["/accounts/balance/get"] == calls  # nothing still running
+        return run.stats
+
+    stats = asyncio.run(run())
+    assert stats.submitted < 200
+
+def test_abandoned_iteration_is_finalized(stub_bank):
+    app, connector = stub_bank(latency="fixed:0.01")
+
+    async def run():
+        run = connector().fan_out("fetch_balance", ctxs(200), concurrency=4)
+        async for _ in run:
+            break  # no aclose(): the loop's asyncgen finalizer cleans up
+        await asyncio.sleep(0.05)
+        assert run.stats.finished_at is not None
+        await run.aclose()  # waits for the finalizer; must not hang
+        return run.stats
+
+    stats = asyncio.run(asyncio.wait_for(run(), 5))
+    assert stats.submitted < 200
+
+def test_errors_are_attached_to_items(stub_bank):
+    app, connector = stub_bank(error_rate=1.0, error_status=400)
+    items = asyncio.run(connector().fan_out("fetch_balance", ctxs(3), concurrency=2).collect())
+    assert [i.error.code for i in items] == ["BANK_REJECTED"] * 3
+
+def test_failing_ctx_iterable_is_raised_after_draining(stub_bank):
+    app, connector = stub_bank(latency="fixed:0.01")
+
+    def broken():
+        yield from ctxs(5)
+        raise RuntimeError("ctx source failed")
+
+    async def run():
+        items = []
+        with pytest.raises(RuntimeError, match="ctx source failed"):
+            async for item in connector().fan_out("fetch_balance", broken(), concurrency=3):
+                items.append(item)
+        return items
+
+    assert sorted(i.index for i in asyncio.run(run())) == list(range(5))
+
+def test_limiter_needs_a_limit_key():
+    with pytest.raises(ValueError):
+        FanOut(lambda ctx: None, [], limiter=RateLimiter())
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from data_fetcher.connectors.connector_base import RequestCtx
+from data_fetcher.connectors.http_pool import ClientPool
+from data_fetcher.connectors.plaid_connector import PlaidConnector
+from data_fetcher.testing.server import serve_app
+from data_fetcher.testing.stub_bank import create_app
+
+@pytest.fixture(scope="module")
+def bank_url():
+    url, server, _ = serve_app(create_app())
+    yield url
+    server.should_exit = True
+
+def test_one_connector_across_event_loops(bank_url):
+    # a real socket: keep-alive connections are tied to the loop that opened them
+    conn = PlaidConnector(bank_url, pool=ClientPool())
+    ctx = RequestCtx("tok", 5, 0, {"no_cache": True})
+    for _ in range(2):
+        assert asyncio.run(conn.fetch_balance(ctx))["accounts"]
+
+def test_aclose_releases_the_clients():
+    pool = ClientPool()
+
+    async def run():
+        client = pool.client("bank")
+        assert pool.client("bank") is client
+        await pool.aclose()
+        assert client.is_closed
+        with pytest.raises(RuntimeError):
+            pool.client("bank")
+        async with pool:
+            assert pool.client("bank") is not client
+        assert not pool._clients
+
+    asyncio.run(run())
+
+def test_clients_of_a_closed_loop_are_dropped():
+    pool = ClientPool()
+
+    async def make():
+        return pool.client("bank"), len(pool._clients)
+
+    first, _ = asyncio.run(make())
+    second, loops = asyncio.run(make())
+    assert first is not second
+    assert loops == 1
@@ -0,0 +1,57 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from data_fetcher.hybrid_transform import sniff_format, transform_hybrid
+
+DATA = Path(__file__).resolve().parents[1] / "data_fetcher"
+
+@pytest.mark.parametrize("path, fmt, rows", [
+    ("sample_data/bankA/transactions.csv", "csv", 3),
+    ("sample_data/bankB/tx_v2.csv", "csv", 3),
+    ("sample_data/bankB/statement_v2.xml", "bankb_xml", 2),
+    ("sample_data/bankC/transactions.json", "json", 2),
+    ("sample_data/bankC/statement.ofx", "ofx", 2),
+])
+def test_known_formats_go_through_their_parser(path, fmt, rows, stub_model):
+    raw = (DATA / path).read_text()
+    assert sniff_format(raw) == fmt
+    out = transform_hybrid(raw)
+    assert out["meta"]["format"] == fmt
+    assert out["meta"]["paths"] == ["parser"] * rows
+    assert len(out["transactions"]) == rows
+
+@pytest.mark.parametrize("path, rows", [
+    ("samples_for_LLM/Tx.xml", 3),
+    ("samples_for_LLM/Txs.csv", 7),
+    ("sample_data/bankA/statement.xml", 2),
+])
+def test_unknown_formats_go_to_the_llm(path, rows, stub_model):
+    raw = (DATA / path).read_text()
+    assert sniff_format(raw) is None
+    out = transform_hybrid(raw)
+    assert out["meta"]["reason"] == "unrecognized format"
+    assert out["meta"]["paths"] == ["llm"] * rows
+
+def test_html_without_its_parser_dependency_goes_to_the_llm(stub_model):
+    raw = (DATA / "sample_data/bankA/transactions.html").read_text()
+    assert sniff_format(raw) == "html"
+    out = transform_hybrid(raw)
+    expected = "parser" if importlib.util.find_spec("bs4") else "llm"
+    assert out["meta"]["paths"] == [expected] * 2
+
+def test_only_bad_rows_fall_back(stub_model):
+    raw = ("date,amount,currency,merchant,category,account_id,txn_id\n"
+           "2025-07-28,-23.45,USD,AMZN Mkt,Shopping,ACHK-001,A-TX-1\n"
+           "2025-07-29,,USD,Starbcks,Food & Beverage,ACHK-001,A-TX-2\n"
+           "2025-07-30,1500.00,USD,Payroll,Income,ACHK-001,A-TX-3\n")
+    out = transform_hybrid(raw)
+    assert out["meta"]["paths"] == ["parser", "llm", "parser"]
+    assert [f["index"] for f in out["meta"]["fallback"]] == [1]
+    assert [t["txn_id"] for t in out["transactions"]] == ["A-TX-1", "A-TX-2", "A-TX-3"]
+
+def test_zero_amount_is_not_missing(stub_model):
+    raw = ("date,amount,currency,merchant,category,account_id,txn_id\n"
+           "2025-07-28,0.00,USD,Reversal,Fees,ACHK-001,A-TX-1\n")
+    assert transform_hybrid(raw)["meta"]["paths"] == ["parser"]
@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+from data_fetcher import llm_mapping
+from data_fetcher.llm_mapping import MappingStore, header_fingerprint, transform_with_mapping
+
+CSV = ("Date,Description,Amount,Currency\n"
+       "2025-07-01,Starbucks #12,-4.50,USD\n"
+       "2025-07-02,Shell Oil,-40.00,USD\n")
+# same layout up to case and spacing, other rows
+CSV_AGAIN = "date ,DESCRIPTION,Amount,Currency\n2025-07-03,Amazon,-9.99,USD\n"
+CSV_OTHER = "Posted,Narrative,Value\n2025-07-04,Refund,5.00\n"
+
+@pytest.fixture
+def inferences(stub_model, monkeypatch):
+    calls = []
+    infer = llm_mapping.infer_mapping
+
+    def counting(dtype, columns, samples):
+        calls.append(columns)
+        return infer(dtype, columns, samples)
+    monkeypatch.setattr(llm_mapping, "infer_mapping", counting)
+    return calls
+
+def test_fingerprint_ignores_case_and_spacing_but_not_order_or_type():
+    fp = header_fingerprint("csv", ["Date", "Amount"])
+    assert fp == header_fingerprint("csv", [" date", "AMOUNT "])
+    assert fp != header_fingerprint("csv", ["Amount", "Date"])
+    assert fp != header_fingerprint("json", ["Date", "Amount"])
+
+def test_one_inference_per_layout(inferences):
+    store = MappingStore(path="")
+    first = transform_with_mapping(CSV, account_hint="A1", store=store)
+    assert [t["merchant"] or t["description"] for t in first["transactions"]] == ["Starbucks #12", "Shell Oil"]
+    assert [t["amount"] for t in first["transactions"]] == [-4.5, -40.0]
+    assert first["account_id"] == "A1"
+    again = transform_with_mapping(CSV_AGAIN, store=store)
+    assert [t["amount"] for t in again["transactions"]] == [-9.99]
+    transform_with_mapping(CSV_OTHER, store=store)
+    assert len(inferences) == 2
+    assert (store.hits, store.misses) == (1, 2)
+
+def test_concurrent_first_sightings_share_one_inference(inferences):
+    store = MappingStore(path="")
+    barrier = threading.Barrier(6)
+    results, errors = [], []
+
+    def worker():
+        barrier.wait()
+        try:
+            results.append(transform_with_mapping(CSV, store=store))
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors and len(results) == 6
+    assert len(inferences) == 1
+    assert (store.hits, store.misses) == (5, 1)
+
+def test_stored_mappings_survive_a_new_store_and_a_version_bump_drops_them(inferences, tmp_path):
+    path = str(tmp_path / "mappings.sqlite")
+    transform_with_mapping(CSV, store=MappingStore(path=path, version="1"))
+    reopened = MappingStore(path=path, version="1")
+    assert transform_with_mapping(CSV_AGAIN, store=reopened)["transactions"][0]["amount"] == -9.99
+    assert len(inferences) == 1 and reopened.hits == 1
+    transform_with_mapping(CSV, store=MappingStore(path=path, version="2"))
+    assert len(inferences) == 2
+
+def test_statement_account_and_currency_fill_rows(stub_model):
+    xml = ("<Statement><Account id='B-CHK-11' currency='CAD'/>"
+           "<Tx><Date>2025-07-28</Date><Amount>-23.45</Amount><Description>Amazon CA</Description></Tx>"
+           "<Tx><Date>2025-07-30</Date><Amount>-12.99</Amount><Description>CoffeeShop</Description></Tx>"
+           "</Statement>")
+    result = transform_with_mapping(xml, account_hint="ignored", store=MappingStore(path=""))
+    assert result["account_id"] == "B-CHK-11"
+    assert [t["currency"] for t in result["transactions"]] == ["CAD", "CAD"]
+
+def test_sources_without_records_are_rejected():
+    with pytest.raises(ValueError):
+        transform_with_mapping("", store=MappingStore(path=""))
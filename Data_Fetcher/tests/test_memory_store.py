@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from data_fetcher.memory_store import MISSING, TTLCache
+
+def make(**kwargs):
+    now = [0.0]
+    return TTLCache(ttl=10, clock=lambda: now[0], **kwargs), now
+
+def test_lru_eviction_keeps_recently_used():
+    c, _ = make(max_entries=2)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.get("a")
+    c.set("c", 3)  # evicts b, the least recently used
+    assert "a" in c and "c" in c and "b" not in c
+    assert c.stats().evictions == 1
+
+def test_byte_budget_evicts():
+    c, _ = make(max_entries=0, max_bytes=100, sizeof=lambda v: 40)
+    for k in "abc":
+        c.set(k, k)
+    assert len(c) == 2 and c.nbytes == 80
+
+def test_ttl_expiry_and_per_key_ttl():
+    c, now = make()
+    c.set("a", 1)
+    c.set("b", 2, ttl=100)
+    now[0] = 10.0
+    assert c.get("a") is None
+    assert c.get("b") == 2
+    assert c.stats().expirations == 1
+
+def test_overwrite_resets_the_expiry():
+    c, now = make()
+    c.set("a", 1)
+    now[0] = 5.0
+    c.set("a", 2)
+    now[0] = 12.0
+    assert c.get("a") == 2
+
+def test_stored_none_is_not_a_miss():
+    c, _ = make()
+    c.set("none", None)
+    assert c.get("none", MISSING) is None
+    assert c.get("absent", MISSING) is MISSING
+    stats = c.stats()
+    assert (stats.hits, stats.misses) == (1, 1)
+    assert c.get_or_load("none", lambda: pytest.fail("cached None must not reload")) is None
+
+def test_get_or_load_runs_the_loader_once_across_threads():
+    c, _ = make()
+    calls, start = [], threading.Barrier(8)
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return "v"
+
+    def worker(out):
+        start.wait()
+        out.append(c.get_or_load("k", loader))
+
+    out = []
+    threads = [threading.Thread(target=worker, args=(out,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert out == ["v"] * 8 and len(calls) == 1
+    assert c.stats().loads == 1
+
+def test_get_or_load_error_reaches_every_waiter_and_is_not_cached():
+    c, _ = make()
+    start = threading.Barrier(4)
+    errors = []
+
+    def loader():
+        time.sleep(0.05)
+        raise RuntimeError("source down")
+
+    def worker():
+        start.wait()
+        try:
+            c.get_or_load("k", loader)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(errors) == 4
+    assert c.get_or_load("k", lambda: "ok") == "ok"
+
+def test_aget_or_load_shares_one_load_and_survives_a_cancelled_waiter():
+    c, _ = make()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "v"
+
+    async def run():
+        first = asyncio.ensure_future(c.aget_or_load("k", loader))
+        await asyncio.sleep(0)
+        first.cancel()
+        values = await asyncio.gather(*(c.aget_or_load("k", loader) for _ in range(5)))
+        return values
+
+    assert asyncio.run(run()) == ["v"] * 5
+    assert len(calls) == 1
+    assert c.get("k") == "v"
@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+from data_fetcher.connectors.connector_base import RequestCtx
+from data_fetcher.utils.error_handler import FetchError
+
+def ctx() -> RequestCtx:
+    return RequestCtx("tok", 5, 0, {})
+
+async def _stream(conn):
+    return [t async for t in conn.stream_transactions(ctx(), "2024-01-01", "2024-12-31")]
+
+def test_stream_transactions(stub_bank):
+    app, connector = stub_bank()
+    conn = connector()
+    conn.SYNC_PAGE_SIZE = 1  # one transaction per page: exercises the offset loop
+    txns = asyncio.run(_stream(conn))
+    assert [t["txn_id"] for t in txns] == ["P-TX-2", "P-TX-3"]  # P-TX-1 was removed by the last sync page
+    assert app.state.calls["/transactions/get"] == 2
+
+def test_truncated_stream_is_a_bad_response(stub_bank):
+    app, connector = stub_bank(truncate_at=300)
+    with pytest.raises(FetchError) as e:
+        asyncio.run(_stream(connector()))
+    assert e.value.code == "BANK_BAD_RESPONSE"
+    assert e.value.meta["path"] == "/transactions/get"
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from data_fetcher.connectors.connector_base import RequestCtx
+from data_fetcher.utils.error_handler import FetchError
+
+def ctx() -> RequestCtx:
+    return RequestCtx("tok", 5, 0, {"item_id": "item-1"})
+
+def test_sync_commits_every_page_once(stub_bank):
+    app, connector = stub_bank()
+    conn, deltas = connector(), []
+    result = asyncio.run(conn.sync_transactions(ctx(), deltas.append))
+    assert (result.pages, result.added, result.modified, result.removed) == (3, 3, 1, 1)
+    assert len(deltas) == 1 and deltas[0].cursor == "cur-3"
+    assert conn.cursors.get("item-1") == "cur-3"
+
+def test_mutation_during_pagination_restarts_from_start_cursor(stub_bank):
+    app, connector = stub_bank(sync_mutations=1)
+    conn, deltas = connector(), []
+
+    async def commit(delta):
+        deltas.append(delta)
+
+    result = asyncio.run(conn.sync_transactions(ctx(), commit))
+    assert result.restarts == 1
+    assert (result.pages, result.added, result.modified, result.removed) == (3, 3, 1, 1)
+    # the pages read before the mutation are dropped, not committed twice
+    assert len(deltas) == 1
+    assert len({t["txn_id"] for t in deltas[0].added}) == 3
+    assert conn.cursors.get("item-1") == "cur-3"
+    assert app.state.calls["/transactions/sync"] == 5  # "", cur-1 (mutated), "", cur-1, cur-2
+
+def test_too_many_mutations_commit_nothing(stub_bank):
+    app, connector = stub_bank(sync_mutations=10)
+    conn, deltas = connector(), []
+    with pytest.raises(FetchError) as e:
+        asyncio.run(conn.sync_transactions(ctx(), deltas.append))
+    assert e.value.meta["upstream_code"] == "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION"
+    assert deltas == []
+    assert conn.cursors.get("item-1") is None
+
+def test_failed_commit_keeps_the_cursor(stub_bank):
+    app, connector = stub_bank()
+    conn = connector()
+
+    def commit(delta):
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(conn.sync_transactions(ctx(), commit))
+    assert conn.cursors.get("item-1") is None
@@ -0,0 +1,57 @@
+import pytest
+
+from data_fetcher.parsers.csv_parser import parse_csv_transactions
+from data_fetcher.parsers.quarantine import JsonlQuarantine, MemoryQuarantine, RowGuard, to_amount
+from data_fetcher.utils.error_handler import FetchError
+
+HEADER = "date,amount,currency,merchant,category,account_id,txn_id\n"
+
+def _csv(amounts):
+    return HEADER + "".join(f"2025-07-{i + 1:02d},{a},USD,Shop,Misc,ACC-1,T{i}\n" for i, a in enumerate(amounts))
+
+def test_strict_bad_amount_is_still_a_value_error():
+    with pytest.raises(ValueError) as e:
+        parse_csv_transactions(_csv(["1.00", "abc"]))
+    assert e.value.code == "ROW_BAD_AMOUNT"
+    with pytest.raises(ValueError):
+        to_amount(None)
+
+def test_tolerant_parsing_quarantines_bad_rows():
+    sink = MemoryQuarantine()
+    out = parse_csv_transactions(_csv(["1.00", "abc", "-2.50"]), tolerant=True, quarantine=sink, source="a.csv")
+    assert [t["txn_id"] for t in out["transactions"]] == ["T0", "T2"]
+    (row,) = sink.rows
+    assert (row.source, row.position, row.code, row.index) == ("a.csv", 3, "ROW_BAD_AMOUNT", 1)
+    assert row.raw["amount"] == "abc" and row.meta == {"field": "amount", "value": "abc"}
+    assert out["meta"]["quarantine"]["quarantined"] == 1
+
+def test_error_rate_aborts_a_file_once_min_rows_are_seen():
+    guard = RowGuard("big.csv", MemoryQuarantine(), max_error_rate=0.25, min_rows=4)
+    for i in range(3):
+        guard.run(i, None, lambda: 1)
+    guard.run(3, "x", lambda: to_amount("x"))  # 1 of 4: within the limit
+    with pytest.raises(FetchError) as e:
+        guard.run(4, "y", lambda: to_amount("y"))  # 2 of 5
+    assert e.value.code == "PARSE_ERROR_RATE_EXCEEDED"
+
+def test_small_file_aborts_only_when_nothing_parsed():
+    ok = RowGuard("s.csv", MemoryQuarantine(), max_error_rate=0.0, min_rows=100)
+    ok.run(1, None, lambda: 1)
+    ok.run(2, "x", lambda: to_amount("x"))
+    assert ok.finish()["quarantined"] == 1
+    bad = RowGuard("s.csv", MemoryQuarantine(), min_rows=100)
+    bad.run(1, "x", lambda: to_amount("x"))
+    with pytest.raises(FetchError):
+        bad.finish()
+
+def test_check_rejects_parsed_but_unusable_rows(tmp_path):
+    path = tmp_path / "q.jsonl"
+
+    def check(row):
+        if row["amount"] == 0:
+            raise KeyError("amount")
+
+    guard = RowGuard("c.csv", JsonlQuarantine(str(path)), max_error_rate=1.0, check=check)
+    parse_csv_transactions(_csv(["0", "5"]), guard=guard)
+    assert guard.stats.as_dict()["errors"] == {"ROW_MISSING_FIELD": 1}
+    assert '"position": 2' in path.read_text()
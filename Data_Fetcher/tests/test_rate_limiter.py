@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from data_fetcher.utils.error_handler import FetchError
+from data_fetcher.utils.rate_limiter import RateLimiter, load_limits
+
+class Clock:
+    def __init__(self):
+        self.now = 1024.0
+
+    def __call__(self):
+        return self.now
+
+def test_acquire_serves_waiters_in_arrival_order():
+    async def run():
+        limiter = RateLimiter(default=(256.0, 1))
+        order = []
+
+        async def worker(i):
+            await limiter.acquire("bank")
+            order.append(i)
+        tasks = []
+        for i in range(12):
+            tasks.append(asyncio.ensure_future(worker(i)))
+            await asyncio.sleep(0)  # arrive one after another
+        await asyncio.gather(*tasks)
+        assert order == list(range(12))
+        assert not limiter.bucket("bank").waiters
+    asyncio.run(run())
+
+def test_a_cancelled_waiter_does_not_stall_the_queue():
+    async def run():
+        limiter = RateLimiter(default=(128.0, 1))
+        order = []
+
+        async def worker(i):
+            await limiter.acquire("bank")
+            order.append(i)
+        tasks = []
+        for i in range(5):
+            tasks.append(asyncio.ensure_future(worker(i)))
+            await asyncio.sleep(0)
+        tasks[1].cancel()
+        tasks[2].cancel()
+        await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 2)
+        assert order == [0, 3, 4]
+    asyncio.run(run())
+
+def test_guard_fails_fast_with_retry_after():
+    clock = Clock()
+    limiter = RateLimiter(default=(4.0, 2), clock=clock)
+    assert [limiter.guard("bank", lambda: "ok") for _ in range(2)] == ["ok", "ok"]
+    with pytest.raises(FetchError) as e:
+        limiter.guard("bank", lambda: "ok")
+    assert e.value.code == "RATE_LIMITED" and e.value.retryable
+    assert e.value.retry_after == pytest.approx(0.25)
+    clock.now += 0.25
+    assert limiter.guard("bank", lambda: "ok") == "ok"
+    assert limiter.guard("other", lambda: "ok") == "ok"  # own bucket
+
+def test_pause_holds_tokens_back():
+    clock = Clock()
+    limiter = RateLimiter(default=(4.0, 8), clock=clock)
+    limiter.pause("bank", 2.0)
+    assert limiter.bucket("bank").time_until_token() == pytest.approx(2.0)
+    clock.now += 1.75
+    assert not limiter.bucket("bank").allow()
+    clock.now += 0.25
+    assert limiter.bucket("bank").allow()
+
+def test_reload_and_set_rate_change_live_buckets():
+    clock = Clock()
+    limiter = RateLimiter({"a": (2.0, 4)}, default=(1.0, 1), clock=clock)
+    a, b = limiter.bucket("a"), limiter.bucket("b")
+    assert (a.rate, a.capacity, b.rate) == (2.0, 4, 1.0)
+    limiter.reload({"a": (8.0, 2)}, (16.0, 4))
+    assert (a.rate, a.capacity, a.tokens) == (8.0, 2, 2.0)
+    assert (b.rate, b.capacity) == (16.0, 4)
+    limiter.set_rate("a", 0.5)
+    assert (a.rate, a.capacity, limiter.limits["a"]) == (0.5, 2, (0.5, 2))
+
+def test_idle_buckets_are_evicted():
+    clock = Clock()
+    limiter = RateLimiter(default=(4.0, 2), idle_ttl=60, clock=clock)
+    limiter.bucket("busy").allow()
+    limiter.bucket("idle")
+    clock.now += 59
+    limiter.bucket("busy").allow()
+    clock.now += 1
+    assert limiter.evict_idle() == 1
+    assert set(limiter.buckets) == {"busy"}
+    clock.now += 60
+    limiter.bucket("new")  # creating a bucket sweeps at most every idle_ttl / 2
+    assert set(limiter.buckets) == {"new"}
+
+def test_load_limits(tmp_path):
+    path = tmp_path / "bank_profiles.yaml"
+    path.write_text("defaults:\n  rate_limit: {rate_per_sec: 3, burst: 6}\n"
+                    "institutions:\n  a: {rate_limit: {rate_per_sec: 1}}\n  b: {name: B}\n")
+    assert load_limits(path) == ({"a": (1.0, 6)}, (3.0, 6))
+    assert load_limits(tmp_path / "missing.yaml") == ({}, (5.0, 10))
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from data_fetcher.connectors.connector_base import RequestCtx
+from data_fetcher.connectors.resilience import Backoff, CircuitBreaker, Resilience, RetryBudget
+from data_fetcher.utils.error_handler import FetchError
+
+BALANCE = "/accounts/balance/get"
+
+def ctx(retries: int = 3, **extra) -> RequestCtx:
+    return RequestCtx("tok", 5, retries, {"no_cache": True, "no_coalesce": True, **extra})
+
+def test_transient_errors_are_retried_until_success(stub_bank):
+    app, connector = stub_bank(fail_first=2)
+    conn = connector()
+    body = asyncio.run(conn.fetch_balance(ctx(retries=3)))
+    assert body["accounts"]
+    assert app.state.calls[BALANCE] == 3
+    assert conn.resilience.stats.retries == 2
+
+def test_client_errors_are_not_retried(stub_bank):
+    app, connector = stub_bank(fail_first=1, error_status=400)
+    with pytest.raises(FetchError) as e:
+        asyncio.run(connector().fetch_balance(ctx(retries=3)))
+    assert e.value.code == "BANK_REJECTED"
+    assert app.state.calls[BALANCE] == 1
+
+def test_retry_budget_caps_retries(stub_bank):
+    app, connector = stub_bank(error_rate=1.0)
+    budget = RetryBudget(ratio=0.0, min_per_sec=0.0, max_tokens=1.0)
+    conn = connector(resilience=Resilience(Backoff(base=0.001, cap=0.005), budget))
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(FetchError):
+                await conn.fetch_balance(ctx(retries=5))
+
+    asyncio.run(run())
+    # one retry in the budget: 2 first attempts + 1 retry reach the bank
+    assert app.state.calls[BALANCE] == 3
+    assert conn.resilience.stats.retries == 1
+    assert conn.resilience.stats.budget_exhausted == 2
+
+def test_breaker_opens_and_fails_fast(stub_bank):
+    app, connector = stub_bank(error_rate=1.0)
+    res = Resilience(Backoff(base=0.001, cap=0.005),
+                     breaker_factory=lambda key: CircuitBreaker(key, failure_threshold=3, reset_timeout=60))
+    conn = connector(resilience=res)
+
+    async def run():
+        with pytest.raises(FetchError) as e:
+            await conn.fetch_balance(ctx(retries=5))
+        assert e.value.code == "CIRCUIT_OPEN"
+        with pytest.raises(FetchError) as e:
+            await conn.fetch_balance(ctx(retries=5))
+        assert e.value.code == "CIRCUIT_OPEN"
+
+    asyncio.run(run())
+    assert app.state.calls[BALANCE] == 3  # nothing reached the bank once the breaker opened
+    assert res.breaker_states() == {"stub": CircuitBreaker.OPEN}
+    assert res.stats.circuit_rejections == 2
+
+def test_half_open_probe_closes_the_breaker():
+    now = [0.0]
+    breaker = CircuitBreaker("b", failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    with pytest.raises(FetchError):
+        breaker.before_call()
+    now[0] = 10.0
+    breaker.before_call()  # the probe
+    with pytest.raises(FetchError):
+        breaker.before_call()  # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_breakers_follow_the_rate_key(stub_bank):
+    app, connector = stub_bank(fail_first=3)
+    res = Resilience(Backoff(base=0.001, cap=0.005),
+                     breaker_factory=lambda key: CircuitBreaker(key, failure_threshold=3, reset_timeout=60))
+    conn = connector(resilience=res)
+
+    async def run():
+        with pytest.raises(FetchError):
+            await conn.fetch_balance(ctx(retries=2, institution_id="bank_a"))
+        with pytest.raises(FetchError) as e:
+            await conn.fetch_balance(ctx(institution_id="bank_a"))
+        assert e.value.code == "CIRCUIT_OPEN"
+        return await conn.fetch_balance(ctx(institution_id="bank_b"))
+
+    assert asyncio.run(run())["accounts"]  # bank_a's failures do not block bank_b
+    assert res.breaker_states() == {"bank_a": CircuitBreaker.OPEN, "bank_b": CircuitBreaker.CLOSED}
@@ -0,0 +1,116 @@
+import asyncio
+
+from data_fetcher.connectors.response_cache import CachePolicy, ResponseCache
+
+class Clock:
+    def __init__(self):
+        self.now = 1024.0
+
+    def __call__(self):
+        return self.now
+
+def make_loader(results, gate=None):
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        if gate is not None:
+            await gate.wait()
+        value = results[len(calls) - 1]
+        if isinstance(value, Exception):
+            raise value
+        return value
+    return loader, calls
+
+def cache(clock):
+    return ResponseCache({"/accounts/get": CachePolicy(ttl=10, stale_ttl=20)}, clock=clock)
+
+def test_fresh_hits_and_uncached_endpoints():
+    async def run():
+        clock = Clock()
+        rc = cache(clock)
+        loader, calls = make_loader(["v1", "v2", "v3"])
+        assert await rc.fetch("/accounts/get", "tok", loader) == "v1"
+        clock.now += 9
+        assert await rc.fetch("/accounts/get", "tok", loader) == "v1"
+        assert await rc.fetch("/accounts/get", "other", loader) == "v2"  # keyed by token too
+        assert await rc.fetch("/item/get", "tok", loader) == "v3"  # no policy
+        assert len(calls) == 3
+        stats = rc.stats()
+        assert (stats.hits, stats.misses) == (1, 2)
+    asyncio.run(run())
+
+def test_concurrent_misses_share_one_load():
+    async def run():
+        rc = cache(Clock())
+        gate = asyncio.Event()
+        loader, calls = make_loader(["v1"], gate)
+        readers = [asyncio.ensure_future(rc.fetch("/accounts/get", "tok", loader)) for _ in range(5)]
+        await asyncio.sleep(0)
+        gate.set()
+        assert await asyncio.gather(*readers) == ["v1"] * 5
+        assert len(calls) == 1
+    asyncio.run(run())
+
+def test_stale_reads_serve_the_old_value_and_coalesce_one_refresh():
+    async def run():
+        clock = Clock()
+        rc = cache(clock)
+        gate = asyncio.Event()
+        gate.set()
+        loader, calls = make_loader(["v1", "v2"], gate)
+        await rc.fetch("/accounts/get", "tok", loader)
+        gate.clear()
+        clock.now += 15  # past ttl, within stale_ttl
+        stale = await asyncio.gather(*(rc.fetch("/accounts/get", "tok", loader) for _ in range(5)))
+        assert stale == ["v1"] * 5
+        await asyncio.sleep(0)
+        assert len(calls) == 2  # one refresh for all five stale reads
+        gate.set()
+        while rc._refreshing:
+            await asyncio.sleep(0)
+        assert await rc.fetch("/accounts/get", "tok", loader) == "v2"
+        stats = rc.stats()
+        assert (stats.stale_hits, stats.refreshes, stats.hits) == (5, 1, 1)
+    asyncio.run(run())
+
+def test_failed_refresh_keeps_the_stale_value_and_retries():
+    async def run():
+        clock = Clock()
+        rc = cache(clock)
+        loader, calls = make_loader(["v1", RuntimeError("bank down"), "v3"])
+        await rc.fetch("/accounts/get", "tok", loader)
+        clock.now += 15
+        assert await rc.fetch("/accounts/get", "tok", loader) == "v1"
+        while rc._refreshing:
+            await asyncio.sleep(0)
+        assert rc.stats().refresh_errors == 1
+        assert await rc.fetch("/accounts/get", "tok", loader) == "v1"  # starts the retry
+        while rc._refreshing:
+            await asyncio.sleep(0)
+        assert await rc.fetch("/accounts/get", "tok", loader) == "v3"
+        assert len(calls) == 3
+    asyncio.run(run())
+
+def test_expired_entries_and_invalidate_load_again():
+    async def run():
+        clock = Clock()
+        rc = cache(clock)
+        loader, calls = make_loader(["v1", "v2", "v3"])
+        await rc.fetch("/accounts/get", "tok", loader)
+        clock.now += 31  # past ttl + stale_ttl
+        assert await rc.fetch("/accounts/get", "tok", loader) == "v2"
+        rc.invalidate("/accounts/get", "tok")
+        assert await rc.fetch("/accounts/get", "tok", loader) == "v3"
+        assert rc.stats().refreshes == 0
+    asyncio.run(run())
+
+def test_policy_by_path_and_hashed_keys():
+    async def run():
+        rc = cache(Clock())
+        loader, calls = make_loader(["v1"])
+        for _ in range(2):
+            assert await rc.fetch("http://bank/accounts/get", "tok", loader, path="/accounts/get") == "v1"
+        assert len(calls) == 1
+        assert "tok" not in ResponseCache.key("/accounts/get", "tok")
+    asyncio.run(run())
@@ -0,0 +1,68 @@
+import pytest
+
+from data_fetcher import ollama_transformer as ot
+
+CSV = ("Date,Description,Amount,Currency\n"
+       "2025-07-01,Starbucks #12,-4.50,USD\n"
+       "2025-07-02,Shell Oil,-40.00,USD\n")
+
+@pytest.fixture
+def model_requests(stub_model, tmp_path, monkeypatch):
+    """Model model_requests made while a result cache lives in tmp_path."""
+    monkeypatch.setattr(ot, "OLLAMA_CACHE_PATH", str(tmp_path / "results.sqlite"))
+    calls = []
+    request = ot._request_ollama
+
+    def counting(messages, schema, timing=None):
+        calls.append(messages)
+        return request(messages, schema, timing)
+    monkeypatch.setattr(ot, "_request_ollama", counting)
+    yield calls
+    if ot._cache is not None:
+        ot._cache.close()
+
+def test_second_transform_is_served_from_the_cache(model_requests):
+    first = ot.transform(CSV, chunked=False)
+    timing = ot.TransformTiming()
+    assert ot.transform(CSV, chunked=False, timing=timing) == first
+    assert len(model_requests) == 1
+    assert timing.cache_hits == 1 and timing.calls == 0
+    assert timing.stages["cache"] > 0
+    assert ot.cache_stats().hits >= 1
+
+def test_bypass_asks_the_model_and_refreshes_the_entry(model_requests, monkeypatch):
+    ot.transform(CSV, chunked=False)
+    ot.transform(CSV, chunked=False, bypass_cache=True)
+    monkeypatch.setattr(ot, "OLLAMA_CACHE_BYPASS", True)
+    ot.transform(CSV, chunked=False)
+    assert len(model_requests) == 3
+    monkeypatch.setattr(ot, "OLLAMA_CACHE_BYPASS", False)
+    ot.transform(CSV, chunked=False)
+    assert len(model_requests) == 3
+
+def test_key_covers_model_schema_and_messages():
+    messages = [{"role": "user", "content": CSV}]
+    key = ot.cache_key("m", ot.SCHEMA, messages)
+    assert key == ot.cache_key("m", dict(ot.SCHEMA), [dict(messages[0])])
+    assert key != ot.cache_key("other", ot.SCHEMA, messages)
+    assert key != ot.cache_key("m", {"type": "object"}, messages)
+    assert key != ot.cache_key("m", ot.SCHEMA, [{"role": "user", "content": CSV + " "}])
+
+def test_an_entry_that_fails_the_schema_is_asked_for_again(model_requests):
+    messages = [{"role": "user", "content": CSV}]
+    ot.result_cache().set(ot.cache_key(ot.MODEL, ot.SCHEMA, messages), {"account_id": 1})
+    result = ot.call_ollama(messages, ot.SCHEMA)
+    assert len(model_requests) == 1 and ot.validate_minimal(result, ot.SCHEMA) == []
+    assert ot.call_ollama(messages, ot.SCHEMA) == result  # the good answer replaced it
+    assert len(model_requests) == 1
+
+def test_results_outlive_the_process_cache_handle(model_requests, monkeypatch):
+    first = ot.transform(CSV, chunked=False)
+    ot._cache.close()
+    monkeypatch.setattr(ot, "_cache", None)  # as in a new worker
+    assert ot.transform(CSV, chunked=False) == first
+    assert len(model_requests) == 1
+
+def test_no_cache_without_a_path(stub_model):
+    assert ot.result_cache() is None
+    assert ot.cache_stats() == ot.DiskCacheStats()
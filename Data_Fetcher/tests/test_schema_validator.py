@@ -0,0 +1,61 @@
+import pytest
+
+from data_fetcher.utils.schema_validator import validate_batch, validate_canonical
+
+def txn(i, **over):
+    row = {"txn_id": f"T{i}", "account_id": "A1", "date": "2025-07-01", "amount": -1.5 - i, "currency": "USD",
+           "merchant_raw": "AMZN Mkt", "merchant_norm": "Amazon", "mcc": None, "category": None, "meta": {}}
+    row.update(over)
+    return row
+
+ACCOUNT = {"account_id": "A1", "type": "depository", "subtype": "checking", "mask": "0000",
+           "currency": "USD", "current": 10.0, "available": None, "name": "Checking"}
+
+def test_clean_batch():
+    result = validate_batch("transactions", [txn(i) for i in range(3)])
+    assert result.ok and (result.total, result.checked) == (3, 3)
+    assert [r["txn_id"] for r in result.valid] == ["T0", "T1", "T2"]
+
+def test_row_errors_carry_index_field_type_and_value():
+    rows = [txn(0), txn(1, amount="abc"), txn(2, currency="usd", date="07/01/2025"), txn(3)]
+    del rows[3]["meta"]
+    result = validate_batch("transactions", rows)
+    assert not result.ok
+    assert result.invalid_rows == [1, 2, 3]
+    found = {(e.index, e.field, e.type) for e in result.errors}
+    assert found == {(1, "amount", "float_parsing"), (2, "currency", "string_pattern_mismatch"),
+                     (2, "date", "string_pattern_mismatch"), (3, "meta", "missing")}
+    assert next(e for e in result.errors if e.index == 1).value == "abc"
+    assert [r["txn_id"] for r in result.valid] == ["T0"]
+
+def test_valid_rows_are_coerced():
+    result = validate_batch("transactions", [txn(0, amount="12.50"), txn(1, amount="x")])
+    assert result.valid == [txn(0, amount=12.5)]
+
+def test_sampling_checks_a_share_and_passes_the_rest_through():
+    rows = [txn(i, amount="x") if i % 10 == 0 else txn(i, amount=str(i)) for i in range(100)]
+    result = validate_batch("transactions", rows, sample_rate=0.25, seed=7)
+    assert (result.total, result.checked) == (100, 25)
+    rejected = set(result.invalid_rows)
+    assert rejected and all(i % 10 == 0 for i in rejected)
+    kept = [r["txn_id"] for r in result.valid]
+    assert kept == [f"T{i}" for i in range(100) if i not in rejected]  # input order
+    # sampled rows are coerced; unchecked rows are passed through as given
+    types = {type(r["amount"]) for r in result.valid}
+    assert types == {float, str}
+    assert validate_batch("transactions", rows, 0.25, seed=7).errors == result.errors  # seeded
+
+def test_sampling_checks_at_least_one_row_and_handles_empty():
+    assert validate_batch("transactions", [txn(0, amount="x")], sample_rate=0.01).invalid_rows == [0]
+    empty = validate_batch("accounts", [], sample_rate=0.5)
+    assert empty.ok and (empty.total, empty.checked, empty.valid) == (0, 0, [])
+
+def test_validate_canonical_per_kind():
+    results = validate_canonical({"accounts": [ACCOUNT, {**ACCOUNT, "type": "savings"}], "transactions": [txn(0)]})
+    assert set(results) == {"accounts", "transactions"}
+    assert results["accounts"].invalid_rows == [1] and results["accounts"].errors[0].field == "type"
+    assert results["transactions"].ok
+
+def test_unknown_kind():
+    with pytest.raises(KeyError):
+        validate_batch("balances", [])
@@ -0,0 +1,63 @@
+import pytest
+
+from data_fetcher.testing.redis_standin import RedisStandIn
+from data_fetcher.utils.shared_rate_limiter import MmapGCRABackend, RedisGCRABackend, SharedRateLimiter, gcra
+
+@pytest.fixture
+def clock():
+    now = [1024.0]  # rates below are powers of two, so GCRA's arithmetic stays exact
+    return now
+
+@pytest.fixture
+def state_file(tmp_path):
+    return str(tmp_path / "df_rate.gcra")
+
+def test_burst_then_refill(clock, state_file):
+    limiter = SharedRateLimiter(MmapGCRABackend(state_file, clock=lambda: clock[0]), default=(8.0, 5))
+    assert [limiter.try_acquire("a") for _ in range(5)] == [0.0] * 5
+    assert limiter.try_acquire("a") == 0.125
+    clock[0] += 0.125
+    assert limiter.try_acquire("a") == 0.0
+    assert limiter.try_acquire("a") > 0
+    assert limiter.try_acquire("b") == 0.0  # keys are independent
+
+def test_two_limiters_on_one_file_share_the_budget(clock, state_file):
+    a = SharedRateLimiter(MmapGCRABackend(state_file, clock=lambda: clock[0]), default=(8.0, 4))
+    b = SharedRateLimiter(MmapGCRABackend(state_file, clock=lambda: clock[0]), default=(8.0, 4))
+    admitted = {a: 0, b: 0}
+    for _ in range(128):  # two seconds, both workers trying every 1/64 s
+        for lim in (a, b):
+            admitted[lim] += not lim.try_acquire("bank")
+        clock[0] += 1 / 64
+    # the burst, then one token per 1/8 s up to t = 127/64: the budget of one limiter, not two
+    assert sum(admitted.values()) == 4 + 15
+    assert admitted[a] and admitted[b]
+
+def test_redis_standin_matches_gcra(clock):
+    backend = RedisGCRABackend(RedisStandIn(clock=lambda: clock[0]))
+    tat, interval, burst = clock[0], 0.3, 3
+    for dt in [0, 0, 0, 0, 0.1, 0.2, 0.05, 1.0, 0, 0, 0, 0, 0.3]:
+        clock[0] += dt
+        expected_tat, expected_wait = gcra(tat, clock[0], interval, burst)
+        assert backend.take("k", interval, burst) == pytest.approx(expected_wait)
+        if not expected_wait:
+            tat = expected_tat
+
+def test_redis_state_expires_once_the_bucket_is_full_again(clock):
+    r = RedisStandIn(clock=lambda: clock[0])
+    backend = RedisGCRABackend(r)
+    backend.take("k", 0.5, 2)
+    assert r.get("df:rl:k") is not None
+    clock[0] += 1.0
+    assert r.get("df:rl:k") is None
+
+def test_standin_rejects_unknown_scripts():
+    with pytest.raises(ValueError, match="unknown script"):
+        RedisStandIn().eval("return 1", 0)
+
+def test_guard_raises_rate_limited(clock, state_file):
+    limiter = SharedRateLimiter(MmapGCRABackend(state_file, clock=lambda: clock[0]), default=(1.0, 1))
+    assert limiter.guard("a", lambda: "ok") == "ok"
+    with pytest.raises(Exception) as e:
+        limiter.guard("a", lambda: "ok")
+    assert e.value.code == "RATE_LIMITED" and e.value.retry_after == pytest.approx(1.0)
@@ -0,0 +1,54 @@
+import pytest
+
+from data_fetcher import shared_tables
+from data_fetcher.shared_tables import SharedTables, publish, read_version
+
+TABLES = {"mcc_map": {"5814": "Fast Food", "4111": "Transport"}, "aliases": {"AMZN Mkt": "Amazon", "é": "ü"}}
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "df_ref.tbl")
+
+def test_published_tables_read_back(path):
+    publish(path, TABLES, "7")
+    tables = SharedTables(path)
+    assert tables.version == "7" and read_version(path) == "7"
+    assert set(tables.names()) == {"mcc_map", "aliases"}
+    for name, table in TABLES.items():
+        view = tables.table(name)
+        assert dict(view) == table and len(view) == len(table)
+    assert tables.table("aliases")["é"] == "ü"
+    assert tables.table("mcc_map").get("0000") is None
+    with pytest.raises(KeyError):
+        tables.table("mcc_map")["0000"]
+
+def test_refresh_picks_up_a_new_publish_and_old_views_stay_valid(path):
+    publish(path, TABLES, "1")
+    tables = SharedTables(path, check_interval=0)
+    old = tables.table("mcc_map")
+    publish(path, {"mcc_map": {"5814": "Restaurants"}}, "2")
+    assert tables.refresh()
+    assert tables.version == "2"
+    assert tables.table("mcc_map")["5814"] == "Restaurants"
+    assert old["5814"] == "Fast Food"  # still on the previous mapping
+    assert not tables.refresh()  # nothing new
+
+def test_read_version_of_missing_or_foreign_files(path, tmp_path):
+    assert read_version(path) is None
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"not a table file" * 4)
+    assert read_version(str(other)) is None
+    with pytest.raises(ValueError):
+        SharedTables(str(other))
+
+def test_large_table_lookups(path):
+    big = {f"k{i}": f"v{i}" for i in range(5000)}
+    publish(path, {"big": big})
+    view = SharedTables(path).table("big")
+    assert all(view[k] == v for k, v in big.items())
+    assert sorted(view) == sorted(big)
+
+def test_format_bump_is_not_read_as_current(path, monkeypatch):
+    publish(path, TABLES, "1")
+    monkeypatch.setattr(shared_tables, "FORMAT", shared_tables.FORMAT + 1)
+    assert read_version(path) is None
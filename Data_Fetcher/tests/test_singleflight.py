@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from data_fetcher.utils.error_handler import FetchError
+from data_fetcher.utils.singleflight import SingleFlight
+
+def test_concurrent_callers_share_one_call():
+    async def run():
+        sf, calls = SingleFlight(), []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"accounts": []}
+        results = await asyncio.gather(*(sf.do("k", fn) for _ in range(5)))
+        assert all(r is results[0] for r in results)
+        assert (len(calls), sf.calls, sf.shared, sf.in_flight()) == (1, 5, 4, 0)
+    asyncio.run(run())
+
+def test_error_reaches_every_waiter_and_the_next_call_retries():
+    async def run():
+        sf, calls = SingleFlight(), []
+
+        async def fail():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise FetchError("BANK_UNAVAILABLE", "upstream 503", 502, retryable=True)
+        results = await asyncio.gather(*(sf.do("k", fail) for _ in range(4)), return_exceptions=True)
+        assert len(calls) == 1
+        assert all(isinstance(r, FetchError) and r.code == "BANK_UNAVAILABLE" for r in results)
+        assert sf.in_flight() == 0
+
+        async def ok():
+            calls.append(1)
+            return "ok"
+        assert await sf.do("k", ok) == "ok"  # a failed flight is not cached
+        assert len(calls) == 2
+    asyncio.run(run())
+
+def test_cancelling_one_waiter_leaves_the_flight_running():
+    async def run():
+        sf = SingleFlight()
+        gate = asyncio.Event()
+
+        async def fn():
+            await gate.wait()
+            return "done"
+        first = asyncio.ensure_future(sf.do("k", fn))
+        second = asyncio.ensure_future(sf.do("k", fn))
+        await asyncio.sleep(0)
+        first.cancel()
+        gate.set()
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+    asyncio.run(run())
+
+def test_keys_are_independent():
+    async def run():
+        sf = SingleFlight()
+
+        async def value(v):
+            await asyncio.sleep(0.01)
+            return v
+        assert await asyncio.gather(sf.do("a", lambda: value(1)), sf.do("b", lambda: value(2))) == [1, 2]
+        assert sf.shared == 0
+    asyncio.run(run())
@@ -0,0 +1,55 @@
+import json
+import random
+
+import pytest
+
+from data_fetcher.parsers.stream_parser import JSONArrayStream, parse_stream
+
+DOC = {
+    "accounts": [{"id": "a1", "name": "Chk \"main\" \\ é"}],
+    "transactions": [
+        {"id": f"t{i}", "amount": i * -1.25, "memo": "x\\\"y]}{[" * (i % 3), "tags": [[], {}, None, True]}
+        for i in range(50)
+    ],
+    "total_transactions": 50,
+    "next_cursor": "c-☃",
+}
+KEYS = ("transactions", "accounts")
+
+def _expected():
+    return [("accounts", a) for a in DOC["accounts"]] + [("transactions", t) for t in DOC["transactions"]]
+
+def _splits(data: bytes, rng: random.Random):
+    i = 0
+    while i < len(data):
+        n = rng.randint(1, 40)
+        yield data[i:i + n]
+        i += n
+
+def test_random_splits_match_json_loads():
+    data = json.dumps(DOC, ensure_ascii=False).encode("utf-8")
+    rng = random.Random(7)
+    for _ in range(20):
+        parser = JSONArrayStream(KEYS)
+        items = [item for chunk in _splits(data, rng) for item in parser.feed(chunk)]
+        parser.close()
+        assert items == _expected()
+        assert parser.top == {"total_transactions": 50, "next_cursor": "c-☃"}
+
+def test_byte_by_byte():
+    data = json.dumps(DOC).encode("utf-8")
+    assert list(parse_stream((data[i:i + 1] for i in range(len(data))), KEYS)) == _expected()
+
+def test_malformed_element_raises():
+    parser = JSONArrayStream({"transactions"})
+    with pytest.raises(ValueError):
+        parser.feed(b'{"transactions": [{"id": 1}, {bad}]}')
+
+def test_truncated_document_raises_on_close():
+    data = json.dumps(DOC).encode("utf-8")
+    with pytest.raises(ValueError, match="ended before"):
+        list(parse_stream([data[:len(data) // 2]], KEYS))
+
+def test_trailing_data_raises_on_close():
+    with pytest.raises(ValueError):
+        list(parse_stream([b'{"transactions": []} {"x": 1}'], KEYS))
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from data_fetcher import ollama_transformer as ot
+from data_fetcher.parsers.stream_parser import JSONArrayStream
+from data_fetcher.testing.server import serve_app
+
+CSV = ("Date,Description,Amount,Currency\n"
+       "2025-07-01,Starbucks #12,-4.50,USD\n"
+       "2025-07-02,Shell Oil,-40.00,USD\n"
+       "2025-07-03,Amazon,-9.99,USD\n")
+TX = {"tx_id": None, "date": "2025-07-01", "amount": -1.0, "currency": "USD", "merchant": None,
+      "description": "x", "category": None}
+
+def pieces(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+@pytest.fixture
+def ndjson_server():
+    """A /api/chat that streams the given NDJSON lines verbatim."""
+    app = FastAPI()
+    app.state.lines = []
+
+    @app.post("/api/chat")
+    async def chat():
+        return StreamingResponse(iter(app.state.lines), media_type="application/x-ndjson")
+    url, server, _ = serve_app(app)
+    yield url + "/api/chat", app
+    server.should_exit = True
+
+def test_stream_yields_the_same_transactions_as_transform(stub_model):
+    streamed = list(ot.transform_stream(CSV))
+    assert streamed == ot.transform(CSV, chunked=False)["transactions"]
+    assert len(streamed) == 3
+    parser = JSONArrayStream({"transactions"})
+    assert list(ot.transform_stream(CSV, account_hint="A1", parser=parser)) == streamed
+    assert parser.top["account_id"] == "A1"
+
+def test_transactions_arrive_before_the_reply_ends(monkeypatch):
+    doc = json.dumps({"account_id": "A1", "transactions": [TX, {**TX, "amount": -2.0}]})
+    sent = []
+
+    def fake_stream(messages, schema):
+        for p in pieces(doc):
+            sent.append(p)
+            yield p
+    monkeypatch.setattr(ot, "stream_ollama", fake_stream)
+    stream = ot.transform_stream(CSV)
+    assert next(stream) == TX
+    assert len("".join(sent)) < len(doc)
+    assert [tx["amount"] for tx in stream] == [-2.0]
+
+def test_an_invalid_transaction_raises_after_the_good_ones(monkeypatch):
+    doc = json.dumps({"account_id": None, "transactions": [TX, {**TX, "amount": "two"}]})
+    monkeypatch.setattr(ot, "stream_ollama", lambda messages, schema: iter(pieces(doc)))
+    stream = ot.transform_stream(CSV)
+    assert next(stream) == TX
+    with pytest.raises(ValueError, match="transaction 1 failed validation"):
+        next(stream)
+
+def test_a_truncated_reply_raises(monkeypatch):
+    doc = json.dumps({"account_id": None, "transactions": [TX, TX]})
+    monkeypatch.setattr(ot, "stream_ollama", lambda messages, schema: iter(pieces(doc[:-20])))
+    with pytest.raises(ValueError, match="ended before"):
+        list(ot.transform_stream(CSV))
+
+def test_ndjson_pieces_errors_and_missing_done(ndjson_server, monkeypatch):
+    url, app = ndjson_server
+    monkeypatch.setattr(ot, "OLLAMA_URL", url)
+    line = lambda **o: (json.dumps(o) + "\n").encode()
+    app.state.lines = [line(message={"content": '{"a"'}, done=False), b"\n",
+                       line(message={"content": ": 1}"}, done=False), line(message={"content": ""}, done=True),
+                       line(message={"content": "after done"}, done=False)]
+    assert list(ot.stream_ollama([], {})) == ['{"a"', ": 1}"]
+    app.state.lines = [line(message={"content": "{"}, done=False), line(error="model not found")]
+    with pytest.raises(RuntimeError, match="model not found"):
+        list(ot.stream_ollama([], {}))
+    app.state.lines = [line(message={"content": "{}"}, done=False)]
+    with pytest.raises(RuntimeError, match="without a done message"):
+        list(ot.stream_ollama([], {}))
+
+def test_completed_streams_are_cached_and_replayed(stub_model, tmp_path, monkeypatch):
+    monkeypatch.setattr(ot, "OLLAMA_CACHE_PATH", str(tmp_path / "results.sqlite"))
+    first = list(ot.transform_stream(CSV))
+    monkeypatch.setattr(ot, "stream_ollama", lambda messages, schema: pytest.fail("model asked again"))
+    parser = JSONArrayStream({"transactions"})
+    assert list(ot.transform_stream(CSV, parser=parser)) == first
+    assert "account_id" in parser.top
+    # transform() shares the entry: same model, schema and messages
+    monkeypatch.setattr(ot, "_request_ollama", lambda *a, **k: pytest.fail("model asked again"))
+    assert ot.transform(CSV, chunked=False)["transactions"] == first
+    ot._cache.close()